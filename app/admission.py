@@ -0,0 +1,147 @@
+# app/admission.py
+
+import os
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+from app import telemetry
+
+# Route classes: "cpu" routes are bound by spaCy scoring, "llm" routes by upstream quota
+ROUTE_CLASSES: Dict[Tuple[str, str], str] = {
+    ("POST", "/analyze"): "cpu",
+    ("POST", "/analyze-pdf"): "cpu",
+    ("POST", "/predict-traffic"): "cpu",
+    ("POST", "/content-audit"): "cpu",
+    ("POST", "/competitor-analysis"): "cpu",
+    ("POST", "/uniqueness/nearest"): "cpu",
+    ("POST", "/redundancy"): "cpu",
+    ("POST", "/citation-scores"): "cpu",
+    # each revision a live session scores; see app/live_scoring.py
+    ("WEBSOCKET", "/ws/content-doctor"): "cpu",
+    ("POST", "/content-lab"): "llm",
+    ("POST", "/brand-protector"): "llm",
+    ("POST", "/query-search"): "llm",
+    ("GET", "/brand-chart"): "llm",
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+# Per-user token bucket (refill rate per second, burst size) and global concurrency per class
+CLASS_LIMITS: Dict[str, Dict[str, float]] = {
+    "cpu": {
+        "rate": _env_float("ADMISSION_CPU_RATE", 0.5),
+        "burst": _env_float("ADMISSION_CPU_BURST", 10),
+        "concurrency": _env_float("ADMISSION_CPU_CONCURRENCY", 4),
+    },
+    "llm": {
+        "rate": _env_float("ADMISSION_LLM_RATE", 0.1),
+        "burst": _env_float("ADMISSION_LLM_BURST", 5),
+        "concurrency": _env_float("ADMISSION_LLM_CONCURRENCY", 8),
+    },
+}
+
+# Idle buckets beyond this many are dropped (a full bucket carries no state)
+MAX_BUCKETS = 10_000
+
+# Upper bound on the Retry-After hint, in seconds
+MAX_RETRY_AFTER = 3600.0
+
+
+class TokenBucket:
+    """Classic token bucket; `take` never blocks."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: Optional[float] = None) -> float:
+        """
+        Consumes one token. Returns 0 on success, otherwise the seconds until
+        a token will be available.
+        """
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        if self.rate <= 0:
+            return MAX_RETRY_AFTER
+        return min((1 - self.tokens) / self.rate, MAX_RETRY_AFTER)
+
+
+class AdmissionController:
+    """
+    Token-bucket limits per (user, route class) plus a bounded number of
+    in-flight requests per class. Both checks fail fast instead of queueing.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, float]] = CLASS_LIMITS):
+        self.limits = limits
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._inflight: Dict[str, int] = {cls: 0 for cls in limits}
+        self._lock = threading.Lock()
+
+    def _bucket(self, user: str, cls: str) -> TokenBucket:
+        key = (user, cls)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                self._prune()
+            limits = self.limits[cls]
+            bucket = TokenBucket(limits["rate"], limits["burst"])
+            self._buckets[key] = bucket
+        return bucket
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for key, bucket in list(self._buckets.items()):
+            bucket._refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self._buckets[key]
+
+    def try_acquire(self, user: str, cls: str) -> Tuple[Optional[int], float]:
+        """
+        Returns (None, 0) when admitted — the caller must then call `release`.
+        Otherwise returns (status_code, retry_after_seconds) for the rejection.
+        """
+        with self._lock:
+            wait = self._bucket(user, cls).take()
+            if wait > 0:
+                telemetry.incr("admission_rejected", route_class=cls, reason="rate_limited")
+                return 429, wait
+            if self._inflight[cls] >= self.limits[cls]["concurrency"]:
+                # Refund the token: the user did nothing wrong, we are just full
+                self._buckets[(user, cls)].tokens += 1
+                telemetry.incr("admission_rejected", route_class=cls, reason="overloaded")
+                return 503, 1.0
+            self._inflight[cls] += 1
+            telemetry.incr("admission_admitted", route_class=cls)
+            telemetry.set_gauge("admission_inflight", self._inflight[cls], route_class=cls)
+            return None, 0.0
+
+    def release(self, cls: str) -> None:
+        with self._lock:
+            self._inflight[cls] = max(0, self._inflight[cls] - 1)
+            telemetry.set_gauge("admission_inflight", self._inflight[cls], route_class=cls)
+
+
+def classify_route(method: str, path: str) -> Optional[str]:
+    return ROUTE_CLASSES.get((method, path))
+
+
+admission = AdmissionController()
@@ -1,27 +1,28 @@
-import os
+import io
 import json
-import requests
 import logging
+import threading
+import contextvars
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from dotenv import load_dotenv
-from typing import List
-import matplotlib.pyplot as plt
-
-load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+from typing import Dict, List, Optional
 
+from app.generations import LLM_CACHE_TTL, complete
+from app.model_router import TASK_CLASS_OF
+from app import memory
+from app.keyword_index import brand_index
+from app.shared_cache import cached
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
+load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-def get_groq_response(brand_name, model="llama3-70b-8192"):
-    if not GROQ_API_KEY:
-        raise EnvironmentError("❌ GROQ_API_KEY is not set in your .env file.")
 
+def get_groq_response(brand_name, model=None):
+    """Brand profile as JSON, from the router's model for short JSON tasks (or `model`)."""
     prompt = f"""
 You are an expert branding analyst. Analyze the brand "{brand_name}" and return the results in this exact JSON format:
 
@@ -35,23 +36,16 @@ You are an expert branding analyst. Analyze the brand "{brand_name}" and return
 Only respond with the JSON.
 """
 
-    headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
-
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt},
-        ],
-        "temperature": 0.7,
-    }
-
-    response = requests.post(GROQ_API_URL, headers=headers, json=payload)
+    result = complete(
+        prompt,
+        task="brand_json",
+        temperature=0.7,
+        model=model,
+        system="You are a helpful assistant.",
+    )
 
     try:
-        response.raise_for_status()
-        resp_json = response.json()
-        content = resp_json.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+        content = result.replies[0].strip()
 
         if not content:
             raise ValueError("Empty content received from LLM")
@@ -68,13 +62,30 @@ Only respond with the JSON.
         }
 
 
-def extract_keywords(text):
-    return list(set(word.strip(".,!?").lower() for word in text.split() if len(word) > 4))
+def _is_error(brand_data):
+    return str(brand_data.get("description", "")).startswith("⚠️")
+
+
+def _index_text(brand_data):
+    return " ".join(str(brand_data.get(k, "")) for k in ("description", "offerings"))
+
+
+def extract_keywords(brand_data, k: int = 8):
+    """
+    Top distinguishing terms for a brand from the shared TF-IDF index,
+    indexing the brand first if it has not been seen yet.
+    """
+    brand = brand_data.get("brand") or ""
+    if _is_error(brand_data):
+        return []
+    if brand not in brand_index:
+        brand_index.add(brand, _index_text(brand_data))
+    return [term for term, _ in brand_index.top_terms(brand, k)]
 
 
 def summarize_brand(brand_data):
     description = brand_data.get("description", "")
-    keywords = extract_keywords(description)
+    keywords = extract_keywords(brand_data)
     return {
         "brand": brand_data.get("brand"),
         "summary": description,
@@ -116,7 +127,7 @@ def run_brand_analysis(
     cite_as: str = "",
     policy: str = "",
 ):
-    logging.info("[bold green]=== BrandGuard: LLM Insight Tool ===[/bold green]\n")
+    logger.info("BrandGuard analysis started", extra={"brand": brand})
 
     # Normalize competitors input to a list
     if isinstance(competitors, str):
@@ -136,16 +147,20 @@ def run_brand_analysis(
     agents = agents or []
     allow_paths = allow_paths or []
     disallow_paths = disallow_paths or []
-    all_infos = []
-
+    results = []
     for b in all_brands:
-        print(f"\n🔍 Querying GROQ for: [yellow]{b}[/yellow]...\n")
+        logger.debug("Querying GROQ", extra={"brand": b})
         result = get_groq_response(b)
-        brand_info = summarize_brand(result)
-        all_infos.append(brand_info)
+        result["brand"] = result.get("brand") or b
+        # Index every brand before ranking terms, so each summary is relative to the others
+        if not _is_error(result):
+            brand_index.add(result["brand"], _index_text(result))
+        results.append(result)
         time.sleep(2)
 
-    logging.info(f"\n[bold green]=== Brand Summary Comparison ===[/bold green]\n {all_infos}")
+    all_infos = [summarize_brand(result) for result in results]
+
+    logger.info("Brand summary comparison built", extra={"brands": len(all_infos)})
     res_table = generate_html_table(all_infos)
     # llm_txt = generate_llm_txt(agents, allow_paths, disallow_paths, cite_as, policy)
 
@@ -161,85 +176,162 @@ def generate_llm_txt(
 ) -> str:
     if not agents and not allow_paths and not disallow_paths and not cite_as:
         return None
-    # original LLM-generation logic here, which produces `txt_blocks` as a list
-    llm_txt = ""
-    for agent in agents:
-        llm_txt += f"User-agent: {agent.strip()}\n"
-    for path in allow_paths:
-        llm_txt += f"Allow: {path.strip()}\n"
-    for path in disallow_paths:
-        llm_txt += f"Disallow: {path.strip()}\n"
+    lines = [f"User-agent: {agent.strip()}" for agent in agents]
+    lines += [f"Allow: {path.strip()}" for path in allow_paths]
+    lines += [f"Disallow: {path.strip()}" for path in disallow_paths]
     if cite_as:
-        llm_txt += f"Cite-as: {cite_as}\n"
+        lines.append(f"Cite-as: {cite_as}")
     if policy:
-        llm_txt += f"Policy: {policy}\n"
-    llm_txt += "\n"
-    return llm_txt
+        lines.append(f"Policy: {policy}")
+    return "\n".join(lines) + "\n\n"
 
 
 # Bubble Chart Function
-def run_brand_comparison_chart():
-    brands = input("🔠 Paste your comma-separated brand names: ").split(",")
-    brands = [b.strip() for b in brands if b.strip()]
+CHART_CACHE_SIZE = 256
+CHART_MEDIA_TYPES = {"svg": "image/svg+xml", "png": "image/png"}
+
+# (brands, topics, day) → mention scores, and (brands, topics, day, fmt) → rendered bytes
+_chart_scores_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+_chart_render_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_chart_cache_lock = threading.Lock()
+memory.register_cache("brand_protector.chart_scores", lambda: {"entries": len(_chart_scores_cache)})
+memory.register_cache(
+    "brand_protector.chart_renders",
+    lambda: {
+        "entries": len(_chart_render_cache),
+        "bytes": sum(len(image) for image in list(_chart_render_cache.values())),
+    },
+)
 
-    topics = input("🔍 Enter 1–2 topics you'd like to compare brands on (comma-separated): ").split(
-        ","
-    )
-    topics = [t.strip() for t in topics if t.strip()]
-    print(f"\n✨ Analyzing brands: {brands}")
-    print(f"📊 Topics: {topics}")
 
-    prompts = {
-        topic: f"List the top 10 brands for {topic}. Just give a clean list." for topic in topics
-    }
+def _cache_get(cache: OrderedDict, key):
+    with _chart_cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
 
-    def ask_groq(prompt):
-        response = groq_client.chat.completions.create(
-            model="llama3-8b-8192", messages=[{"role": "user", "content": prompt}], temperature=0.7
-        )
-        return response.choices[0].message.content
+def _cache_put(cache: OrderedDict, key, value) -> None:
+    with _chart_cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > CHART_CACHE_SIZE:
+            cache.popitem(last=False)
 
-    scores = {brand: {topic: 0 for topic in topics} for brand in brands}
 
-    for topic, prompt in prompts.items():
-        print(f"\n🔍 Asking about: {topic}")
-        reply = ask_groq(prompt)
-        print(reply)
+def ask_groq(prompt: str, model: Optional[str] = None, task: str = "ranking_list") -> str:
+    """
+    Single chat completion on the router's model for `task` (or `model`),
+    shared across workers.
+    """
+    return cached(
+        "llm",
+        json.dumps(["chat", model or TASK_CLASS_OF.get(task, task), 0.7, prompt]),
+        lambda: complete(prompt, task=task, temperature=0.7, model=model).replies[0],
+        ttl=LLM_CACHE_TTL,
+    )
 
-        lines = reply.strip().split("\n")
-        for i, line in enumerate(lines[:10]):
-            for brand in brands:
-                if brand.lower() in line.lower():
-                    rank_score = 10 - i
-                    scores[brand][topic] += rank_score
 
+def score_brand_mentions(reply: str, brands: List[str]) -> Dict[str, float]:
+    """
+    Rank score per brand from a "top 10" list reply: 10 for the first line,
+    down to 1 for the tenth; 0.5 if only mentioned outside the list.
+    """
+    lines = reply.strip().split("\n")[:10]
+    scores = {brand: 0.0 for brand in brands}
+    for i, line in enumerate(lines):
         for brand in brands:
-            if brand.lower() in reply.lower() and all(
-                brand.lower() not in l.lower() for l in lines[:10]
-            ):
-                scores[brand][topic] += 0.5
-
-    x = []
-    y = []
-    sizes = []
-    labels = []
+            if brand.lower() in line.lower():
+                scores[brand] += 10 - i
+    for brand in brands:
+        if brand.lower() in reply.lower() and all(brand.lower() not in l.lower() for l in lines):
+            scores[brand] += 0.5
+    return scores
+
+
+def compute_brand_topic_scores(brands: List[str], topics: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Asks the LLM for a top-10 list per topic, concurrently, and scores brand mentions.
+    Cached per (brands, topics, day).
+    """
+    key = (tuple(brands), tuple(topics), date.today().isoformat())
+    cached = _cache_get(_chart_scores_cache, key)
+    if cached is not None:
+        return cached
+
+    prompts = {
+        topic: f"List the top 10 brands for {topic}. Just give a clean list." for topic in topics
+    }
+    with ThreadPoolExecutor(max_workers=min(8, len(prompts))) as pool:
+        # one context copy per call, so route overrides and profiling follow each thread
+        futures = [
+            pool.submit(contextvars.copy_context().run, ask_groq, p) for p in prompts.values()
+        ]
+        replies = dict(zip(prompts, (f.result() for f in futures)))
+
+    scores = {brand: {topic: 0.0 for topic in topics} for brand in brands}
+    for topic, reply in replies.items():
+        logger.debug("Topic ranking reply received", extra={"topic": topic, "chars": len(reply)})
+        for brand, score in score_brand_mentions(reply, brands).items():
+            scores[brand][topic] += score
+
+    _cache_put(_chart_scores_cache, key, scores)
+    return scores
+
+
+def render_bubble_chart(
+    scores: Dict[str, Dict[str, float]], brands: List[str], topics: List[str], fmt: str = "svg"
+) -> bytes:
+    """
+    Renders the bubble chart off-screen with the Agg/SVG backends. Uses a bare
+    Figure rather than pyplot, so there is no global figure state to share
+    between concurrent requests.
+    """
+    from matplotlib.figure import Figure
+
+    topic1 = topics[0]
+    topic2 = topics[1] if len(topics) > 1 else topics[0]
+    x = [scores[brand][topic1] for brand in brands]
+    y = [scores[brand][topic2] for brand in brands]
+    sizes = [(xi + yi) * 30 + 100 for xi, yi in zip(x, y)]
     colors = ["#ff5733" if brand.lower() == "ranklab ai" else "#00bfff" for brand in brands]
 
-    topic1, topic2 = topics[0], topics[1] if len(topics) > 1 else topics[0]
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    ax.scatter(x, y, s=sizes, c=colors, alpha=0.7, edgecolors="k")
+    for xi, yi, label in zip(x, y, brands):
+        ax.text(xi, yi, label, fontsize=9, ha="center")
+    ax.set_xlabel(topic1)
+    ax.set_ylabel(topic2)
+    ax.set_title("Brand Comparison Bubble Chart")
+    ax.grid(True)
+    fig.tight_layout()
 
-    for brand in brands:
-        x.append(scores[brand][topic1])
-        y.append(scores[brand][topic2])
-        sizes.append((x[-1] + y[-1]) * 30 + 100)
-        labels.append(brand)
-
-    plt.figure(figsize=(10, 6))
-    plt.scatter(x, y, s=sizes, c=colors, alpha=0.7, edgecolors="k")
-    for i, label in enumerate(labels):
-        plt.text(x[i], y[i], label, fontsize=9, ha="center")
-    plt.xlabel(topic1)
-    plt.ylabel(topic2)
-    plt.title("Brand Comparison Bubble Chart")
-    plt.grid(True)
-    plt.tight_layout()
-    plt.show()
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt)
+    return buf.getvalue()
+
+
+def run_brand_comparison_chart(brands: List[str], topics: List[str], fmt: str = "svg") -> bytes:
+    """
+    Scores brands on 1–2 topics and returns the rendered bubble chart.
+    Repeat views on the same day are served from cache without LLM or matplotlib.
+    """
+    brands = [b.strip() for b in brands if b.strip()]
+    topics = [t.strip() for t in topics if t.strip()][:2]
+    if not brands or not topics:
+        raise ValueError("At least one brand and one topic are required")
+    if fmt not in CHART_MEDIA_TYPES:
+        raise ValueError(f"Unsupported format '{fmt}'. Choose from: {list(CHART_MEDIA_TYPES)}")
+
+    key = (tuple(brands), tuple(topics), date.today().isoformat(), fmt)
+    cached = _cache_get(_chart_render_cache, key)
+    if cached is not None:
+        return cached
+
+    logger.info("Rendering brand chart", extra={"brands": brands, "topics": topics})
+    scores = compute_brand_topic_scores(brands, topics)
+    image = render_bubble_chart(scores, brands, topics, fmt)
+    _cache_put(_chart_render_cache, key, image)
+    return image
@@ -0,0 +1,32 @@
+# app/cancellation.py
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Cooperative cancellation for work running in a thread: the caller sets the
+# event, and the work stops at its next `check()`. Scoring checks between
+# paragraphs and between metrics, so superseded work stops within one step.
+_event: ContextVar[Optional[threading.Event]] = ContextVar("cancel_event", default=None)
+
+
+class Cancelled(Exception):
+    """The work was cancelled by its caller."""
+
+
+@contextmanager
+def cancellable(event: threading.Event):
+    """Runs the block with `event` as the cancellation signal seen by `check()`."""
+    token = _event.set(event)
+    try:
+        yield
+    finally:
+        _event.reset(token)
+
+
+def check() -> None:
+    """Raises Cancelled if the current work has been cancelled; a contextvar lookup otherwise."""
+    event = _event.get()
+    if event is not None and event.is_set():
+        raise Cancelled()
@@ -0,0 +1,122 @@
+# app/citation_scoring.py
+
+import itertools
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.metrics import (
+    Doc,
+    _normalize,
+    analyze_queries,
+    impression_follow_detailed_spacy,
+    impression_pos_count_simple_spacy,
+    impression_word_count_simple_spacy,
+    metric_uniqueness_cited,
+)
+
+MAX_QUERIES = 1000
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """`_normalize` for every row: rows summing to <= 0 become uniform."""
+    totals = matrix.sum(axis=1, keepdims=True)
+    uniform = np.full_like(matrix, 1 / matrix.shape[1])
+    return np.where(totals > 0, matrix / np.where(totals > 0, totals, 1), uniform)
+
+
+class CitedDocument:
+    """
+    The query-independent part of the citation metrics, computed once per
+    document: word-count, position and follow-up vectors, citation
+    uniqueness, and token postings for the cited sentences only.
+
+    Per query, relevance and influence then only touch the postings of
+    the query's own tokens.
+    """
+
+    def __init__(self, doc: Doc, n: Optional[int] = None):
+        sents = list(itertools.chain(*doc))
+        if n is None:
+            n = max((c for _, _, cites in sents for c in cites), default=0) or 5
+        self.n = n
+        self.word_only = np.array(impression_word_count_simple_spacy(doc, n, normalize=False))
+        self.position = np.array(impression_pos_count_simple_spacy(doc, n, normalize=False))
+        self.follow_up = np.array(impression_follow_detailed_spacy(doc, "", n, normalize=False))
+        self.uniqueness = metric_uniqueness_cited(doc, "", n, normalize=False)
+
+        # Cited sentences × citations weights: relevance splits a sentence across its
+        # citations, influence credits each in full (as the impression_* functions do)
+        cited = [(tokens, cites) for tokens, _, cites in sents if any(1 <= c <= n for c in cites)]
+        self.relevance_weights = np.zeros((len(cited), n))
+        self.influence_weights = np.zeros((len(cited), n))
+        self.sentence_lengths = np.array([max(len(tokens), 1) for tokens, _ in cited], dtype=float)
+        # token → ([sentence], [count]) for relevance (raw tokens, with multiplicity)
+        # and for influence (lower-cased tokens longer than 2 chars, once per sentence)
+        relevance_postings = defaultdict(lambda: defaultdict(int))
+        influence_postings = defaultdict(list)
+        for i, (tokens, cites) in enumerate(cited):
+            for c in cites:
+                if 1 <= c <= n:
+                    self.relevance_weights[i, c - 1] += 1 / len(cites)
+                    self.influence_weights[i, c - 1] += 1
+            for t in tokens:
+                relevance_postings[t][i] += 1
+            for t in {t.lower() for t in tokens if len(t) > 2}:
+                influence_postings[t].append(i)
+        self.relevance_postings = {
+            t: (np.fromiter(p.keys(), int), np.fromiter(p.values(), float))
+            for t, p in relevance_postings.items()
+        }
+        self.influence_postings = {t: np.array(p) for t, p in influence_postings.items()}
+        self.sentences = len(cited)
+
+    def relevance_influence(self, queries: List[str]):
+        """(Q × n relevance, Q × n influence), unnormalized."""
+        relevance = np.zeros((len(queries), self.n))
+        influence = np.zeros((len(queries), self.n))
+        overlap = np.zeros(self.sentences)
+        for q, (relevance_tokens, influence_tokens) in enumerate(analyze_queries(queries)):
+            overlap[:] = 0
+            for t in relevance_tokens:
+                posting = self.relevance_postings.get(t)
+                if posting is not None:
+                    overlap[posting[0]] += posting[1]
+            relevance[q] = (overlap / self.sentence_lengths) @ self.relevance_weights
+
+            overlap[:] = 0
+            for t in influence_tokens:
+                posting = self.influence_postings.get(t)
+                if posting is not None:
+                    overlap[posting] += 1
+            influence[q] = overlap @ self.influence_weights
+        return relevance, influence
+
+    def score(self, queries: List[str], normalize: bool = True) -> Dict:
+        """
+        Query × citation matrices for metric_authoritativeness and
+        metric_sourceability, plus the query-independent metric_uniqueness_cited.
+        """
+        relevance, influence = self.relevance_influence(queries)
+        inv_pos = np.where(self.position <= 1.0, 1.0 - self.position, 0.0)
+        authoritativeness = 0.5 * influence + 0.3 * inv_pos + 0.2 * relevance
+        sourceability = 0.4 * self.word_only + 0.4 * self.follow_up + 0.2 * relevance
+        uniqueness = _normalize(self.uniqueness, normalize)
+        if normalize:
+            authoritativeness = _normalize_rows(authoritativeness)
+            sourceability = _normalize_rows(sourceability)
+        return {
+            "queries": queries,
+            "citations": self.n,
+            "authoritativeness": authoritativeness.round(4).tolist(),
+            "sourceability": sourceability.round(4).tolist(),
+            "uniqueness": [round(u, 4) for u in uniqueness],
+        }
+
+
+def score_citations(
+    doc: Doc, queries: List[str], n: Optional[int] = None, normalize: bool = True
+) -> Dict:
+    """Scores one cited document against many queries; see `CitedDocument.score`."""
+    return CitedDocument(doc, n).score(queries[:MAX_QUERIES], normalize)
@@ -0,0 +1,144 @@
+# app/competitor_analysis.py
+
+import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.metrics import extract_citations_spacy, extract_named_entities
+from app.scoring import compute_scores_from_doc
+from app.workers import bounded_imap, get_process_pool
+
+logger = logging.getLogger(__name__)
+
+# Below this many documents, scoring in-process beats shipping work to the pool
+POOL_MIN_DOCS = int(os.getenv("COMPETITOR_POOL_MIN_DOCS", "4"))
+MAX_COMPETITORS = int(os.getenv("MAX_COMPETITORS", "100"))
+# Documents are separated by a line holding only "---" in the form textarea
+_SEPARATOR = re.compile(r"^\s*---+\s*$", re.MULTILINE)
+
+OURS = "Your content"
+
+
+def score_document(item: Tuple[str, str]) -> Dict:
+    """
+    Worker entry point: `compute_scores` metrics plus a MinHash signature for
+    one document. Only plain values and a small array are sent back.
+    """
+    from app.minhash import default_hasher
+
+    name, text = item
+    doc = extract_citations_spacy(text)
+    entities = extract_named_entities(doc) if doc else set()
+    return {
+        "name": name,
+        "words": len(text.split()),
+        "scores": compute_scores_from_doc(doc, entities),
+        "signature": default_hasher.signature(text),
+    }
+
+
+def parse_competitors(raw: str) -> List[str]:
+    """Splits the competitors textarea on "---" lines; each block is a text or a URL."""
+    return [block.strip() for block in _SEPARATOR.split(raw) if block.strip()]
+
+
+def load_competitors(entries: List[str], fetch_workers: int = 8) -> List[Tuple[str, str]]:
+    """
+    Resolves entries to (name, text). Entries that are a bare URL are fetched
+    concurrently and reduced to their main content; the rest are used as-is.
+    Unreachable URLs are logged and skipped. Raises ValueError for a URL that
+    is not public (see `content_audit.check_url`), before fetching anything.
+    """
+    urls = [e for e in entries if re.fullmatch(r"https?://\S+", e)]
+    fetched: Dict[str, Optional[str]] = {}
+    if urls:
+        from app.content_audit import Fetcher, PageRef, check_url, extract_main_content
+
+        for url in urls:
+            check_url(url)
+        fetcher = Fetcher(workers=fetch_workers)
+        try:
+            with ThreadPoolExecutor(max_workers=fetch_workers) as pool:
+                refs = [PageRef(url, "url", url) for url in urls]
+                for ref, (_, body, error) in zip(refs, pool.map(fetcher.fetch, refs)):
+                    if error is not None:
+                        logger.warning(
+                            "Skipping competitor", extra={"url": ref.location, "reason": error}
+                        )
+                        fetched[ref.location] = None
+                    else:
+                        fetched[ref.location] = extract_main_content(body)[1]
+        finally:
+            fetcher.close()
+
+    documents = []
+    for i, entry in enumerate(entries, start=1):
+        if entry in fetched:
+            if fetched[entry]:
+                documents.append((entry, fetched[entry]))
+        else:
+            documents.append((f"Competitor {i}", entry))
+    return documents
+
+
+def compare_with_competitors(
+    content: str, competitors: List[Tuple[str, str]], use_pool: Optional[bool] = None
+) -> Dict:
+    """
+    Scores our content and every competitor concurrently, then ranks them by
+    the mean of the three metrics. Overlap is the MinHash-estimated Jaccard
+    similarity of 5-word shingles, so comparing N documents costs N² short
+    signature compares rather than N² token-set intersections.
+    """
+    from app.minhash import pairwise_similarity
+
+    competitors = competitors[:MAX_COMPETITORS]
+    items = [(OURS, content)] + competitors
+    if use_pool is None:
+        use_pool = len(items) >= POOL_MIN_DOCS
+    if use_pool:
+        results = [r for _, r in bounded_imap(get_process_pool(), score_document, items)]
+    else:
+        results = [score_document(item) for item in items]
+
+    overlap = pairwise_similarity([r.pop("signature") for r in results]).tolist()
+    documents = []
+    for i, result in enumerate(results):
+        closest = None
+        others = [j for j in range(len(results)) if j != i]
+        if others:
+            j = max(others, key=lambda j: overlap[i][j])
+            closest = {"name": results[j]["name"], "overlap": round(100 * overlap[i][j], 1)}
+        documents.append(
+            {
+                **result,
+                "is_ours": i == 0,
+                "overall": round(sum(result["scores"].values()) / len(result["scores"]), 2),
+                "overlap_with_ours": None if i == 0 else round(100 * overlap[0][i], 1),
+                "closest": closest,
+            }
+        )
+
+    ranked = sorted(documents, key=lambda d: d["overall"], reverse=True)
+    for rank, document in enumerate(ranked, start=1):
+        document["rank"] = rank
+    ours, rivals = documents[0], documents[1:]
+    # our score minus the best competitor's, per metric
+    gaps = {}
+    if rivals:
+        for metric, value in ours["scores"].items():
+            gaps[metric] = round(value - max(d["scores"][metric] for d in rivals), 2)
+
+    logger.info("Competitor comparison", extra={"competitors": len(rivals), "pooled": use_pool})
+    return {
+        "documents": ranked,
+        "our_rank": ours["rank"],
+        "total": len(documents),
+        "gaps_to_leader": gaps,
+        "overlap_matrix": {
+            "names": [r["name"] for r in results],
+            "values": [[round(100 * v, 1) for v in row] for row in overlap],
+        },
+    }
@@ -0,0 +1,765 @@
+# app/content_audit.py
+
+import os
+import io
+import gzip
+import json
+import time
+import zlib
+import socket
+import hashlib
+import logging
+import ipaddress
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from app import memory, telemetry
+from app.workers import bounded_imap, get_process_pool
+
+logger = logging.getLogger(__name__)
+
+AUDIT_DIR = os.getenv("AUDIT_DIR", "data/audits")
+# Local directories and WARC files may only be audited from under this root
+AUDIT_SOURCE_ROOT = os.getenv("AUDIT_SOURCE_ROOT", "data/sites")
+FETCH_WORKERS = int(os.getenv("AUDIT_FETCH_WORKERS", "16"))
+FETCH_TIMEOUT = float(os.getenv("AUDIT_FETCH_TIMEOUT", "15"))
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+# The sitemaps protocol caps a sitemap at 50MB uncompressed; applies after gunzip too
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+# Background audits allowed at once; each runs AUDIT_FETCH_WORKERS fetch threads
+AUDIT_MAX_JOBS = int(os.getenv("AUDIT_MAX_JOBS", "4"))
+# Redirects are followed by hand, so every hop's address is checked
+MAX_REDIRECTS = 5
+USER_AGENT = "RankLabAudit/1.0 (+https://ranklab.ai)"
+
+HTML_SUFFIXES = (".html", ".htm", ".xhtml")
+WARC_SUFFIXES = (".warc", ".warc.gz")
+SITEMAP_SUFFIXES = (".xml", ".xml.gz")
+
+# Always dropped before extracting text
+_NOISE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "form", "nav", "aside"]
+# Site chrome, dropped only when there is no <main>/<article> to scope to
+_CHROME_TAGS = ["header", "footer"]
+_BLOCK_TAGS = "h1 h2 h3 h4 h5 h6 p li blockquote pre dd figcaption".split()
+
+METRICS = ("Authoritativeness", "Source-ability", "Uniqueness")
+SORT_KEYS = METRICS + ("words", "page")
+
+# fsync the checkpoint every this many rows; a crash loses at most this much work
+CHECKPOINT_SYNC_EVERY = 100
+
+# Hosts exempt from the public-address check. Empty in production; the local
+# stand-in server in benchmarks/check_site_audit.py adds itself here.
+ALLOWED_PRIVATE_HOSTS: Set[str] = set()
+
+
+class PageRef(NamedTuple):
+    """A page to audit: fetched from `location`, or carried inline (WARC records)."""
+
+    page_id: str
+    kind: str  # "url", "file" or "inline"
+    location: str
+    body: Optional[bytes] = None
+
+
+# ───────────────────────── Extraction ─────────────────────────
+
+
+def extract_main_content(html: bytes) -> Tuple[str, str]:
+    """
+    Returns (title, text) for a page. Text is scoped to <main>/<article> when
+    present, stripped of navigation and scripts, with one block element per
+    paragraph so `extract_citations_spacy` sees the page's paragraph structure.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(" ", strip=True) if soup.title else ""
+
+    root = soup.find("main") or soup.find(attrs={"role": "main"}) or soup.find("article")
+    if root is None:
+        root = soup.body or soup
+        for tag in root.find_all(_CHROME_TAGS):
+            tag.decompose()
+    for tag in root.find_all(_NOISE_TAGS):
+        tag.decompose()
+
+    blocks = []
+    for el in root.find_all(_BLOCK_TAGS):
+        if el.find(_BLOCK_TAGS) is not None:
+            # the nested blocks are visited on their own
+            continue
+        text = el.get_text(" ", strip=True)
+        if text:
+            blocks.append(text)
+    if not blocks:
+        blocks = [line for line in root.get_text("\n", strip=True).splitlines() if line]
+    return title, "\n\n".join(blocks)
+
+
+def audit_page(item: Tuple[PageRef, Tuple[Optional[int], Optional[bytes], Optional[str]]]) -> Dict:
+    """
+    Worker entry point: extracts and scores one fetched page and returns its
+    report row. Failures become error rows instead of raising.
+    """
+    from app.scoring import compute_scores
+
+    ref, (status, body, error) = item
+    row = {"page": ref.page_id, "status": status, "title": "", "words": 0, "scores": None}
+    if error is not None:
+        # transport errors are retried when the audit resumes; HTTP errors are final
+        return {**row, "error": error, "retry": status is None}
+    try:
+        title, text = extract_main_content(body)
+        row["title"] = title[:200]
+        row["words"] = len(text.split())
+        if row["words"]:
+            row["scores"] = compute_scores(text)
+        else:
+            row["error"] = "No text content"
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+# ───────────────────────── Sources ─────────────────────────
+
+
+def _maybe_gunzip(data: bytes) -> bytes:
+    if data[:2] != b"\x1f\x8b":
+        return data
+    # incremental, so a gzip bomb stops at the cap instead of filling memory
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    out = decompressor.decompress(data, MAX_SITEMAP_BYTES + 1)
+    if len(out) > MAX_SITEMAP_BYTES:
+        raise ValueError(f"Sitemap is over {MAX_SITEMAP_BYTES} bytes uncompressed")
+    return out
+
+
+def iter_sitemap_urls(
+    data: bytes, fetch: Callable[[str], bytes], depth: int = 0, host: Optional[str] = None
+) -> Iterator[str]:
+    """
+    Streams page URLs out of a sitemap, following <sitemapindex> entries
+    (one level deep, as the sitemaps protocol allows nesting only once).
+    With `host`, page and child sitemap URLs on any other host are skipped,
+    as the protocol requires of a sitemap's entries.
+    """
+    root = None
+    is_index = False
+    skipped = 0
+    for event, el in ET.iterparse(io.BytesIO(_maybe_gunzip(data)), events=("start", "end")):
+        tag = el.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            if root is None:
+                root, is_index = el, tag == "sitemapindex"
+            continue
+        if tag == "loc" and el.text and el.text.strip():
+            loc = el.text.strip()
+            if host is not None and (urlsplit(loc).hostname or "").lower() != host:
+                skipped += 1
+            elif not is_index:
+                yield loc
+            elif depth == 0:
+                try:
+                    yield from iter_sitemap_urls(fetch(loc), fetch, depth + 1, host)
+                except Exception:
+                    logger.warning("Skipping unreadable child sitemap", extra={"sitemap": loc})
+        elif tag in ("url", "sitemap"):
+            # keep memory flat on 50k-entry sitemaps
+            root.clear()
+    if skipped:
+        logger.warning(
+            "Skipped sitemap URLs on other hosts", extra={"count": skipped, "host": host}
+        )
+
+
+def _iter_sitemap_refs(
+    data: bytes, fetch: Callable[[str], bytes], host: Optional[str] = None
+) -> Iterator[PageRef]:
+    # sitemaps generated from several sources often repeat URLs
+    seen: Set[str] = set()
+    for url in iter_sitemap_urls(data, fetch, host=host):
+        if url not in seen:
+            seen.add(url)
+            yield PageRef(url, "url", url)
+
+
+def iter_directory(root: str) -> Iterator[PageRef]:
+    """HTML files under `root`, in a stable order; ids are paths relative to `root`."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(HTML_SUFFIXES):
+                path = os.path.join(dirpath, name)
+                yield PageRef(os.path.relpath(path, root), "file", path)
+
+
+def _read_headers(f) -> Optional[Dict[str, str]]:
+    headers = {}
+    while True:
+        line = f.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            return headers
+        if b":" in line:
+            key, value = line.split(b":", 1)
+            headers[key.strip().lower().decode("latin-1")] = value.strip().decode("latin-1")
+
+
+def iter_warc(path: str) -> Iterator[PageRef]:
+    """
+    HTML responses from a WARC (optionally gzipped per record, as crawlers
+    write them), one record in memory at a time. Only 200 responses and
+    HTML `resource` records are kept.
+    """
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    seen: Set[str] = set()
+    with opener(path, "rb") as f:
+        while True:
+            version = f.readline()
+            if not version:
+                return
+            if not version.strip():
+                continue
+            if not version.startswith(b"WARC/"):
+                raise ValueError(f"Not a WARC record header: {version[:40]!r}")
+            headers = _read_headers(f)
+            if headers is None:
+                return
+            block = f.read(int(headers.get("content-length", 0)))
+            uri = headers.get("warc-target-uri", "").strip("<>")
+            kind = headers.get("warc-type")
+            if not uri or uri in seen:
+                continue
+            if kind == "response":
+                head, _, body = block.partition(b"\r\n\r\n")
+                status_line, _, http_headers = head.partition(b"\r\n")
+                parts = status_line.split()
+                content_type = ""
+                for line in http_headers.split(b"\r\n"):
+                    if line.lower().startswith(b"content-type:"):
+                        content_type = line.split(b":", 1)[1].decode("latin-1").lower()
+                if len(parts) < 2 or parts[1] != b"200" or "html" not in content_type:
+                    continue
+            elif kind == "resource" and "html" in headers.get("content-type", "").lower():
+                body = block
+            else:
+                continue
+            seen.add(uri)
+            yield PageRef(uri, "inline", uri, body)
+
+
+def _within(path: str, root: str) -> bool:
+    path, root = os.path.realpath(path), os.path.realpath(root)
+    return os.path.commonpath([path, root]) == root
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not (
+        ip.is_private
+        or ip.is_loopback
+        or ip.is_link_local
+        or ip.is_reserved
+        or ip.is_multicast
+        or ip.is_unspecified
+    )
+
+
+def check_url(url: str) -> str:
+    """
+    Raises ValueError unless `url` is http(s) on a host whose addresses are
+    all public, so user-supplied URLs cannot reach loopback, the private
+    network or cloud metadata endpoints. Returns the lowercased host.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Not an http(s) URL: {url}")
+    if parts.hostname.lower() in ALLOWED_PRIVATE_HOSTS:
+        return parts.hostname.lower()
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        infos = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"Cannot resolve host: {parts.hostname}")
+    if not all(_is_public(info[4][0]) for info in infos):
+        raise ValueError(f"URL host is not a public address: {parts.hostname}")
+    return parts.hostname.lower()
+
+
+def check_source(source: str) -> None:
+    """Raises ValueError for a source that `iter_source` would refuse."""
+    if source.startswith(("http://", "https://")):
+        check_url(source)
+        return
+    if not _within(source, AUDIT_SOURCE_ROOT):
+        raise ValueError(f"Local audit sources must be under {AUDIT_SOURCE_ROOT}")
+    lowered = source.lower()
+    if not os.path.exists(source):
+        raise ValueError(f"No such file or directory: {source}")
+    if not (os.path.isdir(source) or lowered.endswith(WARC_SUFFIXES + SITEMAP_SUFFIXES)):
+        raise ValueError("Source must be a sitemap URL, sitemap file, HTML directory or WARC file")
+
+
+def iter_source(source: str, fetch: Callable[[str], bytes]) -> Iterator[PageRef]:
+    """
+    Pages for an audit source: a sitemap URL, a sitemap file, a directory of
+    HTML files, or a WARC file. Local paths must be under AUDIT_SOURCE_ROOT.
+    A sitemap URL's pages must be on its own host.
+    """
+    check_source(source)
+    if source.startswith(("http://", "https://")):
+        yield from _iter_sitemap_refs(fetch(source), fetch, urlsplit(source).hostname.lower())
+        return
+    lowered = source.lower()
+    if os.path.isdir(source):
+        yield from iter_directory(source)
+    elif lowered.endswith(WARC_SUFFIXES):
+        yield from iter_warc(source)
+    else:
+        with open(source, "rb") as f:
+            data = f.read(MAX_SITEMAP_BYTES + 1)
+        if len(data) > MAX_SITEMAP_BYTES:
+            raise ValueError(f"Sitemap is over {MAX_SITEMAP_BYTES} bytes")
+        yield from _iter_sitemap_refs(data, fetch)
+
+
+# ───────────────────────── Fetching ─────────────────────────
+
+
+class Fetcher:
+    """
+    One pooled HTTP session shared by all fetch threads, so pages on the same
+    host reuse keep-alive connections instead of a new TCP/TLS handshake each.
+    Every URL, and every redirect hop, must pass `check_url`.
+    """
+
+    def __init__(self, workers: int = FETCH_WORKERS, timeout: float = FETCH_TIMEOUT):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _get(self, url: str, stream: bool = False):
+        for _ in range(MAX_REDIRECTS + 1):
+            check_url(url)
+            response = self.session.get(
+                url, timeout=self.timeout, stream=stream, allow_redirects=False
+            )
+            if not response.is_redirect:
+                return response
+            response.close()
+            url = urljoin(url, response.headers["location"])
+        raise ValueError(f"Too many redirects: {url}")
+
+    def get_bytes(self, url: str) -> bytes:
+        """For sitemaps: raises on HTTP errors, refused URLs and oversized bodies."""
+        with self._get(url, stream=True) as response:
+            response.raise_for_status()
+            body = response.raw.read(MAX_SITEMAP_BYTES + 1, decode_content=True)
+        if len(body) > MAX_SITEMAP_BYTES:
+            raise ValueError(f"Sitemap is over {MAX_SITEMAP_BYTES} bytes: {url}")
+        return body
+
+    def fetch(self, ref: PageRef) -> Tuple[Optional[int], Optional[bytes], Optional[str]]:
+        """(status, body, error); never raises."""
+        if ref.kind == "inline":
+            return (200, ref.body, None)
+        if ref.kind == "file":
+            try:
+                with open(ref.location, "rb") as f:
+                    return (None, f.read(MAX_PAGE_BYTES), None)
+            except OSError as e:
+                return (None, None, str(e))
+        try:
+            with self._get(ref.location, stream=True) as response:
+                if response.status_code != 200:
+                    return (response.status_code, None, f"HTTP {response.status_code}")
+                content_type = response.headers.get("content-type", "")
+                if "html" not in content_type:
+                    return (200, None, f"Not HTML ({content_type or 'no content type'})")
+                body = response.raw.read(MAX_PAGE_BYTES, decode_content=True)
+                return (200, body, None)
+        except Exception as e:
+            return (None, None, f"{type(e).__name__}: {e}")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+# ───────────────────────── Checkpoint ─────────────────────────
+
+
+def audit_id_for(source: str) -> str:
+    """Stable id, so submitting the same source again resumes its audit."""
+    return hashlib.sha256(source.strip().encode("utf-8")).hexdigest()[:16]
+
+
+class AuditCheckpoint:
+    """
+    Append-only JSONL of report rows, one per finished page, plus a small
+    JSON meta file. Rows are flushed as they are written, so a restarted
+    audit skips every page already recorded.
+    """
+
+    def __init__(self, audit_id: str, directory: str = AUDIT_DIR):
+        self.audit_id = audit_id
+        self.rows_path = os.path.join(directory, f"{audit_id}.jsonl")
+        self.meta_path = os.path.join(directory, f"{audit_id}.json")
+        self._file = None
+        self._unsynced = 0
+
+    def read_meta(self) -> Optional[Dict]:
+        if not os.path.isfile(self.meta_path):
+            return None
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write_meta(self, **fields) -> Dict:
+        meta = {**(self.read_meta() or {}), **fields}
+        os.makedirs(os.path.dirname(self.meta_path) or ".", exist_ok=True)
+        tmp = f"{self.meta_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
+        return meta
+
+    def iter_rows(self) -> Iterator[Dict]:
+        if not os.path.isfile(self.rows_path):
+            return
+        with open(self.rows_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.endswith("\n"):
+                    yield json.loads(line)
+
+    def done_ids(self) -> Set[str]:
+        """Pages with a final result; transport failures are left to retry."""
+        done = set()
+        for row in self.iter_rows():
+            if row.get("retry"):
+                done.discard(row["page"])
+            else:
+                done.add(row["page"])
+        return done
+
+    def open(self) -> None:
+        os.makedirs(os.path.dirname(self.rows_path) or ".", exist_ok=True)
+        self._file = open(self.rows_path, "a+b")
+        # Drop a torn last line from a crash mid-write, so appends start on a fresh line
+        size = self._file.seek(0, os.SEEK_END)
+        if size:
+            self._file.seek(max(0, size - (1 << 16)))
+            tail = self._file.read()
+            if not tail.endswith(b"\n"):
+                cut = tail.rfind(b"\n")
+                self._file.truncate(size - len(tail) + cut + 1 if cut >= 0 else 0)
+        self._file.seek(0, os.SEEK_END)
+
+    def append(self, row: Dict) -> None:
+        self._file.write(json.dumps(row, separators=(",", ":")).encode("utf-8") + b"\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= CHECKPOINT_SYNC_EVERY:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+
+# ───────────────────────── Running ─────────────────────────
+
+
+def run_audit(
+    source: str,
+    audit_id: Optional[str] = None,
+    fetch_workers: int = FETCH_WORKERS,
+    use_pool: bool = True,
+    stop: Optional[threading.Event] = None,
+    on_row: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """
+    Audits every page of `source`, resuming from its checkpoint.
+
+    Fetching runs on `fetch_workers` threads sharing one connection pool;
+    extraction and scoring run on the shared process pool. Both stages are
+    bounded, so memory stays flat no matter how many pages the site has.
+    Returns the audit meta dict.
+    """
+    audit_id = audit_id or audit_id_for(source)
+    checkpoint = AuditCheckpoint(audit_id)
+    done = checkpoint.done_ids()
+    checkpoint.write_meta(source=source, status="running", started=time.time(), error=None)
+    logger.info("Audit started", extra={"audit_id": audit_id, "resumed_pages": len(done)})
+
+    fetcher = Fetcher(fetch_workers)
+    scorer = get_process_pool() if use_pool else ThreadPoolExecutor(max_workers=1)
+    status = "complete"
+    error = None
+    written = 0
+    checkpoint.open()
+    try:
+        with ThreadPoolExecutor(
+            max_workers=fetch_workers, thread_name_prefix="audit-fetch"
+        ) as io_pool:
+            refs = (
+                ref for ref in iter_source(source, fetcher.get_bytes) if ref.page_id not in done
+            )
+            fetched = bounded_imap(io_pool, fetcher.fetch, refs, fetch_workers * 2, ordered=False)
+            for _, row in bounded_imap(scorer, audit_page, fetched, ordered=False):
+                checkpoint.append(row)
+                written += 1
+                telemetry.incr("audit_pages", outcome="error" if row.get("error") else "scored")
+                if on_row is not None:
+                    on_row(row)
+                if stop is not None and stop.is_set():
+                    status = "stopped"
+                    break
+    except Exception as e:
+        logger.exception("Audit failed", extra={"audit_id": audit_id})
+        status, error = "failed", str(e)
+    finally:
+        checkpoint.close()
+        fetcher.close()
+        if not use_pool:
+            scorer.shutdown(wait=False, cancel_futures=True)
+
+    logger.info("Audit finished", extra={"audit_id": audit_id, "pages": written, "status": status})
+    return checkpoint.write_meta(status=status, finished=time.time(), error=error)
+
+
+class TooManyAudits(RuntimeError):
+    """AUDIT_MAX_JOBS audits are already running."""
+
+
+class AuditJob:
+    def __init__(self, audit_id: str, source: str):
+        self.audit_id = audit_id
+        self.source = source
+        self.pages = 0
+        self.errors = 0
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"audit-{audit_id}", daemon=True)
+
+    def _count(self, row: Dict) -> None:
+        self.pages += 1
+        self.errors += bool(row.get("error"))
+
+    def _run(self) -> None:
+        try:
+            run_audit(self.source, self.audit_id, stop=self.stop, on_row=self._count)
+        finally:
+            with _jobs_lock:
+                _jobs.pop(self.audit_id, None)
+
+
+_jobs: Dict[str, AuditJob] = {}
+_jobs_lock = threading.Lock()
+memory.register_cache("content_audit.jobs", lambda: {"entries": len(_jobs)})
+
+
+def start_audit(source: str) -> str:
+    """
+    Starts (or resumes) an audit in the background; returns its id. Raises
+    TooManyAudits when AUDIT_MAX_JOBS other audits are already running.
+    """
+    source = source.strip()
+    check_source(source)
+    audit_id = audit_id_for(source)
+    with _jobs_lock:
+        if audit_id not in _jobs:
+            if len(_jobs) >= AUDIT_MAX_JOBS:
+                raise TooManyAudits(f"{len(_jobs)} audits are already running")
+            job = AuditJob(audit_id, source)
+            _jobs[audit_id] = job
+            job.thread.start()
+    return audit_id
+
+
+def stop_audit(audit_id: str) -> bool:
+    job = _jobs.get(audit_id)
+    if job is not None:
+        job.stop.set()
+    return job is not None
+
+
+def resume_interrupted_audits() -> List[str]:
+    """Restarts audits whose meta still says "running" (the process died mid-audit)."""
+    if not os.path.isdir(AUDIT_DIR):
+        return []
+    resumed = []
+    for name in sorted(os.listdir(AUDIT_DIR)):
+        if name.endswith(".json"):
+            meta = AuditCheckpoint(name[: -len(".json")]).read_meta() or {}
+            if meta.get("status") == "running" and meta.get("source"):
+                try:
+                    resumed.append(start_audit(meta["source"]))
+                except (ValueError, TooManyAudits) as e:
+                    # left "running", so a later restart tries again
+                    logger.warning("Cannot resume audit: %s", e, extra={"source": meta["source"]})
+    return resumed
+
+
+# ───────────────────────── Reporting ─────────────────────────
+
+
+def _flatten(row: Dict) -> Dict:
+    scores = row.get("scores") or {}
+    return {
+        "page": row["page"],
+        "title": row.get("title", ""),
+        "status": row.get("status"),
+        "words": row.get("words", 0),
+        "error": row.get("error"),
+        **{metric: scores.get(metric) for metric in METRICS},
+    }
+
+
+class _ReportState:
+    """
+    Latest flattened row per page and running score sums for one audit, read
+    incrementally from its checkpoint: a poll only parses rows appended since
+    the last one, and re-sorts only when something changed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.offset = 0
+        self.latest: Dict[str, Dict] = {}
+        self.sums = dict.fromkeys(METRICS, 0.0)
+        self.scored = 0
+        self._sorted: Dict[Tuple[str, bool], List[Dict]] = {}
+
+    def _add(self, row: Dict) -> None:
+        flat = _flatten(row)
+        for entry, sign in ((self.latest.get(flat["page"]), -1), (flat, 1)):
+            if entry is not None and entry[METRICS[0]] is not None:
+                self.scored += sign
+                for metric in METRICS:
+                    self.sums[metric] += sign * entry[metric]
+        self.latest[flat["page"]] = flat
+
+    def refresh(self, path: str) -> None:
+        """Reads complete rows appended to `path` since the last refresh."""
+        if not os.path.isfile(path):
+            return
+        if os.path.getsize(path) < self.offset:
+            # a torn line was truncated away; start over
+            self._reset()
+        with open(path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return
+        for line in data[:end].splitlines():
+            self._add(json.loads(line))
+        self.offset += end
+        self._sorted.clear()
+
+    def ordered(self, sort: str, descending: bool) -> List[Dict]:
+        """Scored rows by `sort`, then errored rows by page id."""
+        key = (sort, descending)
+        if key not in self._sorted:
+            rows = self.latest.values()
+            scored = [row for row in rows if row[METRICS[0]] is not None]
+            failed = [row for row in rows if row[METRICS[0]] is None]
+            scored.sort(key=lambda row: row[sort], reverse=descending)
+            failed.sort(key=lambda row: row["page"])
+            self._sorted[key] = scored + failed
+        return self._sorted[key]
+
+
+# Report states kept in memory, least recently viewed evicted first
+MAX_REPORT_STATES = 16
+_reports: "OrderedDict[str, _ReportState]" = OrderedDict()
+_reports_lock = threading.Lock()
+memory.register_cache("content_audit.reports", lambda: {"entries": len(_reports)})
+
+
+def _report_state(audit_id: str) -> _ReportState:
+    with _reports_lock:
+        state = _reports.pop(audit_id, None) or _ReportState()
+        _reports[audit_id] = state
+        while len(_reports) > MAX_REPORT_STATES:
+            _reports.popitem(last=False)
+        return state
+
+
+def audit_report(
+    audit_id: str,
+    sort: str = "Authoritativeness",
+    descending: bool = False,
+    limit: Optional[int] = 200,
+    offset: int = 0,
+) -> Optional[Dict]:
+    """
+    Report rows (the latest result per page) sorted by a metric, word count
+    or page id, with site-wide averages. Errored pages always sort last.
+    Lowest scores first by default, since those are the pages to fix.
+    """
+    checkpoint = AuditCheckpoint(audit_id)
+    meta = checkpoint.read_meta()
+    if meta is None:
+        return None
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+
+    state = _report_state(audit_id)
+    with state.lock:
+        state.refresh(checkpoint.rows_path)
+        ordered = state.ordered(sort, descending)
+        scored = state.scored
+        averages = {
+            metric: round(state.sums[metric] / scored, 2) if scored else None for metric in METRICS
+        }
+
+    job = _jobs.get(audit_id)
+    return {
+        "audit_id": audit_id,
+        **meta,
+        "running": job is not None,
+        "pages": len(ordered),
+        "scored": scored,
+        "errors": len(ordered) - scored,
+        "averages": averages,
+        "sort": sort,
+        "descending": descending,
+        "offset": offset,
+        "rows": ordered[offset : offset + limit] if limit else ordered[offset:],
+    }
+
+
+def list_audits() -> List[Dict]:
+    if not os.path.isdir(AUDIT_DIR):
+        return []
+    audits = []
+    for name in os.listdir(AUDIT_DIR):
+        if name.endswith(".json"):
+            audit_id = name[: -len(".json")]
+            meta = AuditCheckpoint(audit_id).read_meta() or {}
+            audits.append({"audit_id": audit_id, "running": audit_id in _jobs, **meta})
+    return sorted(audits, key=lambda a: a.get("started", 0), reverse=True)
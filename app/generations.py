@@ -1,20 +1,168 @@
 # File: app/generation.py
 
-from openai import OpenAI
-import os, uuid, time, pickle
+import os, json, uuid, time, pickle, logging
+from typing import List, Optional
 from dotenv import load_dotenv
 
+from app import token_budget
+from app.model_router import TASK_CLASS_OF, provider_of, router
+from app.profiling import stage
+from app.shared_cache import cached
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Identical requests within this window reuse the first reply, across workers. 0 disables.
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+
+# OpenAI-compatible endpoints; overridable so load tests can point at local stand-ins
+VENICE_API_BASE = os.getenv("VENICE_API_BASE", "https://api.venice.ai/api/v1")
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_TIMEOUT = 30
+# Models tried per call: the router's pick, then the next ones if a call fails
+MODEL_ATTEMPTS = int(os.getenv("MODEL_ATTEMPTS", "2"))
+
+_openai_client = None
+_groq_session = None
+
+
+def get_openai_client():
+    """
+    Venice API client (OpenAI-compatible), created on first use so the SDK
+    is only imported by routes that actually call an LLM.
+    """
+    global _openai_client
+    if _openai_client is None:
+        from openai import OpenAI
+
+        _openai_client = OpenAI(api_key=os.getenv("VENICE_API_KEY"), base_url=VENICE_API_BASE)
+    return _openai_client
+
+
+def _groq_post(payload: dict) -> dict:
+    global _groq_session
+    if not GROQ_API_KEY:
+        raise EnvironmentError("❌ GROQ_API_KEY is not set in your .env file.")
+    if _groq_session is None:
+        import requests
+
+        _groq_session = requests.Session()
+    response = _groq_session.post(
+        GROQ_API_URL,
+        headers={"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"},
+        json=payload,
+        timeout=GROQ_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+class Completion:
+    __slots__ = ("model", "replies", "usage", "finish_reason")
+
+    def __init__(self, model: str, replies: List[str], usage, finish_reason: Optional[str]):
+        self.model = model
+        self.replies = replies
+        self.usage = usage
+        self.finish_reason = finish_reason
+
+
+def _call(
+    model: str, messages: List[dict], temperature: float, max_tokens: int, n: int
+) -> Completion:
+    provider = provider_of(model)
+    with stage(f"llm.{provider}"):
+        if provider == "groq":
+            body = _groq_post(
+                {
+                    "model": model,
+                    "messages": messages,
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                    "n": n,
+                }
+            )
+            choices = body.get("choices") or [{}]
+            return Completion(
+                model,
+                [c.get("message", {}).get("content") or "" for c in choices],
+                body.get("usage"),
+                choices[0].get("finish_reason"),
+            )
+        response = get_openai_client().chat.completions.create(
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=1,
+            n=n,
+            messages=messages,
+        )
+        return Completion(
+            model,
+            [c.message.content or "" for c in response.choices],
+            response.usage,
+            response.choices[0].finish_reason,
+        )
+
+
+def complete(
+    prompt: str,
+    task: str = "generic",
+    temperature: float = 0.5,
+    model: Optional[str] = None,
+    content: Optional[str] = None,
+    system: Optional[str] = None,
+    n: int = 1,
+) -> Completion:
+    """
+    One chat completion on the model the router picks for `task` (or on
+    `model` when given), budgeted by app/token_budget.py. A failed call is
+    retried on the router's next choice from another provider, up to
+    MODEL_ATTEMPTS models.
+
+    Raises PromptTooLarge, before any request, if no candidate model can take
+    the prompt, and otherwise the last call's error if every attempt failed.
+    """
+    messages = ([{"role": "system", "content": system}] if system else []) + [
+        {"role": "user", "content": prompt}
+    ]
+    error: Optional[Exception] = None
+    attempts = 0
+    failed = set()  # providers that already failed this call
+    for candidate in router.candidates(task, model):
+        if provider_of(candidate) in failed:
+            # an outage takes out every model of a provider; fail over to another one
+            continue
+        try:
+            budget = token_budget.plan(task, candidate, prompt, content)
+        except token_budget.PromptTooLarge as e:
+            error = e
+            continue
+        if attempts == MODEL_ATTEMPTS:
+            break
+        attempts += 1
+        start = time.perf_counter()
+        try:
+            result = _call(candidate, messages, temperature, budget.max_tokens, n)
+        except Exception as e:
+            router.observe(candidate, task, time.perf_counter() - start, ok=False)
+            logger.warning("LLM call failed: %s", e, extra={"model": candidate, "task": task})
+            failed.add(provider_of(candidate))
+            error = e
+            continue
+        router.observe(candidate, task, time.perf_counter() - start, ok=True)
+        token_budget.record(budget, result.usage, result.finish_reason)
+        return result
+    raise error if error is not None else RuntimeError(f"No model available for {task}")
 
-# Setup Venice API client (OpenAI-compatible)
-openai_client = OpenAI(api_key=os.getenv("VENICE_API_KEY"), base_url="https://api.venice.ai/api/v1")
 
 query_prompt = """Write an accurate and concise answer for the given user question, using _only_ the provided summarized web search results... [your full prompt here]"""
 
 
 def generate_llm_answer(
-    query, sources, num_completions=1, temperature=0.5, verbose=False, model="llama-3.3-70b"
+    query, sources, num_completions=1, temperature=0.5, verbose=False, model=None
 ):
     source_text = "\n\n".join([f"### Source {i + 1}:\n{s}" for i, s in enumerate(sources)])
     prompt = query_prompt.format(query=query, source_text=source_text)
@@ -22,42 +170,51 @@ def generate_llm_answer(
     while True:
         try:
             if verbose:
-                print("Calling Venice API...")
-            response = openai_client.chat.completions.create(
-                model=model,
-                temperature=temperature,
-                max_tokens=1024,
-                top_p=1,
-                n=num_completions,
-                messages=[{"role": "user", "content": prompt}],
-            )
+                logger.debug("Calling LLM", extra={"model": model})
+            result = complete(prompt, "answer", temperature, model, n=num_completions)
             os.makedirs("response_usages_16k", exist_ok=True)
             with open(f"response_usages_16k/{uuid.uuid4()}.pkl", "wb") as f:
-                pickle.dump(response.usage, f)
-            return [choice.message.content for choice in response.choices]
+                pickle.dump(result.usage, f)
+            return result.replies
+        except token_budget.PromptTooLarge:
+            raise
         except Exception as e:
-            print("Error from API:", e)
+            logger.warning("Error from API: %s", e, extra={"model": model})
             time.sleep(15)
 
 
 def generate_venice_response(
-    message: str, temperature: float = 0.5, model: str = "mistral-31-24b"
+    message: str,
+    temperature: float = 0.5,
+    model: Optional[str] = None,
+    task: str = "generic",
+    content: Optional[str] = None,
 ) -> str:
     """
-    Sends a single user message to the Venice API and returns the assistant's reply.
+    Sends a single user message to an LLM and returns the assistant's reply.
+    The model is the router's pick for `task` unless `model` is given (see
+    app/model_router.py). Replies are shared across workers for LLM_CACHE_TTL;
+    failed (empty) ones are not.
+
+    `max_tokens` comes from the token budget for `task` (see app/token_budget.py);
+    a prompt over budget raises PromptTooLarge before any request is made.
     """
+    return cached(
+        "llm",
+        json.dumps(["chat", model or TASK_CLASS_OF.get(task, task), temperature, message]),
+        lambda: _reply(message, temperature, model, task, content),
+        ttl=lambda reply: LLM_CACHE_TTL if reply else 0,
+    )
+
+
+def _reply(
+    message: str, temperature: float, model: Optional[str], task: str, content: Optional[str]
+) -> str:
     try:
-        response = openai_client.chat.completions.create(
-            model=model,
-            temperature=temperature,
-            max_tokens=1024,
-            top_p=1,
-            n=1,
-            messages=[{"role": "user", "content": message}],
-        )
-        # Return the content of the first (and only) choice
-        return response.choices[0].message.content
+        return complete(message, task, temperature, model, content).replies[0]
+    except token_budget.PromptTooLarge:
+        raise
     except Exception as e:
-        print("Error from Venice API:", e)
-        # Re-raise or handle as needed; here we just return an empty string
+        logger.error("Error from LLM API: %s", e, extra={"model": model, "task": task})
+        # failures come back as an empty reply, which callers treat as no answer
         return ""
@@ -0,0 +1,92 @@
+# app/intent_classifier.py
+
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+# Intent → keywords. Dict order is priority order: when a query matches several
+# intents, the earliest one wins (same precedence as the original if/elif chain).
+DEFAULT_INTENT_KEYWORDS: Dict[str, List[str]] = {
+    "Informational": ["what", "how", "why", "explain"],
+    "Navigational": ["where", "contact", "login", "support"],
+    "Transactional": ["buy", "price", "order", "download"],
+}
+
+UNKNOWN_INTENT = "Unknown"
+
+
+class IntentClassifier:
+    """
+    Compiles every keyword of every intent into one word-boundary regex.
+
+    `classify_many` joins the batch into a single newline-separated string and
+    scans it once with `finditer`, mapping match offsets back to queries, so the
+    cost is one regex pass over the whole log rather than one per query/keyword.
+    Keywords may be phrases ("how to"); they match on whole words only, so
+    "however" is not informational.
+    """
+
+    def __init__(
+        self,
+        intents: Optional[Dict[str, List[str]]] = None,
+        unknown: str = UNKNOWN_INTENT,
+    ):
+        intents = DEFAULT_INTENT_KEYWORDS if intents is None else intents
+        self.labels = list(intents)
+        self.unknown = unknown
+
+        # keyword → best (lowest) priority across intents
+        self._priority: Dict[str, int] = {}
+        for rank, label in enumerate(self.labels):
+            for kw in intents[label]:
+                kw = " ".join(kw.lower().split())
+                if kw and kw not in self._priority:
+                    self._priority[kw] = rank
+
+        if self._priority:
+            # Longest first so phrases win over their leading word
+            alternation = "|".join(
+                re.escape(kw).replace(r"\ ", r"[ \t]+")
+                for kw in sorted(self._priority, key=len, reverse=True)
+            )
+            self._pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+        else:
+            self._pattern = None
+
+    def classify(self, query: str) -> str:
+        return self.classify_many([query])[0]
+
+    def classify_many(self, queries: List[str]) -> List[str]:
+        """Labels a whole batch of queries in a single regex pass."""
+        n = len(queries)
+        if n == 0:
+            return []
+        if self._pattern is None:
+            return [self.unknown] * n
+
+        # Newlines separate queries, so strip any inside a query
+        parts = [q.replace("\n", " ").lower() for q in queries]
+        starts = []
+        offset = 0
+        for p in parts:
+            starts.append(offset)
+            offset += len(p) + 1
+        text = "\n".join(parts)
+
+        no_match = len(self.labels)
+        best = [no_match] * n
+        priority = self._priority
+        for m in self._pattern.finditer(text):
+            i = bisect_right(starts, m.start()) - 1
+            rank = priority.get(m.group(0))
+            if rank is None:
+                # phrase matched across irregular whitespace
+                rank = priority[" ".join(m.group(0).split())]
+            if rank < best[i]:
+                best[i] = rank
+
+        labels = self.labels + [self.unknown]
+        return [labels[r] for r in best]
+
+
+default_classifier = IntentClassifier()
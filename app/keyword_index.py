@@ -0,0 +1,108 @@
+# app/keyword_index.py
+
+import os
+import re
+import math
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Tuple
+
+from app import memory
+
+# Brands kept in the shared index; the least recently used is dropped past this
+KEYWORD_INDEX_MAX_BRANDS = int(os.getenv("KEYWORD_INDEX_MAX_BRANDS", "5000"))
+
+_WORD = re.compile(r"[a-z][a-z0-9'-]+")
+
+STOPWORDS = {
+    "about", "also", "among", "and", "are", "as", "at", "be", "been", "being", "between",
+    "both", "brand", "but", "by", "can", "company", "could", "each", "for", "from", "has",
+    "have", "how", "including", "into", "is", "it", "its", "known", "like", "many", "more",
+    "most", "not", "offer", "offers", "often", "one", "other", "over", "provides", "some",
+    "such", "than", "that", "the", "their", "them", "there", "these", "they", "this",
+    "those", "through", "to", "under", "use", "users", "using", "various", "was", "well",
+    "were", "what", "when", "where", "which", "while", "who", "wide", "will", "with",
+    "within", "would", "you", "your",
+}  # fmt: skip
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        w.strip("'-")
+        for w in _WORD.findall(text.lower())
+        if len(w) > 2 and w.strip("'-") not in STOPWORDS
+    ]
+
+
+class KeywordIndex:
+    """
+    Sparse, incrementally updated TF-IDF index over brand descriptions.
+
+    Each brand keeps its own term counts; the index keeps only document
+    frequencies and the document count. Adding or replacing a brand updates
+    those in O(terms in that brand), and scores are computed on demand with the
+    current statistics, so nothing is ever refit from scratch. Past
+    `max_brands`, the least recently used brand is dropped the same way.
+    """
+
+    def __init__(self, max_brands: int = KEYWORD_INDEX_MAX_BRANDS):
+        self.max_brands = max_brands
+        self._docs: "OrderedDict[str, Counter]" = OrderedDict()
+        self._df: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, brand: str) -> bool:
+        return brand.lower() in self._docs
+
+    def add(self, brand: str, text: str) -> None:
+        """Indexes (or re-indexes) a brand's text."""
+        key = brand.lower()
+        # The brand's own name never distinguishes it
+        own = set(tokenize(brand))
+        counts = Counter(t for t in tokenize(text) if t not in own)
+        with self._lock:
+            removed = [self._docs.pop(key)] if key in self._docs else []
+            while len(self._docs) >= self.max_brands:
+                removed.append(self._docs.popitem(last=False)[1])
+            for old in removed:
+                self._df.subtract(old.keys())
+            if removed:
+                self._df += Counter()  # drop zero/negative entries
+            self._docs[key] = counts
+            self._df.update(counts.keys())
+
+    def idf(self, term: str) -> float:
+        # smoothed idf, as in scikit-learn's TfidfVectorizer(smooth_idf=True)
+        return math.log((1 + len(self._docs)) / (1 + self._df.get(term, 0))) + 1
+
+    def top_terms(self, brand: str, k: int = 8) -> List[Tuple[str, float]]:
+        """
+        Returns up to k (term, weight) pairs ranked by L2-normalized TF-IDF.
+        Terms present in every indexed brand are dropped once more than one
+        brand is indexed, since they cannot distinguish anything.
+        """
+        with self._lock:
+            counts = self._docs.get(brand.lower())
+            if not counts:
+                return []
+            self._docs.move_to_end(brand.lower())
+            n_docs = len(self._docs)
+            weights = {
+                term: (1 + math.log(tf)) * self.idf(term)
+                for term, tf in counts.items()
+                if n_docs == 1 or self._df[term] < n_docs
+            }
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        ranked = sorted(weights.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+        return [(term, round(w / norm, 4)) for term, w in ranked]
+
+
+# Shared across requests, so previously analyzed brands inform the IDF statistics
+brand_index = KeywordIndex()
+memory.register_cache(
+    "keyword_index.brand_index",
+    lambda: {"entries": len(brand_index), "terms": len(brand_index._df)},
+)
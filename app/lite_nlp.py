@@ -0,0 +1,95 @@
+# app/lite_nlp.py
+
+import re
+from typing import List, Set
+
+from app.metrics import Doc, Paragraph, citations
+
+# "Lite" analysis: the same `Doc` structure as `extract_citations_spacy`, from
+# compiled regexes instead of the spaCy pipeline. It follows the spaCy English
+# tokenizer's main rules (punctuation, contractions, hyphens, URLs, numbers) and
+# the sentencizer's split-after-terminal-punctuation, so metric scores land
+# close to the full path; see benchmarks/bench_lite_scoring.py for how close.
+
+_TOKEN = re.compile(
+    r"""
+    [^\W\d_]+(?![\w’'@.:+-])                                  # plain word: the common case, first
+    | (?:https?://|www\.)[^\s<>"]+?(?=[.,;:!?)\]'"]*(?:\s|$))  # URL, minus trailing punctuation
+    | [\w.+-]+@\w[\w-]*(?:\.\w[\w-]*)+                       # email
+    | (?:[^\W\d_]\.){2,}                                     # e.g. U.S. i.e.
+    | (?:Mr|Mrs|Ms|Dr|Prof|Sr|Jr|St|vs|etc|Inc|Ltd|Co|No|Fig|approx)\.(?=\s)
+    | \w+?(?=n[’']t\b|[’'](?:s|re|ve|ll|d|m)\b)             # do|n't it|'s
+    | n[’']t\b
+    | [’'](?:s|re|ve|ll|d|m)\b
+    | \d+(?:[.,:/]\d+)*                                      # 3.5 1,000 10:30 1/2
+    | \w+(?:[’']\w+)*                                        # words (O'Brien)
+    | \.{2,} | -{2,} | …
+    | \S                                                     # any other single character
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+# A sentence ends after terminal punctuation (plus closing quotes or brackets)
+# followed by whitespace. As with the sentencizer, an ellipsis or a period
+# that belongs to an abbreviation does not end one.
+_SENT_END = re.compile(r"[.!?]+[\"'”’)\]]*(?=\s|$)")
+_ABBREVIATION = re.compile(
+    r"(?:\b(?:Mr|Mrs|Ms|Dr|Prof|Sr|Jr|St|vs|etc|Inc|Ltd|Co|No|Fig|approx)|\b[^\W\d_](?:\.[^\W\d_])*)$",
+    re.IGNORECASE,
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text)
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    start = 0
+    for m in _SENT_END.finditer(text):
+        end = m.group()
+        if ".." in end:
+            continue
+        if end[0] == "." and _ABBREVIATION.search(text, max(start, m.start() - 12), m.start()):
+            continue
+        sentence = text[start : m.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = m.end()
+    rest = text[start:].strip()
+    if rest:
+        sentences.append(rest)
+    return sentences
+
+
+def extract_citations_lite(text: str) -> Doc:
+    """`extract_citations_spacy` without spaCy: regex sentences and tokens."""
+    doc: Doc = []
+    for p in text.split("\n\n"):
+        para: Paragraph = [(tokenize(s), s, citations(s)) for s in split_sentences(p.strip())]
+        if para:
+            doc.append(para)
+    return doc
+
+
+# Capitalized words that are not names when they appear mid-sentence
+_NOT_NAMES = {"I", "I'm", "I've", "I'll", "I'd", "A", "OK"}
+
+
+def extract_named_entities_lite(doc: Doc) -> Set[str]:
+    """
+    Stand-in for `extract_named_entities`: capitalized words that are not the
+    first word of their sentence, standing alone. Sourceability only counts
+    single-token entities, so runs like "New York" are left out, as spaCy's
+    multi-word entities never match a token either.
+    """
+    names = set()
+    for tokens, _, _ in (sent for para in doc for sent in para):
+        for i in range(1, len(tokens)):
+            tok = tokens[i]
+            if not tok[:1].isupper() or not tok.isalpha() or tok in _NOT_NAMES:
+                continue
+            if tokens[i - 1][:1].isupper() or (i + 1 < len(tokens) and tokens[i + 1][:1].isupper()):
+                continue
+            names.add(tok)
+    return names
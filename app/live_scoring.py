@@ -0,0 +1,246 @@
+# app/live_scoring.py
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+
+from app import cancellation, metrics, telemetry
+from app.admission import admission, classify_route
+from app.scoring import ANALYSIS_MODES, compute_scores
+from app.utils import verify_firebase_token
+
+logger = logging.getLogger(__name__)
+
+# Quiet period after the last edit before a revision is scored
+LIVE_DEBOUNCE_MS = float(os.getenv("LIVE_DEBOUNCE_MS", "400"))
+# Revisions scored at once across all sessions of this worker; the rest wait their turn
+LIVE_SCORING_CONCURRENCY = int(os.getenv("LIVE_SCORING_CONCURRENCY", "4"))
+# Open sessions per worker; further connections are closed with "try again later"
+LIVE_MAX_SESSIONS = int(os.getenv("LIVE_MAX_SESSIONS", "1000"))
+# Open sessions per signed-in user (editor tabs)
+LIVE_MAX_SESSIONS_PER_USER = int(os.getenv("LIVE_MAX_SESSIONS_PER_USER", "4"))
+# Same limit as /analyze
+MAX_CONTENT_CHARS = 50_000
+
+# WebSocket close codes: 1008 policy violation (no valid session), 1013 try again later
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_TRY_AGAIN_LATER = 1013
+
+_sessions = 0
+_user_sessions: Counter = Counter()
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def _score(content: str, mode: str, cancel: threading.Event) -> Dict[str, float]:
+    with cancellation.cancellable(cancel):
+        scores = compute_scores(content, normalize=False, mode=mode)
+    metrics.check_vocab_growth()
+    return scores
+
+
+class Revision:
+    __slots__ = ("rev", "content", "mode", "received")
+
+    def __init__(self, rev: int, content: str, mode: str):
+        self.rev = rev
+        self.content = content
+        self.mode = mode
+        self.received = time.perf_counter()
+
+
+class LiveSession:
+    """
+    One editor connection. Every message is a revision:
+    `{"rev": <int>, "content": <text>, "mode": "full" | "lite"}`.
+
+    Only the latest revision is ever scored: it waits for LIVE_DEBOUNCE_MS
+    without a newer one, then for a scoring slot, and a newer revision
+    arriving at any point drops it, or cancels it mid-computation (the
+    thread stops at its next `cancellation.check()`). Each scored revision
+    goes through admission control like a POST /analyze by the same user;
+    a rejected one is retried after the Retry-After delay. Replies are
+    `{"type": "scores", "rev", "scores", "ms"}` or
+    `{"type": "error", "rev", "detail"[, "retry_after"]}`.
+    """
+
+    def __init__(self, websocket: WebSocket, user: str, debounce_ms: float = LIVE_DEBOUNCE_MS):
+        self.ws = websocket
+        self.user = user
+        self.route_class = classify_route("WEBSOCKET", websocket.url.path) or "cpu"
+        self.debounce = debounce_ms / 1000
+        self._latest: Optional[Revision] = None
+        self._changed = asyncio.Event()
+        self._cancel: Optional[threading.Event] = None
+
+    async def run(self) -> None:
+        scorer = asyncio.create_task(self._score_latest())
+        try:
+            while True:
+                message = await self.ws.receive_text()
+                try:
+                    revision = self._parse(message)
+                except ValueError as e:
+                    rev = e.args[1] if len(e.args) > 1 else None
+                    if not await self._send({"type": "error", "rev": rev, "detail": e.args[0]}):
+                        break
+                    continue
+                telemetry.incr("live_revisions")
+                self._latest = revision
+                if self._cancel is not None:
+                    self._cancel.set()
+                self._changed.set()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            scorer.cancel()
+            if self._cancel is not None:
+                self._cancel.set()
+
+    async def _send(self, message: Dict) -> bool:
+        """Sends a reply; False once the socket is closed."""
+        try:
+            await self.ws.send_json(message)
+            return True
+        except (WebSocketDisconnect, RuntimeError):
+            return False
+
+    @staticmethod
+    def _parse(message: str) -> Revision:
+        """Raises ValueError(detail, rev) for a message that cannot be scored."""
+        try:
+            data = json.loads(message)
+            rev, content, mode = int(data["rev"]), str(data["content"]), data.get("mode", "full")
+        except (ValueError, TypeError, KeyError):
+            raise ValueError("Invalid message")
+        if mode not in ANALYSIS_MODES:
+            raise ValueError("Unknown analysis mode", rev)
+        if len(content) > MAX_CONTENT_CHARS:
+            raise ValueError(f"Content too long (max {MAX_CONTENT_CHARS} characters)", rev)
+        return Revision(rev, content, mode)
+
+    async def _settle(self) -> Revision:
+        """The latest revision, once none newer has arrived for the debounce period."""
+        await self._changed.wait()
+        while True:
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), self.debounce)
+            except asyncio.TimeoutError:
+                return self._latest
+
+    async def _score_latest(self) -> None:
+        global _slots
+        if _slots is None:
+            _slots = asyncio.Semaphore(LIVE_SCORING_CONCURRENCY)
+        backoff = 0.0
+        while True:
+            if backoff:
+                # rejected by admission control: retry the latest revision once the
+                # backoff ends, or sooner if a newer one arrives; holds no slot
+                try:
+                    await asyncio.wait_for(self._changed.wait(), backoff)
+                except asyncio.TimeoutError:
+                    self._changed.set()
+                backoff = 0.0
+            revision = await self._settle()
+            if not revision.content.strip():
+                continue
+            async with _slots:
+                if revision is not self._latest:
+                    telemetry.incr("live_superseded", stage="queued")
+                    continue
+                status, retry_after = admission.try_acquire(self.user, self.route_class)
+                if status is not None:
+                    detail = "Too many requests" if status == 429 else "Server busy"
+                    sent = await self._send(
+                        {
+                            "type": "error",
+                            "rev": revision.rev,
+                            "detail": detail,
+                            "retry_after": round(retry_after, 1),
+                        }
+                    )
+                    if not sent:
+                        return
+                    backoff = retry_after
+                    continue
+                self._cancel = cancel = threading.Event()
+                try:
+                    scores = await run_in_threadpool(
+                        _score, revision.content, revision.mode, cancel
+                    )
+                except cancellation.Cancelled:
+                    telemetry.incr("live_superseded", stage="scoring")
+                    continue
+                except Exception:
+                    logger.exception("Live scoring failed", extra={"rev": revision.rev})
+                    detail = "Error calculating scores"
+                    if not await self._send(
+                        {"type": "error", "rev": revision.rev, "detail": detail}
+                    ):
+                        return
+                    continue
+                finally:
+                    admission.release(self.route_class)
+            if revision is not self._latest:
+                # finished just as a newer revision arrived
+                telemetry.incr("live_superseded", stage="done")
+                continue
+            ms = (time.perf_counter() - revision.received) * 1000
+            telemetry.incr("live_scored", mode=revision.mode)
+            sent = await self._send(
+                {"type": "scores", "rev": revision.rev, "scores": scores, "ms": round(ms, 1)}
+            )
+            if not sent:
+                return
+
+
+async def _session_user(websocket: WebSocket) -> Optional[str]:
+    """The signed-in user's uid from the session cookie, or None."""
+    id_token = websocket.cookies.get("firebase_id_token")
+    if not id_token:
+        return None
+    try:
+        claims = await run_in_threadpool(verify_firebase_token, id_token)
+    except Exception:
+        return None
+    return claims.get("uid")
+
+
+async def serve(websocket: WebSocket) -> None:
+    """
+    Runs a live scoring session for a signed-in user until it closes. The
+    handshake is refused without a valid session; over LIVE_MAX_SESSIONS
+    (or the user's LIVE_MAX_SESSIONS_PER_USER) the connection is closed
+    with "try again later".
+    """
+    global _sessions
+    user = await _session_user(websocket)
+    if user is None:
+        telemetry.incr("live_sessions_rejected", reason="unauthenticated")
+        await websocket.close(code=CLOSE_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    if _sessions >= LIVE_MAX_SESSIONS or _user_sessions[user] >= LIVE_MAX_SESSIONS_PER_USER:
+        telemetry.incr("live_sessions_rejected", reason="full")
+        await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+        return
+    _sessions += 1
+    _user_sessions[user] += 1
+    telemetry.set_gauge("live_sessions", _sessions)
+    try:
+        await LiveSession(websocket, user).run()
+    finally:
+        _sessions -= 1
+        _user_sessions[user] -= 1
+        if not _user_sessions[user]:
+            del _user_sessions[user]
+        telemetry.set_gauge("live_sessions", _sessions)
@@ -0,0 +1,307 @@
+# app/llm_txt_rules.py
+
+import re
+import html
+from collections import Counter
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import unquote, urlsplit
+
+# Robots-style semantics, which is what the Allow:/Disallow: lines in llms.txt follow:
+# - a rule matches when its pattern is a prefix of the path; `*` matches any run of
+#   characters and a trailing `$` anchors the pattern to the end of the path
+# - the longest matching pattern wins; on a tie Allow beats Disallow
+# - no matching rule means the path is allowed
+
+WILDCARD = "*"
+ALL_AGENTS = "*"
+
+# Per-group memo of recent verdicts; access logs repeat the same paths a lot
+VERDICT_CACHE_SIZE = 200_000
+
+
+class _Node:
+    __slots__ = ("children", "rule", "end_rule")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # (specificity, allow, pattern) for a rule ending here; end_rule only applies at path end
+        self.rule: Optional[Tuple[int, bool, str]] = None
+        self.end_rule: Optional[Tuple[int, bool, str]] = None
+
+
+def _better(a, b):
+    """Longest pattern wins; Allow (True) beats Disallow on a tie."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return b if (b[0], b[1]) > (a[0], a[1]) else a
+
+
+class RuleTrie:
+    """
+    Character trie of Allow/Disallow patterns for one agent group.
+
+    Plain prefixes are matched by a single walk down the trie. `*` is a child
+    edge that may absorb any number of path characters; the search over those
+    branches is memoized on (node, position), so each node is visited at most
+    once per path position.
+    """
+
+    def __init__(self, allow: Iterable[str] = (), disallow: Iterable[str] = ()):
+        self.root = _Node()
+        self.has_wildcards = False
+        self.size = 0
+        for pattern in allow:
+            self.add(pattern, True)
+        for pattern in disallow:
+            self.add(pattern, False)
+        self._cache: Dict[str, Tuple[bool, Optional[str]]] = {}
+
+    def add(self, pattern: str, allow: bool) -> None:
+        pattern = pattern.strip()
+        if not pattern:
+            # "Disallow:" with an empty value means "nothing is disallowed"
+            return
+        anchored = pattern.endswith("$")
+        body = pattern[:-1] if anchored else pattern
+        # collapse runs of wildcards, and a trailing wildcard is implied by prefix matching
+        body = re.sub(r"\*+", WILDCARD, body)
+        if body.endswith(WILDCARD) and not anchored:
+            body = body[:-1]
+        self.has_wildcards = self.has_wildcards or WILDCARD in body
+
+        node = self.root
+        for ch in body:
+            node = node.children.setdefault(ch, _Node())
+        # specificity is the length of the pattern as written, as in Google's robots.txt rules
+        rule = (len(pattern), allow, pattern)
+        if anchored:
+            node.end_rule = _better(node.end_rule, rule)
+        else:
+            node.rule = _better(node.rule, rule)
+        self.size += 1
+
+    def _match_prefix(self, path: str):
+        best = self.root.rule
+        node = self.root
+        for ch in path:
+            node = node.children.get(ch)
+            if node is None:
+                return best
+            best = _better(best, node.rule)
+        return _better(best, node.end_rule)
+
+    def _match_wildcard(self, path: str):
+        best = None
+        end = len(path)
+        stack = [(self.root, 0)]
+        seen = set()
+        while stack:
+            node, pos = stack.pop()
+            key = (id(node), pos)
+            if key in seen:
+                continue
+            seen.add(key)
+            best = _better(best, node.rule)
+            if pos == end:
+                best = _better(best, node.end_rule)
+            star = node.children.get(WILDCARD)
+            if star is not None:
+                # `*` absorbs path[pos:k] for every k
+                for k in range(pos, end + 1):
+                    stack.append((star, k))
+            if pos < end:
+                child = node.children.get(path[pos])
+                if child is not None:
+                    stack.append((child, pos + 1))
+        return best
+
+    def evaluate(self, path: str) -> Tuple[bool, Optional[str]]:
+        """Returns (allowed, deciding pattern or None)."""
+        cached = self._cache.get(path)
+        if cached is not None:
+            return cached
+        rule = self._match_wildcard(path) if self.has_wildcards else self._match_prefix(path)
+        verdict = (True, None) if rule is None else (rule[1], rule[2])
+        if len(self._cache) >= VERDICT_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[path] = verdict
+        return verdict
+
+
+def parse_llm_txt(text: str) -> List[Tuple[List[str], List[str], List[str]]]:
+    """
+    Splits llms.txt into robots-style groups of (agents, allow, disallow).
+    Consecutive User-agent lines open a group; rules attach to the open group.
+    """
+    groups = []
+    agents: List[str] = []
+    allow: List[str] = []
+    disallow: List[str] = []
+    in_rules = False
+    for raw in text.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        field, value = line.split(":", 1)
+        field, value = field.strip().lower(), value.strip()
+        if field == "user-agent":
+            if in_rules:
+                groups.append((agents, allow, disallow))
+                agents, allow, disallow, in_rules = [], [], [], False
+            agents.append(value)
+        elif field in ("allow", "disallow"):
+            in_rules = True
+            (allow if field == "allow" else disallow).append(value)
+    if agents or allow or disallow:
+        # rules with no User-agent line apply to everyone
+        groups.append((agents or [ALL_AGENTS], allow, disallow))
+    return groups
+
+
+class PolicyMatcher:
+    """
+    All agent groups of one llms.txt policy, compiled once. Agents are
+    matched case-insensitively by exact name, falling back to the `*` group.
+    """
+
+    def __init__(self, groups: List[Tuple[List[str], List[str], List[str]]]):
+        self.tries: List[RuleTrie] = []
+        self.agent_group: Dict[str, int] = {}
+        for agents, allow, disallow in groups:
+            self.tries.append(RuleTrie(allow, disallow))
+            for agent in agents:
+                # the first group naming an agent wins
+                self.agent_group.setdefault(agent.lower(), len(self.tries) - 1)
+
+    @classmethod
+    def from_text(cls, text: str) -> "PolicyMatcher":
+        return cls(parse_llm_txt(text))
+
+    @classmethod
+    def from_policy(cls, policy: Dict) -> "PolicyMatcher":
+        """From a stored policy dict (see app.llm_txt_store.normalize_policy)."""
+        agents = policy.get("agents") or [ALL_AGENTS]
+        return cls([(agents, policy.get("allow_paths", []), policy.get("disallow_paths", []))])
+
+    @property
+    def agents(self) -> List[str]:
+        return list(self.agent_group)
+
+    def trie_for(self, agent: str) -> Optional[RuleTrie]:
+        idx = self.agent_group.get(agent.lower(), self.agent_group.get(ALL_AGENTS))
+        return None if idx is None else self.tries[idx]
+
+    def is_allowed(self, agent: str, path: str) -> bool:
+        trie = self.trie_for(agent)
+        return True if trie is None else trie.evaluate(path)[0]
+
+
+_LOG_REQUEST = re.compile(r'"[A-Z]+ (\S+) HTTP/[\d.]+"')
+_SITEMAP_LOC = re.compile(rb"<loc>\s*([^<\s]+)\s*</loc>", re.IGNORECASE)
+
+
+def to_path(url_or_path: str) -> str:
+    """Normalizes a URL or raw path to the path+query that rules match against."""
+    if url_or_path.startswith("/") and "%" not in url_or_path and "#" not in url_or_path:
+        # fast path for the common case of an already-clean path from a log line
+        return url_or_path
+    parts = urlsplit(url_or_path.strip())
+    path = unquote(parts.path) or "/"
+    return f"{path}?{parts.query}" if parts.query else path
+
+
+def iter_paths(stream: IO[bytes], chunk_size: int = 1 << 20) -> Iterator[str]:
+    """
+    Streams URL paths out of a sitemap (XML <loc> entries), an access log in
+    common/combined format, or a plain list of URLs/paths one per line.
+    Memory use is bounded by the chunk size, not the file size.
+    """
+    head = stream.read(chunk_size)
+    if b"<urlset" in head or b"<sitemapindex" in head or head.lstrip().startswith(b"<?xml"):
+        buf = head
+        while True:
+            last = 0
+            for m in _SITEMAP_LOC.finditer(buf):
+                # XML-escaped: a query's "&" is written as "&amp;"
+                yield to_path(html.unescape(m.group(1).decode("utf-8", "replace")))
+                last = m.end()
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                return
+            # keep the unmatched tail, which may hold a partially read <loc> element
+            buf = (buf[last:] if last else buf[-4096:]) + chunk
+
+    pending = b""
+    chunk = head
+    while chunk:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for raw in lines:
+            path = _line_to_path(raw)
+            if path:
+                yield path
+        chunk = stream.read(chunk_size)
+    path = _line_to_path(pending)
+    if path:
+        yield path
+
+
+def _line_to_path(raw: bytes) -> Optional[str]:
+    line = raw.decode("utf-8", "replace").strip()
+    if not line or line.startswith("#"):
+        return None
+    m = _LOG_REQUEST.search(line)
+    if m:
+        return to_path(m.group(1))
+    return to_path(line.split()[0])
+
+
+def coverage_report(
+    matcher: PolicyMatcher,
+    paths: Iterable[str],
+    agents: Optional[List[str]] = None,
+    top_rules: int = 5,
+) -> Dict[str, Union[int, Dict]]:
+    """
+    Evaluates every path against every agent in one pass over `paths`.
+    Agents sharing a group share one evaluation per path.
+    """
+    agents = agents or [a for a in matcher.agents if a != ALL_AGENTS] or [ALL_AGENTS]
+    # distinct tries, and which agents read from each
+    tries: Dict[int, RuleTrie] = {}
+    agent_trie: Dict[str, Optional[int]] = {}
+    for agent in agents:
+        trie = matcher.trie_for(agent)
+        agent_trie[agent] = None if trie is None else id(trie)
+        if trie is not None:
+            tries[id(trie)] = trie
+
+    allowed = Counter()
+    deciding = {key: Counter() for key in tries}
+    total = 0
+    for path in paths:
+        total += 1
+        for key, trie in tries.items():
+            ok, pattern = trie.evaluate(path)
+            if ok:
+                allowed[key] += 1
+            if pattern is not None:
+                deciding[key][("Allow" if ok else "Disallow", pattern)] += 1
+
+    report = {}
+    for agent, key in agent_trie.items():
+        n_allowed = total if key is None else allowed[key]
+        report[agent] = {
+            "allowed": n_allowed,
+            "disallowed": total - n_allowed,
+            "coverage": round(100 * n_allowed / total, 2) if total else 100.0,
+            "top_rules": []
+            if key is None
+            else [
+                {"rule": f"{kind}: {pattern}", "paths": count}
+                for (kind, pattern), count in deciding[key].most_common(top_rules)
+            ],
+        }
+    return {"total_paths": total, "agents": report}
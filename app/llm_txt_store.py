@@ -0,0 +1,239 @@
+# app/llm_txt_store.py
+
+import os
+import csv
+import io
+import json
+import fcntl
+import contextlib
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+from app import memory
+from app.brand_protector import generate_llm_txt
+
+logger = logging.getLogger(__name__)
+
+LLM_TXT_STORE_PATH = os.getenv("LLM_TXT_STORE_PATH", "data/llm_txt_policies.json")
+
+LIST_FIELDS = ("agents", "allow_paths", "disallow_paths")
+TEXT_FIELDS = ("cite_as", "policy")
+
+
+def normalize_site(site: str) -> str:
+    """'https://Example.com/' → 'example.com'"""
+    site = site.strip().lower()
+    for prefix in ("https://", "http://"):
+        if site.startswith(prefix):
+            site = site[len(prefix) :]
+    return site.rstrip("/")
+
+
+def _as_list(value: Union[str, List[str], None]) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def check_policy(raw: Dict) -> None:
+    """Raises ValueError for fields of the wrong type (e.g. numbers in a JSON manifest)."""
+    for field in LIST_FIELDS:
+        value = raw.get(field)
+        if not (
+            value is None
+            or isinstance(value, str)
+            or (isinstance(value, list) and all(isinstance(v, str) for v in value))
+        ):
+            raise ValueError(f"'{field}' must be a string or a list of strings")
+    for field in TEXT_FIELDS + ("site",):
+        if not isinstance(raw.get(field) or "", str):
+            raise ValueError(f"'{field}' must be a string")
+
+
+def normalize_policy(raw: Dict) -> Dict:
+    """Canonical policy dict: list fields as lists, text fields as stripped strings."""
+    check_policy(raw)
+    policy = {field: _as_list(raw.get(field)) for field in LIST_FIELDS}
+    policy.update({field: str(raw.get(field) or "").strip() for field in TEXT_FIELDS})
+    return policy
+
+
+def policy_hash(policy: Dict) -> str:
+    canonical = json.dumps(policy, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def parse_manifest(data: bytes, filename: str = "") -> List[Dict]:
+    """
+    Reads a bulk manifest. JSON may be a list of objects with a "site" key or a
+    {site: policy} mapping; CSV needs a "site" column plus any policy columns,
+    with list fields comma-separated inside the cell. Raises ValueError for a
+    malformed manifest, including JSON fields of the wrong type.
+    """
+    text = data.decode("utf-8-sig")
+    if not (filename.lower().endswith(".json") or text.lstrip().startswith(("[", "{"))):
+        return list(csv.DictReader(io.StringIO(text)))
+    parsed = json.loads(text)
+    if isinstance(parsed, dict):
+        if not all(isinstance(policy, dict) for policy in parsed.values()):
+            raise ValueError("Each site in a JSON manifest must map to a policy object")
+        rows = [{"site": site, **policy} for site, policy in parsed.items()]
+    elif isinstance(parsed, list):
+        rows = parsed
+    else:
+        raise ValueError("JSON manifest must be a list or an object keyed by site")
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError(f"Row {i}: expected an object")
+        try:
+            check_policy(row)
+        except ValueError as e:
+            raise ValueError(f"Row {i}: {e}")
+    return rows
+
+
+class LlmTxtStore:
+    """
+    Per-site llms.txt policies, persisted as JSON, with compiled files kept in
+    memory. A site's text and ETag are rebuilt only when its policy hash changes.
+
+    Every uvicorn worker has its own copy: reads reload the file when it has
+    changed on disk, and writes re-read it under an exclusive lock before
+    applying their change, so workers never drop each other's sites.
+    """
+
+    def __init__(self, path: str = LLM_TXT_STORE_PATH):
+        self.path = path
+        self._policies: Dict[str, Dict] = {}
+        # site → (policy hash, compiled text, etag)
+        self._compiled: Dict[str, Tuple[str, str, str]] = {}
+        # (mtime, size, inode) of the file last loaded
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self) -> None:
+        """Reloads the store if the file changed since it was last read."""
+        try:
+            st = os.stat(self.path)
+            if (st.st_mtime_ns, st.st_size, st.st_ino) == self._stamp:
+                return
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            # stat the open file, so the stamp matches the contents read
+            st = os.fstat(f.fileno())
+            stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+            if stamp == self._stamp:
+                return
+            stored = json.load(f)
+        with self._lock:
+            # sites deleted by another worker
+            for site in set(self._policies) - set(stored):
+                self._policies.pop(site)
+                self._compiled.pop(site, None)
+            for site, policy in stored.items():
+                try:
+                    self._upsert(site, policy)
+                except ValueError as e:
+                    logger.warning("Skipping stored llms.txt policy: %s", e, extra={"site": site})
+            self._stamp = stamp
+
+    @contextlib.contextmanager
+    def _writing(self):
+        """Holds the cross-process write lock, with the store freshly reloaded."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.load()
+            yield
+
+    def _save(self) -> None:
+        # Write-then-rename so a crash never leaves a half-written store; the
+        # temp name is per process in case the lock file is not honoured
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._policies, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+        st = os.stat(self.path)
+        self._stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _upsert(self, site: str, raw: Dict) -> str:
+        site = normalize_site(site)
+        if not site:
+            raise ValueError("Missing site")
+        policy = normalize_policy(raw)
+        digest = policy_hash(policy)
+        current = self._compiled.get(site)
+        if current is not None and current[0] == digest:
+            return "unchanged"
+
+        text = generate_llm_txt(**policy)
+        if text is None:
+            raise ValueError(f"Policy for '{site}' has no agents, paths or cite-as")
+        self._policies[site] = policy
+        self._compiled[site] = (digest, text, f'"{digest[:32]}"')
+        return "updated" if current is not None else "created"
+
+    def upsert(self, site: str, raw: Dict) -> str:
+        """Returns "created", "updated" or "unchanged"."""
+        with self._writing():
+            status = self._upsert(site, raw)
+            if status != "unchanged":
+                self._save()
+        return status
+
+    def bulk_upsert(self, rows: List[Dict]) -> Dict[str, Union[int, List]]:
+        """
+        Applies a manifest; only sites whose policy changed are recompiled, and
+        the store is written once at the end.
+        """
+        summary = {"created": 0, "updated": 0, "unchanged": 0, "errors": []}
+        with self._writing():
+            for i, row in enumerate(rows):
+                try:
+                    summary[self._upsert(row.get("site", ""), row)] += 1
+                except (ValueError, AttributeError) as e:
+                    summary["errors"].append({"row": i, "error": str(e)})
+            if summary["created"] or summary["updated"]:
+                self._save()
+        logger.info(
+            "llms.txt manifest applied",
+            extra={f"sites_{k}": v if k != "errors" else len(v) for k, v in summary.items()},
+        )
+        return summary
+
+    def get(self, site: str) -> Optional[Tuple[str, str]]:
+        """(text, etag) for a site, or None."""
+        self.load()
+        compiled = self._compiled.get(normalize_site(site))
+        return None if compiled is None else compiled[1:]
+
+    def delete(self, site: str) -> bool:
+        site = normalize_site(site)
+        with self._writing():
+            existed = self._policies.pop(site, None) is not None
+            self._compiled.pop(site, None)
+            if existed:
+                self._save()
+        return existed
+
+    def sites(self) -> List[str]:
+        self.load()
+        return sorted(self._policies)
+
+
+_store: Optional[LlmTxtStore] = None
+
+
+def get_store() -> LlmTxtStore:
+    global _store
+    if _store is None:
+        _store = LlmTxtStore()
+        memory.register_cache("llm_txt_store.policies", lambda: {"entries": len(_store._policies)})
+    return _store
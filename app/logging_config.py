@@ -0,0 +1,145 @@
+# app/logging_config.py
+
+import os
+import sys
+import json
+import uuid
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# Request-scoped correlation id, set by the HTTP middleware in app/main.py
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # "json" or "text"
+# e.g. "app.main=0.1,app.brand_protector=0.5" — sampling applies to DEBUG records only
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Attributes every LogRecord carries; anything else was passed via `extra=`
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """
+    Parses "logger=rate,logger=rate" into a dict, clamping rates to [0, 1].
+    """
+    rates = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, rate = item.split("=", 1)
+        try:
+            rates[name.strip()] = max(0.0, min(float(rate), 1.0))
+        except ValueError:
+            continue
+    return rates
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps every record with the current request id."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of verbose records per logger. The most specific
+    configured logger prefix wins; records at INFO and above always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float], max_level: int = logging.DEBUG):
+        super().__init__()
+        self.rates = rates
+        self.max_level = max_level
+
+    def _rate_for(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return self.rates.get("root", 1.0)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging(
+    level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, sample_rates: str = LOG_SAMPLE_RATES
+) -> None:
+    """
+    Installs a QueueHandler on the root logger so request handlers never block on
+    stderr; a QueueListener thread does the actual formatting and writing.
+    Safe to call more than once — only the first call takes effect.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if fmt == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(
+            logging.Formatter("%(asctime)s [%(levelname)s] %(name)s %(request_id)s %(message)s")
+        )
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # Filters run in the caller's thread, where the request id contextvar is visible
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(sample_rates)))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
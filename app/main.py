@@ -1,18 +1,44 @@
 import os
+import math
+import uuid
+import hashlib
+import threading
 from json import loads
 import logging
-from typing import List
+from typing import List, Optional
 
-from fastapi import FastAPI, Request, HTTPException, Form
+from fastapi import FastAPI, Request, HTTPException, Form, UploadFile, File, WebSocket
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import (
+    HTMLResponse,
+    RedirectResponse,
+    JSONResponse,
+    Response,
+    PlainTextResponse,
+    FileResponse,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 from firebase_admin import credentials, initialize_app, auth
 import uvicorn
 
-from app.brand_protector import run_brand_analysis, generate_llm_txt
-from app.scoring import compute_scores
-from app.treatments.apply import apply_treatment
+from app.brand_protector import (
+    run_brand_analysis,
+    generate_llm_txt,
+    run_brand_comparison_chart,
+    CHART_MEDIA_TYPES,
+)
+from app.scoring import ANALYSIS_MODES, compute_scores
+from app.pdf_ingest import score_pdf
+from app import content_audit
+from app.competitor_analysis import (
+    MAX_COMPETITORS,
+    compare_with_competitors,
+    load_competitors,
+    parse_competitors,
+)
+from app import metrics
+from app.treatments.chunked import treat_content
 from app.traffic_predictor import predict_llm_traffic
 from app.utils import (
     verify_firebase_token,
@@ -21,17 +47,136 @@ from app.utils import (
 from app.query_research import run_query_research_on_topic
 from app.generations import generate_venice_response
 from app.config import COLORS, THEMES
+from app.logging_config import configure_logging, new_request_id, request_id_var
+from app.admission import admission, classify_route
+from app.llm_txt_store import get_store, normalize_site, parse_manifest
+from app.llm_txt_rules import PolicyMatcher, coverage_report, iter_paths
+from app import telemetry
+from app import profiling
+from app import memory
+from app import live_scoring
+from app import model_router
+from app import token_budget
 
 DEFAULT_RISK_KEYWORDS = ["reputation", "sentiment", "risk"]
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI()
 
+
+@app.middleware("http")
+async def memory_middleware(request: Request, call_next):
+    """
+    RSS growth (and tracemalloc peak, while tracing) for scoring and LLM routes,
+    then a check on spaCy vocab growth, which may schedule a model reload.
+    """
+    if classify_route(request.method, request.url.path) is None:
+        return await call_next(request)
+    rss_before = memory.begin_request()
+    try:
+        return await call_next(request)
+    finally:
+        memory.end_request(f"{request.method} {request.url.path}", rss_before)
+        metrics.check_vocab_growth()
+
+
+async def _verified_uid(request: Request) -> Optional[str]:
+    """The uid from a valid session cookie, or None; verification is cached."""
+    id_token = request.cookies.get("firebase_id_token")
+    if not id_token:
+        return None
+    try:
+        claims = await run_in_threadpool(verify_firebase_token, id_token)
+    except Exception:
+        return None
+    return claims.get("uid")
+
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    """
+    Samples this one request when an admin asks for it (X-Profile + X-Admin-Token)
+    or an allow-listed, signed-in user adds ?profile=1. Saves a speedscope file
+    and returns stage timings in Server-Timing; other requests skip straight through.
+    """
+    wanted = bool(request.headers.get("X-Profile")) and profiling.is_admin(
+        request.headers.get("X-Admin-Token")
+    )
+    if (
+        not wanted
+        and request.query_params.get("profile") == "1"
+        and profiling.PROFILE_ALLOWED_USERS
+    ):
+        wanted = await _verified_uid(request) in profiling.PROFILE_ALLOWED_USERS
+    if not wanted:
+        return await call_next(request)
+
+    profile = profiling.Profile(new_request_id(), f"{request.method} {request.url.path}")
+    token = profile.begin()
+    try:
+        response = await call_next(request)
+    finally:
+        profile.end(token)
+    try:
+        await run_in_threadpool(profile.save)
+    except OSError:
+        logger.exception("Could not save profile", extra={"profile_id": profile.id})
+    response.headers["Server-Timing"] = profile.server_timing()
+    response.headers["X-Profile-Id"] = profile.id
+    return response
+
+
+@app.middleware("http")
+async def admission_middleware(request: Request, call_next):
+    """Sheds load on expensive routes before any scoring or LLM work starts."""
+    route_class = classify_route(request.method, request.url.path)
+    if route_class is None:
+        return await call_next(request)
+
+    # keyed on the verified uid: the user_id cookie is client-controlled, and
+    # rotating it would get a fresh bucket on every request
+    client = request.client.host if request.client else "unknown"
+    user = await _verified_uid(request) or f"anon:{client}"
+    status, retry_after = admission.try_acquire(user, route_class)
+    if status is not None:
+        logger.info(
+            "Request rejected by admission control",
+            extra={"route_class": route_class, "status": status, "user": user},
+        )
+        message = "Too many requests" if status == 429 else "Server busy"
+        return HTMLResponse(
+            f"<div class='red f6'>{message}, please retry shortly.</div>",
+            status_code=status,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    try:
+        return await call_next(request)
+    finally:
+        admission.release(route_class)
+
+
+# Registered last so it wraps admission control and tags its rejections too
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """
+    Tags every log record emitted while serving a request with its id, and
+    LLM calls made for it with its route (for MODEL_ROUTES overrides).
+    """
+    request_id = request.headers.get("X-Request-ID") or new_request_id()
+    token = request_id_var.set(request_id)
+    route_token = model_router.route_var.set(f"{request.method} {request.url.path}")
+    try:
+        response = await call_next(request)
+    finally:
+        model_router.route_var.reset(route_token)
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 templates = Jinja2Templates(directory="app/templates")
 
 # make theme config available in all templates
@@ -44,17 +189,59 @@ templates.env.globals.update(
 # Mount static folder
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-firebase_json = os.getenv("FIREBASE_SERVICE_ACCOUNT_JSON")
+WARM_MODEL_ON_STARTUP = os.getenv("WARM_MODEL_ON_STARTUP", "1") == "1"
+# Off by default: with several app workers, each would resume the same audits
+AUDIT_RESUME_ON_STARTUP = os.getenv("AUDIT_RESUME_ON_STARTUP", "0") == "1"
+
+
+def init_firebase():
+    firebase_json = os.getenv("FIREBASE_SERVICE_ACCOUNT_JSON")
+
+    # If it's a file path
+    if os.path.isfile(firebase_json):
+        cred = credentials.Certificate(firebase_json)
+    # If it's a raw JSON string
+    else:
+        cred_dict = loads(firebase_json)
+        cred = credentials.Certificate(cred_dict)
+
+    initialize_app(cred)
+
+
+@app.on_event("startup")
+async def on_startup():
+    init_firebase()
+    if memory.MEMORY_TRACE_ON_STARTUP:
+        memory.start_tracing()
+    if WARM_MODEL_ON_STARTUP:
+        # Load spaCy off the event loop; /readyz reports 503 until this finishes
+        threading.Thread(target=metrics.warm_up, name="model-warmup", daemon=True).start()
+    if AUDIT_RESUME_ON_STARTUP:
+        resumed = content_audit.resume_interrupted_audits()
+        if resumed:
+            logger.info("Resumed site audits", extra={"audit_ids": resumed})
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
 
-# If it's a file path
-if os.path.isfile(firebase_json):
-    cred = credentials.Certificate(firebase_json)
-# If it's a raw JSON string
-else:
-    cred_dict = loads(firebase_json)
-    cred = credentials.Certificate(cred_dict)
 
-initialize_app(cred)
+@app.get("/readyz")
+async def readyz():
+    """
+    Ready once the spaCy model is loaded, so load balancers hold traffic
+    from a cold instance until scoring routes can answer promptly.
+    """
+    ready = metrics.is_model_loaded()
+    return JSONResponse(
+        {
+            "ready": ready,
+            "model": metrics.SPACY_MODEL,
+            "model_load_seconds": metrics.model_load_seconds,
+        },
+        status_code=200 if ready else 503,
+    )
 
 
 # Injected Login Page with Firebase config
@@ -73,7 +260,7 @@ async def read_root(request: Request):
         return RedirectResponse(url="/login")
 
     try:
-        usr_attrs = verify_firebase_token(id_token)
+        usr_attrs = await run_in_threadpool(verify_firebase_token, id_token)
     except Exception:
         return RedirectResponse(url="/login")
 
@@ -93,7 +280,7 @@ async def session_login(request: Request):
         return JSONResponse({"error": "Missing ID token"}, status_code=400)
 
     try:
-        decoded_token = verify_firebase_token(id_token)
+        decoded_token = await run_in_threadpool(verify_firebase_token, id_token)
         email = decoded_token.get("email")
         uid = decoded_token.get("uid")
 
@@ -104,7 +291,7 @@ async def session_login(request: Request):
         return response
 
     except Exception as e:
-        print(f"Error verifying token: {e}")
+        logger.warning("Error verifying token: %s", e)
         return JSONResponse({"error": "Invalid ID token"}, status_code=403)
 
 
@@ -116,7 +303,7 @@ async def dashboard(request: Request):
         return RedirectResponse(url="/login")
 
     try:
-        user = verify_firebase_token(id_token)
+        user = await run_in_threadpool(verify_firebase_token, id_token)
     except Exception:
         return RedirectResponse(url="/login")
 
@@ -158,8 +345,12 @@ def content_doctor_page(request: Request):
 
 
 @app.post("/analyze", response_class=HTMLResponse)
-async def analyze(request: Request, content: str = Form(...)):
+async def analyze(request: Request, content: str = Form(...), mode: str = Form("full")):
     # 1) Input validation
+    if mode not in ANALYSIS_MODES:
+        return HTMLResponse(
+            "<div class='red f6'>Error: Unknown analysis mode</div>", status_code=400
+        )
     if not content or not content.strip():
         return HTMLResponse(
             "<div class='red f6'>Error: Content cannot be empty</div>", status_code=400
@@ -172,13 +363,24 @@ async def analyze(request: Request, content: str = Form(...)):
 
     # 2) Compute all eight metrics in one go
     try:
-        logging.debug(f"Computing GEO metrics for content length {len(content)}")
-        scores = compute_scores(content, normalize=False)
-        logging.debug(f"Computed scores: {scores}")
-    except Exception as e:
-        logging.error(f"Error computing scores: {e}")
+        # off the event loop: a cache miss may wait on another worker's compute lease
+        scores = await run_in_threadpool(compute_scores, content, False, mode)
+        logger.debug("Computed GEO metrics", extra={"content_length": len(content), "mode": mode})
+    except Exception:
+        logger.exception("Error computing scores")
         return HTMLResponse("<div class='red f6'>Error calculating scores</div>", status_code=500)
 
+    # Uniqueness against everything analyzed before, then index this document too
+    similar = []
+    try:
+        from app.uniqueness_index import get_index
+
+        corpus = await run_in_threadpool(get_index().check, content)
+        scores["Corpus Uniqueness"] = corpus["corpus_uniqueness"]
+        similar = corpus["nearest"]
+    except Exception:
+        logger.exception("Error checking corpus uniqueness")
+
     # 3) Render the same template, passing along the full `scores` dict
     return templates.TemplateResponse(
         "content_doctor.html",
@@ -186,10 +388,237 @@ async def analyze(request: Request, content: str = Form(...)):
             "request": request,
             "content": content,
             "scores": scores,
+            "similar": similar,
+            "mode": mode,
         },
     )
 
 
+@app.websocket("/ws/content-doctor")
+async def content_doctor_live(websocket: WebSocket):
+    """Live scores for Content Doctor while the author types; see app/live_scoring.py."""
+    await live_scoring.serve(websocket)
+
+
+@app.post("/uniqueness/nearest")
+async def uniqueness_nearest(content: str = Form(...), k: int = Form(5)):
+    """
+    Nearest previously analyzed documents and their overlap %, without
+    adding `content` to the index.
+    """
+    if not content.strip():
+        raise HTTPException(status_code=400, detail="Content cannot be empty")
+    from app.uniqueness_index import get_index
+
+    result = await run_in_threadpool(get_index().check, content, max(1, min(k, 50)), False)
+    return JSONResponse(result)
+
+
+@app.post("/redundancy")
+async def redundancy_report(content: str = Form(...), n: int = Form(3)):
+    """
+    Repetition profile for n = 1..5, the most repeated phrases, and the
+    sentences whose n-grams repeat most (n selects the attribution size).
+    """
+    if not content.strip():
+        raise HTTPException(status_code=400, detail="Content cannot be empty")
+    if not 1 <= n <= 5:
+        raise HTTPException(status_code=400, detail="n must be between 1 and 5")
+
+    def _report():
+        from app.redundancy import RedundancyProfile
+
+        return RedundancyProfile(metrics.extract_citations_spacy(content)).report(attribution_n=n)
+
+    return JSONResponse(await run_in_threadpool(_report))
+
+
+@app.post("/citation-scores")
+async def citation_scores(request: Request):
+    """
+    Scores one cited document against many queries: JSON body with
+    `content`, `queries` (list of strings), optional `n` and `normalize`.
+    Returns query × citation matrices for authoritativeness and sourceability.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON")
+    content = body.get("content") or ""
+    queries = body.get("queries")
+    n = body.get("n")
+    if not content.strip():
+        raise HTTPException(status_code=400, detail="Content cannot be empty")
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) for q in queries):
+        raise HTTPException(status_code=400, detail="queries must be a non-empty list of strings")
+    if n is not None and (not isinstance(n, int) or not 1 <= n <= 100):
+        raise HTTPException(status_code=400, detail="n must be between 1 and 100")
+
+    from app.citation_scoring import MAX_QUERIES, score_citations
+
+    if len(queries) > MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_QUERIES} queries per request")
+
+    def _score():
+        doc = metrics.extract_citations_spacy(content)
+        return score_citations(doc, queries, n, bool(body.get("normalize", True)))
+
+    return JSONResponse(await run_in_threadpool(_score))
+
+
+@app.post("/analyze-pdf")
+async def analyze_pdf(pdf: UploadFile = File(...)):
+    """
+    Scores an uploaded PDF page by page and as a whole. Not subject to the
+    50k character cap of /analyze, since text is streamed rather than pasted.
+    """
+    if pdf.content_type not in ("application/pdf", "application/octet-stream"):
+        raise HTTPException(status_code=400, detail="Upload a PDF file")
+    try:
+        result = await run_in_threadpool(score_pdf, pdf.file)
+    except Exception:
+        logger.exception("Error scoring PDF")
+        raise HTTPException(status_code=500, detail="Error calculating scores")
+    return JSONResponse(result)
+
+
+@app.get("/content-audit", response_class=HTMLResponse)
+async def content_audit_page(request: Request):
+    return templates.TemplateResponse(
+        "content_audit.html",
+        {"request": request, "audits": content_audit.list_audits()},
+    )
+
+
+@app.post("/content-audit")
+async def start_content_audit(
+    request: Request, source: str = Form(""), archive: UploadFile = File(None)
+):
+    """
+    Starts (or resumes) a site audit from a sitemap URL, a directory or WARC
+    file under AUDIT_SOURCE_ROOT, or an uploaded WARC/sitemap file.
+    """
+    if archive is not None and archive.filename:
+        name = os.path.basename(archive.filename).lower()
+        suffixes = sorted(content_audit.WARC_SUFFIXES + content_audit.SITEMAP_SUFFIXES, key=len)
+        suffix = next((s for s in reversed(suffixes) if name.endswith(s)), None)
+        if suffix is None:
+            raise HTTPException(status_code=400, detail="Upload a .warc(.gz) or sitemap .xml(.gz)")
+        upload_dir = os.path.join(content_audit.AUDIT_SOURCE_ROOT, "uploads")
+        os.makedirs(upload_dir, exist_ok=True)
+        # Stored under its content hash: uploads sharing a filename never overwrite
+        # each other, and uploading the same file again resumes its audit
+        digest = hashlib.sha256()
+        partial = os.path.join(upload_dir, f".{uuid.uuid4().hex}.part")
+        with open(partial, "wb") as f:
+            while chunk := await archive.read(1 << 20):
+                digest.update(chunk)
+                f.write(chunk)
+        source = os.path.join(upload_dir, digest.hexdigest()[:32] + suffix)
+        os.replace(partial, source)
+    if not source.strip():
+        raise HTTPException(status_code=400, detail="Provide a sitemap URL, path or WARC upload")
+    try:
+        # resolves a sitemap URL's host, so off the event loop
+        audit_id = await run_in_threadpool(content_audit.start_audit, source)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except content_audit.TooManyAudits:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many audits are running, please retry later",
+            headers={"Retry-After": "60"},
+        )
+    return RedirectResponse(url=f"/content-audit/{audit_id}", status_code=303)
+
+
+@app.get("/content-audit/{audit_id}")
+async def content_audit_report(
+    request: Request,
+    audit_id: str,
+    sort: str = "Authoritativeness",
+    order: str = "asc",
+    offset: int = 0,
+    limit: int = 200,
+    format: str = "html",
+):
+    """
+    Audit report sorted by any metric, word count or page; lowest scores
+    first by default. `format=json` returns the same rows as JSON.
+    """
+    try:
+        report = await run_in_threadpool(
+            content_audit.audit_report,
+            audit_id,
+            sort,
+            order == "desc",
+            max(1, min(limit, 5000)),
+            max(0, offset),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if report is None:
+        raise HTTPException(status_code=404, detail="No such audit")
+    if format == "json":
+        return JSONResponse(report)
+    return templates.TemplateResponse(
+        "content_audit.html",
+        {"request": request, "report": report, "limit": limit},
+    )
+
+
+@app.post("/content-audit/{audit_id}/stop")
+async def stop_content_audit(audit_id: str):
+    """Stops a running audit; it resumes from its checkpoint when restarted."""
+    content_audit.stop_audit(audit_id)
+    return RedirectResponse(url=f"/content-audit/{audit_id}", status_code=303)
+
+
+@app.get("/competitor-analysis", response_class=HTMLResponse)
+async def competitor_analysis_page(request: Request):
+    return templates.TemplateResponse("competitor_analysis.html", {"request": request})
+
+
+@app.post("/competitor-analysis")
+async def competitor_analysis(
+    request: Request,
+    content: str = Form(...),
+    competitors: str = Form(...),
+    format: str = Form("html"),
+):
+    """
+    Ranks our content against competitor pages (pasted text or URLs, separated
+    by "---" lines) on the RankLab metrics, with pairwise content overlap.
+    """
+    if not content.strip() or len(content) > 50_000:
+        raise HTTPException(status_code=400, detail="Content must be 1–50000 characters")
+    entries = parse_competitors(competitors)
+    if not entries:
+        raise HTTPException(status_code=400, detail="Add at least one competitor")
+    if len(entries) > MAX_COMPETITORS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COMPETITORS} competitors")
+
+    try:
+        documents = await run_in_threadpool(load_competitors, entries)
+        if not documents:
+            raise HTTPException(status_code=502, detail="No competitor page could be fetched")
+        result = await run_in_threadpool(compare_with_competitors, content, documents)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        logger.exception("Error comparing competitors")
+        raise HTTPException(status_code=500, detail="Error calculating scores")
+
+    if format == "json":
+        return JSONResponse(result)
+    return templates.TemplateResponse(
+        "competitor_analysis.html",
+        {"request": request, "content": content, "competitors": competitors, "result": result},
+    )
+
+
 @app.get("/brand-protector", response_class=HTMLResponse)
 async def brand_guard_page(request: Request):
     """
@@ -243,7 +672,7 @@ async def brand_protector_run(
         policy=", ".join(custom_risks),
     )
 
-    logging.debug(f"Brand analysis completed")
+    logger.debug("Brand analysis completed", extra={"brands": 1 + len(comps)})
 
     # render template with the generated HTML tables only
     return templates.TemplateResponse(
@@ -251,10 +680,36 @@ async def brand_protector_run(
         {
             "request": request,
             "analysis": html_table,
+            "chart_brands": ", ".join([main_brand.strip()] + comps),
         },
     )
 
 
+@app.get("/brand-chart")
+async def brand_chart(brands: str, topics: str, format: str = "svg"):
+    """
+    Bubble chart comparing brands on one or two topics, as SVG or PNG.
+    """
+    try:
+        image = await run_in_threadpool(
+            run_brand_comparison_chart,
+            brands.split(","),
+            topics.split(","),
+            format,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        logger.exception("Error rendering brand chart")
+        raise HTTPException(status_code=502, detail="Could not fetch topic rankings")
+
+    return Response(
+        content=image,
+        media_type=CHART_MEDIA_TYPES[format],
+        headers={"Cache-Control": "private, max-age=3600"},
+    )
+
+
 @app.get("/query-search", response_class=HTMLResponse)
 async def query_search_page(request: Request):
     return templates.TemplateResponse("query_research.html", {"request": request})
@@ -263,11 +718,14 @@ async def query_search_page(request: Request):
 @app.post("/query-search", response_class=HTMLResponse)
 async def run_query_research(request: Request, topic: str = Form(...)):
     try:
-        result_dict = run_query_research_on_topic(topic)
+        result_dict = await run_in_threadpool(run_query_research_on_topic, topic)
         queries = result_dict["queries"]
         intent_labels = result_dict["intent_labels"]
         missing_topics = result_dict["missing_topics"]
-        logging.debug(f"\n\n Payload{result_dict}")
+        logger.debug(
+            "Query research completed",
+            extra={"queries": len(queries), "missing_topics": len(missing_topics)},
+        )
         return templates.TemplateResponse(
             "query_research.html",
             {
@@ -323,7 +781,10 @@ async def do_predict(
     with the resulting data for charts.
     """
     try:
-        result = predict_llm_traffic(content=content, topic=topic, num_queries=5)
+        # spaCy plus the NumPy simulation: keep it off the event loop
+        result = await run_in_threadpool(
+            predict_llm_traffic, content=content, topic=topic, num_queries=5
+        )
         return templates.TemplateResponse(
             "traffic_predictor.html",
             {"request": request, "result": result, "error": None},
@@ -359,24 +820,23 @@ async def content_lab_page(
         "Fluency Optimization": "fluency",
         "Keyword Stuffing": "keyword",
     }
+    # Long content is treated in chunks, concurrently; see app/treatments/chunked.py
+    method_key = method_key_map.get(method) if method else None
     try:
-        if method:
-            method_key = method_key_map.get(method)
-            if method_key:
-                treated_prompt = apply_treatment(method_key, content)
-            else:
-                treated_prompt = content
+        if method_key:
+            treated_content = await run_in_threadpool(treat_content, method_key, content)
+        elif method:
+            treated_content = await run_in_threadpool(generate_venice_response, content)
         else:
-            treated_prompt = content
+            treated_content = content
     except ValueError as e:
-        treated_prompt = f"⚠️ Error: {str(e)}"
-
-    treated_content = generate_venice_response(treated_prompt) if method else content
+        # unknown treatment, or content over the LLM token budget
+        treated_content = f"⚠️ Error: {str(e)}"
 
     try:
-        scores = compute_scores(treated_content, normalize=False)
-    except Exception as e:
-        logging.error(f"Error computing scores in content-lab: {e}")
+        scores = await run_in_threadpool(compute_scores, treated_content, False)
+    except Exception:
+        logger.exception("Error computing scores in content-lab")
         scores = None
 
     return templates.TemplateResponse(
@@ -392,6 +852,76 @@ async def content_lab_page(
     )
 
 
+@app.get("/metrics")
+async def metrics_snapshot():
+    """
+    In-process counters and gauges (admission control, caches, LLM usage).
+    """
+    return JSONResponse(telemetry.snapshot())
+
+
+def _require_admin(request: Request) -> None:
+    if not profiling.is_admin(request.headers.get("X-Admin-Token")):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request):
+    """A saved request profile (speedscope JSON); admins only."""
+    _require_admin(request)
+    path = profiling.profile_path(profile_id)
+    if not profile_id.isalnum() or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return FileResponse(path, media_type="application/json")
+
+
+@app.get("/admin/memory")
+async def memory_report(request: Request):
+    """RSS, tracemalloc totals, spaCy vocab growth, cache sizes and per-route peaks."""
+    _require_admin(request)
+    return JSONResponse(await run_in_threadpool(memory.report))
+
+
+@app.post("/admin/memory/snapshots")
+async def memory_snapshot(request: Request, limit: int = 25):
+    """
+    Takes a tracemalloc snapshot (starting tracing first if it is off) and
+    returns its id and largest allocation sites.
+    """
+    _require_admin(request)
+    snapshot_id = await run_in_threadpool(memory.take_snapshot)
+    top = await run_in_threadpool(memory.top_allocations, snapshot_id, limit)
+    return JSONResponse({"id": snapshot_id, "top": top})
+
+
+@app.get("/admin/memory/diff")
+async def memory_diff(request: Request, base: str, target: str = "", limit: int = 25):
+    """Largest allocation changes from snapshot `base` to `target` (or to now)."""
+    _require_admin(request)
+    try:
+        diff = await run_in_threadpool(memory.diff_snapshots, base, target or None, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown snapshot")
+    return JSONResponse({"base": base, "target": target or "now", "diff": diff})
+
+
+@app.delete("/admin/memory/snapshots")
+async def memory_stop_tracing(request: Request):
+    """Stops tracemalloc and drops all snapshots."""
+    _require_admin(request)
+    memory.stop_tracing()
+    return JSONResponse({"tracing": False})
+
+
+@app.get("/admin/models")
+async def model_report(request: Request):
+    """Per-model health and latency as seen by the router, and token budget statistics."""
+    _require_admin(request)
+    return JSONResponse(
+        {"models": model_router.router.stats(), "budget": token_budget.budgeter.stats()}
+    )
+
+
 @app.get("/edit-llm-txt", response_class=HTMLResponse)
 async def edit_llm_txt_page(request: Request):
     """
@@ -413,11 +943,13 @@ async def generate_llm_txt_route(
     disallow_paths: str = Form(""),
     cite_as: str = Form(""),
     policy: str = Form(""),
+    site: str = Form(""),
 ):
     agents_list = [a.strip() for a in agents.split(",") if a.strip()]
     allow_list = [p.strip() for p in allow_paths.split(",") if p.strip()]
     disallow_list = [p.strip() for p in disallow_paths.split(",") if p.strip()]
 
+    saved_site = None
     try:
         llm_txt = generate_llm_txt(
             agents=agents_list,
@@ -426,6 +958,22 @@ async def generate_llm_txt_route(
             cite_as=cite_as,
             policy=policy,
         )
+        # Optionally persist the policy so it is served at /sites/<site>/llms.txt
+        if site.strip() and llm_txt:
+            # waits on the store's cross-worker file lock
+            await run_in_threadpool(
+                get_store().upsert,
+                site,
+                {
+                    "agents": agents_list,
+                    "allow_paths": allow_list,
+                    "disallow_paths": disallow_list,
+                    "cite_as": cite_as,
+                    "policy": policy,
+                },
+            )
+            # the store's key, so the /sites/<site>/llms.txt link resolves
+            saved_site = normalize_site(site)
     except Exception as e:
         llm_txt = f"⚠️ Error generating text: {str(e)}"
 
@@ -434,10 +982,68 @@ async def generate_llm_txt_route(
         {
             "request": request,
             "llm_txt": llm_txt,
+            "saved_site": saved_site,
         },
     )
 
 
+@app.post("/llm-txt/bulk")
+async def bulk_llm_txt(request: Request, manifest: UploadFile = File(...)):
+    """
+    Upserts llms.txt policies for many sites from a CSV or JSON manifest.
+    Only sites whose policy changed are regenerated. Admins only, since it
+    writes every site's policy.
+    """
+    _require_admin(request)
+    try:
+        rows = parse_manifest(await manifest.read(), manifest.filename or "")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid manifest: {e}")
+    summary = await run_in_threadpool(get_store().bulk_upsert, rows)
+    return JSONResponse(summary)
+
+
+@app.post("/llm-txt/coverage")
+async def llm_txt_coverage(
+    paths: UploadFile = File(...),
+    site: str = Form(""),
+    llm_txt: str = Form(""),
+    agents: str = Form(""),
+):
+    """
+    Evaluates every URL in a sitemap, access log or URL list against a stored
+    site policy (or pasted llms.txt) and reports crawl coverage per agent.
+    """
+    if site:
+        compiled = get_store().get(site)
+        if compiled is None:
+            raise HTTPException(status_code=404, detail="No llms.txt policy for this site")
+        llm_txt = compiled[0]
+    if not llm_txt.strip():
+        raise HTTPException(status_code=400, detail="Provide a stored site or llms.txt text")
+
+    matcher = PolicyMatcher.from_text(llm_txt)
+    agents_list = [a.strip() for a in agents.split(",") if a.strip()] or None
+    report = await run_in_threadpool(coverage_report, matcher, iter_paths(paths.file), agents_list)
+    return JSONResponse(report)
+
+
+@app.get("/sites/{site}/llms.txt", response_class=PlainTextResponse)
+async def serve_llm_txt(request: Request, site: str):
+    """
+    Serves a site's compiled llms.txt from memory, honouring If-None-Match.
+    """
+    compiled = get_store().get(site)
+    if compiled is None:
+        raise HTTPException(status_code=404, detail="No llms.txt policy for this site")
+    text, etag = compiled
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match == "*":
+        return Response(status_code=304, headers=headers)
+    return PlainTextResponse(text, headers=headers)
+
+
 # 💻 Local dev command
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,175 @@
+# app/memory.py
+
+import os
+import gc
+import itertools
+import time
+import logging
+import resource
+import threading
+import tracemalloc
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from app import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Frames kept per allocation while tracing; more frames, more overhead
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "10"))
+# Start tracemalloc at startup, so per-request peaks are recorded from the first request
+MEMORY_TRACE_ON_STARTUP = os.getenv("MEMORY_TRACE_ON_STARTUP", "0") == "1"
+# Requests whose RSS grows by more than this are logged
+MEMORY_LOG_GROWTH_BYTES = int(os.getenv("MEMORY_LOG_GROWTH_BYTES", str(64 * 1024 * 1024)))
+# Snapshots kept for diffing; the oldest is dropped past this
+MAX_SNAPSHOTS = 5
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# name → function returning {"entries": ..., "bytes": ...} (bytes when cheap to know)
+_caches: Dict[str, Callable[[], Dict[str, int]]] = {}
+_snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+_snapshot_ids = itertools.count(1)
+_route_peaks: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def register_cache(name: str, sizer: Callable[[], Dict[str, int]]) -> None:
+    """Adds a cache to `cache_sizes`; `sizer` must be cheap and thread-safe."""
+    _caches[name] = sizer
+
+
+def cache_sizes() -> Dict[str, Dict[str, int]]:
+    sizes = {}
+    for name, sizer in sorted(_caches.items()):
+        try:
+            sizes[name] = sizer()
+        except Exception as e:
+            sizes[name] = {"error": str(e)}
+    return sizes
+
+
+def rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+
+
+def begin_request() -> int:
+    """
+    RSS before a request. tracemalloc's peak is process-wide, so with
+    concurrent requests a request's peak includes whatever else was running.
+    """
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    return rss_bytes()
+
+
+def end_request(route: str, rss_before: int) -> None:
+    growth = rss_bytes() - rss_before
+    peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+    with _lock:
+        stats = _route_peaks.setdefault(route, {"requests": 0, "max_rss_growth": 0})
+        stats["requests"] += 1
+        stats["max_rss_growth"] = max(stats["max_rss_growth"], growth)
+        if peak is not None:
+            stats["max_peak_alloc"] = max(stats.get("max_peak_alloc", 0), peak)
+    telemetry.set_gauge("request_rss_growth_bytes", growth, route=route)
+    if peak is not None:
+        telemetry.set_gauge("request_peak_alloc_bytes", peak, route=route)
+    if growth > MEMORY_LOG_GROWTH_BYTES:
+        logger.warning(
+            "Request grew RSS", extra={"route": route, "growth": growth, "peak_alloc": peak}
+        )
+
+
+def start_tracing() -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(MEMORY_TRACE_FRAMES)
+        logger.info("tracemalloc started", extra={"frames": MEMORY_TRACE_FRAMES})
+
+
+def stop_tracing() -> None:
+    with _lock:
+        _snapshots.clear()
+    tracemalloc.stop()
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    start_tracing()
+    return tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
+
+
+def take_snapshot() -> str:
+    """Snapshots traced allocations (starting tracing if needed); returns the snapshot id."""
+    snapshot = _snapshot()
+    snapshot_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{next(_snapshot_ids)}"
+    with _lock:
+        _snapshots[snapshot_id] = snapshot
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return snapshot_id
+
+
+def _format_stat(stat) -> Dict:
+    frame = stat.traceback[0]
+    return {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "size": stat.size,
+        "count": stat.count,
+        **(
+            {"size_diff": stat.size_diff, "count_diff": stat.count_diff}
+            if hasattr(stat, "size_diff")
+            else {}
+        ),
+    }
+
+
+def top_allocations(snapshot_id: str, limit: int = 25, key: str = "lineno") -> List[Dict]:
+    with _lock:
+        snapshot = _snapshots[snapshot_id]
+    return [_format_stat(stat) for stat in snapshot.statistics(key)[:limit]]
+
+
+def diff_snapshots(
+    base_id: str, target_id: Optional[str] = None, limit: int = 25, key: str = "lineno"
+) -> List[Dict]:
+    """
+    Largest changes from `base_id` to `target_id`, or to a fresh snapshot
+    that is not stored (so it never evicts `base_id`) if None.
+    """
+    with _lock:
+        base = _snapshots[base_id]
+        target = _snapshots[target_id] if target_id is not None else None
+    if target is None:
+        target = _snapshot()
+    return [_format_stat(stat) for stat in target.compare_to(base, key)[:limit]]
+
+
+def report() -> Dict:
+    from app import metrics
+
+    traced = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+    with _lock:
+        routes = {route: dict(stats) for route, stats in _route_peaks.items()}
+        snapshots = list(_snapshots)
+    return {
+        "rss": rss_bytes(),
+        "peak_rss": peak_rss_bytes(),
+        "tracing": traced is not None,
+        "traced": {"current": traced[0], "peak": traced[1]} if traced else None,
+        "gc_counts": gc.get_count(),
+        "spacy": metrics.vocab_stats(),
+        "caches": cache_sizes(),
+        "routes": routes,
+        "snapshots": snapshots,
+    }
@@ -1,13 +1,122 @@
+import os
 import re
 import math
+import time
+import logging
 import itertools
-import spacy
-from typing import List, Tuple
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from app import cancellation, memory, telemetry
+from app.parse_store import parse_cached
+from app.profiling import run_pipeline, stage
+
+logger = logging.getLogger(__name__)
+
+SPACY_MODEL = "en_core_web_sm"
+
+# The spaCy pipeline is loaded on first use (or by `warm_up` at startup) rather
+# than at import, so importing the app stays cheap. One model serves both the
+# sentence/token pass (NER disabled per call) and the NER pass.
+_nlp = None
+_nlp_lock = threading.Lock()
+model_load_seconds = None
+
+# The vocab and StringStore only grow: every new token string seen is kept for
+# the life of the model. Past this many strings added since load, the model is
+# reloaded in the background and swapped in. 0 disables reloading.
+MODEL_RELOAD_STRING_GROWTH = int(os.getenv("MODEL_RELOAD_STRING_GROWTH", "2000000"))
+_strings_at_load = 0
+_reload_lock = threading.Lock()
+model_reloads = 0
+
+
+def _load_model():
+    import spacy
+
+    # 1) Load spaCy & add a sentencizer so that .sents works
+    model = spacy.load(SPACY_MODEL, disable=["parser"])
+    if not model.has_pipe("sentencizer"):
+        model.add_pipe("sentencizer")
+    return model
+
+
+def get_nlp():
+    global _nlp, model_load_seconds, _strings_at_load
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                start = time.perf_counter()
+                model = _load_model()
+                model_load_seconds = time.perf_counter() - start
+                _strings_at_load = len(model.vocab.strings)
+                _nlp = model
+    return _nlp
+
+
+def vocab_stats() -> Dict[str, int]:
+    """Lexemes and strings held by the loaded model, and growth since it was loaded."""
+    nlp = _nlp
+    if nlp is None:
+        return {}
+    strings = len(nlp.vocab.strings)
+    return {
+        "lexemes": len(nlp.vocab),
+        "strings": strings,
+        "strings_growth": strings - _strings_at_load,
+        "reload_threshold": MODEL_RELOAD_STRING_GROWTH,
+        "reloads": model_reloads,
+    }
+
+
+def _reload_model() -> None:
+    global _nlp, _strings_at_load, model_reloads
+    if not _reload_lock.acquire(blocking=False):
+        return
+    try:
+        before = len(_nlp.vocab.strings) if _nlp is not None else 0
+        model = _load_model()
+        model("Warm up. This loads the vectors and tables.")
+        with _nlp_lock:
+            # requests already holding the old model finish with it; it is freed after
+            _strings_at_load = len(model.vocab.strings)
+            _nlp = model
+            model_reloads += 1
+        logger.info(
+            "spaCy model reloaded",
+            extra={"strings_before": before, "strings_after": _strings_at_load},
+        )
+    except Exception:
+        logger.exception("spaCy model reload failed")
+    finally:
+        _reload_lock.release()
+
+
+def check_vocab_growth() -> bool:
+    """
+    Publishes vocab sizes as gauges and starts a background reload once the
+    StringStore has grown past MODEL_RELOAD_STRING_GROWTH. Returns True if it did.
+    """
+    stats = vocab_stats()
+    if not stats:
+        return False
+    telemetry.set_gauge("spacy_vocab_lexemes", stats["lexemes"])
+    telemetry.set_gauge("spacy_vocab_strings", stats["strings"])
+    if not 0 < MODEL_RELOAD_STRING_GROWTH <= stats["strings_growth"] or _reload_lock.locked():
+        return False
+    threading.Thread(target=_reload_model, name="model-reload", daemon=True).start()
+    return True
+
+
+def is_model_loaded() -> bool:
+    return _nlp is not None
+
+
+def warm_up() -> None:
+    """Loads the model and runs one tiny document through every component."""
+    get_nlp()("Warm up. This loads the vectors and tables.")
 
-# 1) Load spaCy & add a sentencizer so that .sents works
-nlp = spacy.load("en_core_web_sm", disable=["parser", "ner"])
-if not nlp.has_pipe("sentencizer"):
-    nlp.add_pipe("sentencizer")
 
 # Types
 Sentence = Tuple[List[str], str, List[int]]  # tokens, text, citations
@@ -15,32 +124,82 @@ Paragraph = List[Sentence]
 Doc = List[Paragraph]
 
 
+_CITATION = re.compile(r"\[[^\w\s]*(\d+)[^\w\s]*\]")
+
+
+def citations(sent_text: str) -> List[int]:
+    """The [1], [2], … citation numbers in a sentence."""
+    return [int(m) for m in _CITATION.findall(sent_text)]
+
+
 def extract_citations_spacy(text: str) -> Doc:
     """
     Splits on blank lines → paragraphs, uses spaCy sentencizer → sentences,
     tokenizes each sentence into word tokens, and pulls out [1], [2], … citations.
     """
 
-    def _citations(sent_text: str) -> List[int]:
-        return [int(m) for m in re.findall(r"\[[^\w\s]*(\d+)[^\w\s]*\]", sent_text)]
+    def _parse(para: str):
+        cancellation.check()
+        return run_pipeline(nlp, para, disable=["ner"])
 
+    nlp = get_nlp()
     paras = [p.strip() for p in text.split("\n\n") if p.strip()]
+    with stage("metrics.extract_citations"):
+        parsed = parse_cached(
+            nlp, "paragraphs", "\n\n".join(paras), lambda: list(map(_parse, paras))
+        )
     doc: Doc = []
-    for p in paras:
-        sp = nlp(p)
+    for sp in parsed:
         para: Paragraph = []
         for sent in sp.sents:
             txt = sent.text.strip()
             if not txt:
                 continue
             toks = [token.text for token in sent if not token.is_space]
-            cites = _citations(txt)
+            cites = citations(txt)
             para.append((toks, txt, cites))
         if para:
             doc.append(para)
     return doc
 
 
+# Memoized query token sets; queries are short and heavily repeated across calls
+QUERY_CACHE_SIZE = 10_000
+_query_cache: "OrderedDict[str, Tuple[FrozenSet[str], FrozenSet[str]]]" = OrderedDict()
+_query_cache_lock = threading.Lock()
+memory.register_cache("metrics.query_cache", lambda: {"entries": len(_query_cache)})
+
+
+def _query_sets(qdoc) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    relevance = frozenset(tok.text for tok in qdoc if tok.is_alpha and not tok.is_stop)
+    influence = frozenset(tok.text for tok in qdoc if not tok.is_stop and not tok.is_punct)
+    return relevance, influence
+
+
+def analyze_queries(queries: Iterable[str]) -> List[Tuple[FrozenSet[str], FrozenSet[str]]]:
+    """
+    (relevance tokens, influence tokens) per query. Only the tokenizer is
+    needed (stop/alpha/punct are lexical attributes), uncached queries are
+    tokenized in one batch, and results are memoized.
+    """
+    queries = list(queries)
+    with _query_cache_lock:
+        found = {q: _query_cache[q] for q in set(queries) if q in _query_cache}
+        for q in found:
+            _query_cache.move_to_end(q)
+    missing = [q for q in dict.fromkeys(queries) if q not in found]
+    if missing:
+        tokenizer = get_nlp().tokenizer
+        for q, qdoc in zip(missing, tokenizer.pipe(q.lower() for q in missing)):
+            found[q] = _query_sets(qdoc)
+        with _query_cache_lock:
+            for q in missing:
+                _query_cache[q] = found[q]
+            while len(_query_cache) > QUERY_CACHE_SIZE:
+                _query_cache.popitem(last=False)
+    return [found[q] for q in queries]
+
+
 def _normalize(scores: List[float], normalize: bool) -> List[float]:
     if not normalize:
         return scores
@@ -104,8 +263,7 @@ def impression_relevance_sm_spacy(
     Approximate relevance by token-overlap between query and each citation sentence.
     """
     # Prepare a set of query tokens (filtering out stop-words & punctuation)
-    qdoc = nlp(query.lower())
-    query_tokens = {tok.text for tok in qdoc if tok.is_alpha and not tok.is_stop}
+    query_tokens = analyze_queries([query])[0][0]
 
     # Flatten to a list of sentences
     sents = list(itertools.chain(*doc))
@@ -142,8 +300,7 @@ def impression_influence_detailed_spacy(
     Influence: sum of token–overlap between each citation's sentences and the query.
     """
     # tokenize & normalize the query
-    q_doc = nlp(query.lower())
-    query_tokens = {tok.text for tok in q_doc if not tok.is_stop and not tok.is_punct}
+    query_tokens = analyze_queries([query])[0][1]
 
     # flatten sentences
     sents = list(itertools.chain(*doc))
@@ -344,8 +501,12 @@ def overall_authoritativeness(doc: Doc) -> float:
         total_types.update(t.lower() for t in tokens if len(t) > 2)
         total_length += len(tokens)
 
-    avg_sent_len = total_length / len(sents)
-    type_token_ratio = len(total_types) / max(total_tokens, 1)
+    return _authoritativeness(len(sents), total_length, len(total_types))
+
+
+def _authoritativeness(sentences: int, tokens: int, types: int) -> float:
+    avg_sent_len = tokens / sentences
+    type_token_ratio = types / max(tokens, 1)
 
     # Cap each subscore more aggressively
     len_score = min(avg_sent_len / 30.0, 1.0)  # longer required
@@ -358,27 +519,37 @@ def overall_authoritativeness(doc: Doc) -> float:
     return 0.5 * len_score + 0.5 * type_score
 
 
-def overall_sourceability(doc: Doc) -> float:
+_URL = re.compile(r"https?://|www\.")
+
+SOURCE_ENTITY_LABELS = {"ORG", "GPE", "PERSON", "PRODUCT", "EVENT", "WORK_OF_ART"}
+
+
+def extract_named_entities(doc: Doc) -> Set[str]:
     """
-    Stricter sourceability: only rewards actual named entities, numerics, and true URLs.
+    Runs spaCy NER over the document's sentences and returns the surface text
+    of source-like entities (organisations, places, people, products, ...).
     """
-    import re
+    # Use spaCy NER for named entities (shared model, loaded once)
+    cancellation.check()
+    nlp_ner = get_nlp()
+    ner_text = "\n".join(sent for _, sent, _ in itertools.chain(*doc))
+    with stage("metrics.named_entities"):
+        parsed = parse_cached(nlp_ner, "ner", ner_text, lambda: [run_pipeline(nlp_ner, ner_text)])
+    ents = parsed[0].ents
+    return {ent.text for ent in ents if ent.label_ in SOURCE_ENTITY_LABELS}
+
 
+def overall_sourceability(doc: Doc, named_entities: Optional[Set[str]] = None) -> float:
+    """
+    Stricter sourceability: only rewards actual named entities, numerics, and true URLs.
+    Pass `named_entities` when they were already extracted (e.g. chunk by chunk).
+    """
     sents = list(itertools.chain(*doc))
     if not sents:
         return 0.0
 
-    # Use spaCy NER for named entities
-    nlp_ner = spacy.load("en_core_web_sm", disable=["parser"])
-    ner_text = "\n".join(sent for _, sent, _ in itertools.chain(*doc))
-    ents = nlp_ner(ner_text).ents
-    named_entities = {
-        ent.text
-        for ent in ents
-        if ent.label_ in {"ORG", "GPE", "PERSON", "PRODUCT", "EVENT", "WORK_OF_ART"}
-    }
-
-    url_pattern = re.compile(r"https?://|www\.")
+    if named_entities is None:
+        named_entities = extract_named_entities(doc)
 
     num_tokens = 0
     named_entity_hits = 0
@@ -390,13 +561,14 @@ def overall_sourceability(doc: Doc) -> float:
                 num_tokens += 1
             if tok in named_entities:
                 named_entity_hits += 1
-            if url_pattern.search(tok):
+            if _URL.search(tok):
                 url_tokens += 1
+    return _sourceability(len(sents), num_tokens, named_entity_hits, url_tokens)
+
 
-    total = max(len(sents), 1)
-    score = (
-        0.4 * (num_tokens / total) + 0.4 * (named_entity_hits / total) + 0.2 * (url_tokens / total)
-    )
+def _sourceability(sentences: int, numeric: int, entity_hits: int, urls: int) -> float:
+    total = max(sentences, 1)
+    score = 0.4 * (numeric / total) + 0.4 * (entity_hits / total) + 0.2 * (urls / total)
     return min(score, 1.0)
 
 
@@ -406,32 +578,136 @@ def overall_uniqueness(doc: Doc) -> float:
     and penalty for n-gram redundancy.
     """
     import numpy as np
-    from collections import Counter
+    from app.redundancy import RedundancyProfile
 
     sents = list(itertools.chain(*doc))
     if not sents:
         return 0.0
 
-    token_counts = []
-    all_tokens = []
+    token_counts = [len(tokens) for tokens, _, _ in sents]
+    redundancy = RedundancyProfile(doc, ns=(1, 3))
+    unigrams = redundancy.stats(1)
 
-    for tokens, _, _ in sents:
-        token_counts.append(len(tokens))
-        all_tokens.extend([t.lower() for t in tokens if len(t) > 2])
-
-    total_tokens = len(all_tokens)
-    types = set(all_tokens)
-    type_token_ratio = len(types) / max(total_tokens, 1)
+    type_token_ratio = unigrams["distinct"] / max(unigrams["total"], 1)
     sent_len_std = np.std(token_counts) / max(np.mean(token_counts), 1)
+    return _uniqueness(type_token_ratio, sent_len_std, redundancy.stats(3)["top_share"])
+
 
+def _uniqueness(type_token_ratio: float, sent_len_std: float, redundancy_penalty: float) -> float:
     # Apply stricter scaling
     capped_diversity = max(0.0, min((type_token_ratio - 0.5) / 0.4, 1.0))
     capped_std = max(0.0, min((sent_len_std - 0.3) / 1.5, 1.0))
 
-    # Penalize n-gram redundancy
-    trigrams = list(zip(all_tokens, all_tokens[1:], all_tokens[2:]))
-    trigram_counts = Counter(trigrams)
-    redundancy_penalty = max(trigram_counts.values()) / len(trigrams) if trigrams else 0
-
+    # Penalize n-gram redundancy: share of the single most frequent trigram
     base_score = 0.6 * capped_diversity + 0.4 * capped_std
     return base_score * (1 - redundancy_penalty)
+
+
+# Distinct trigrams a DocumentStats counts exactly; past twice this many, its
+# counts become a Misra-Gries summary that undercounts the most frequent
+# trigram by at most (trigrams seen) / (TOP_TRIGRAMS + 1)
+TOP_TRIGRAMS = 4096
+
+
+class DocumentStats:
+    """
+    Running totals behind the three overall_* metrics, so a long document can
+    be scored piece by piece without keeping its sentences: memory grows with
+    its vocabulary, not its length. Build one per piece with `of` and `merge`
+    them in reading order (trigrams spanning two pieces are counted too).
+    Scores equal those of the whole document, except the trigram penalty
+    once more than 2 × TOP_TRIGRAMS distinct trigrams have been seen.
+    """
+
+    def __init__(self):
+        self.sentences = 0
+        self.tokens = 0
+        self.length_squares = 0  # sum of squared sentence lengths
+        self.numeric = 0
+        self.urls = 0
+        # raw token counts, for entity hits once every piece's entities are known
+        self.token_counts: Counter = Counter()
+        # lower-cased tokens of MIN_TOKEN_LEN+ characters: the types both metrics use
+        self.types: Set[str] = set()
+        self.kept = 0
+        self.trigrams: Dict[int, int] = {}
+        self.trigram_total = 0
+        # first and last two kept-token hashes, for the trigrams across a merge
+        self.head: List[int] = []
+        self.tail: List[int] = []
+
+    @classmethod
+    def of(cls, doc: Doc) -> "DocumentStats":
+        import zlib
+        import numpy as np
+        from app.minhash import ngram_hashes
+        from app.redundancy import MIN_TOKEN_LEN
+
+        stats = cls()
+        kept: List[str] = []
+        for tokens, _, _ in itertools.chain(*doc):
+            stats.sentences += 1
+            stats.tokens += len(tokens)
+            stats.length_squares += len(tokens) ** 2
+            stats.token_counts.update(tokens)
+            for tok in tokens:
+                if tok.isnumeric():
+                    stats.numeric += 1
+                if _URL.search(tok):
+                    stats.urls += 1
+                if len(tok) >= MIN_TOKEN_LEN:
+                    kept.append(tok.lower())
+        stats.types.update(kept)
+        stats.kept = len(kept)
+        hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in kept), np.uint64, len(kept))
+        stats._add_trigram_hashes(ngram_hashes(hashes, 3))
+        stats.head = hashes[:2].tolist()
+        stats.tail = hashes[-2:].tolist()
+        return stats
+
+    def _add_trigram_hashes(self, grams) -> None:
+        import numpy as np
+
+        values, counts = np.unique(grams, return_counts=True)
+        self._add_trigrams(dict(zip(values.tolist(), counts.tolist())), len(grams))
+
+    def _add_trigrams(self, counts: Dict[int, int], occurrences: int) -> None:
+        for gram, count in counts.items():
+            self.trigrams[gram] = self.trigrams.get(gram, 0) + count
+        self.trigram_total += occurrences
+        if len(self.trigrams) > 2 * TOP_TRIGRAMS:
+            cut = sorted(self.trigrams.values(), reverse=True)[TOP_TRIGRAMS]
+            self.trigrams = {g: c - cut for g, c in self.trigrams.items() if c > cut}
+
+    def merge(self, other: "DocumentStats") -> None:
+        """Appends `other`, the stats of the piece that follows this one."""
+        import numpy as np
+        from app.minhash import ngram_hashes
+
+        boundary = np.array(self.tail + other.head, dtype=np.uint64)
+        self._add_trigram_hashes(ngram_hashes(boundary, 3))
+        self._add_trigrams(other.trigrams, other.trigram_total)
+        self.head = (self.head + other.head)[:2]
+        self.tail = (self.tail + other.tail)[-2:]
+        self.sentences += other.sentences
+        self.tokens += other.tokens
+        self.length_squares += other.length_squares
+        self.numeric += other.numeric
+        self.urls += other.urls
+        self.token_counts.update(other.token_counts)
+        self.types |= other.types
+        self.kept += other.kept
+
+    def scores(self, named_entities: Set[str]) -> Tuple[float, float, float]:
+        """(authoritativeness, sourceability, uniqueness), as the overall_* functions."""
+        if not self.sentences:
+            return 0.0, 0.0, 0.0
+        entity_hits = sum(self.token_counts[entity] for entity in named_entities)
+        mean = self.tokens / self.sentences
+        std = math.sqrt(max(self.length_squares / self.sentences - mean**2, 0.0))
+        top_share = max(self.trigrams.values(), default=0) / max(self.trigram_total, 1)
+        return (
+            _authoritativeness(self.sentences, self.tokens, len(self.types)),
+            _sourceability(self.sentences, self.numeric, entity_hits, self.urls),
+            _uniqueness(len(self.types) / max(self.kept, 1), std / max(mean, 1), top_share),
+        )
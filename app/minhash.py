@@ -0,0 +1,100 @@
+# app/minhash.py
+
+import re
+import zlib
+import numpy as np
+from typing import List
+
+# Signature length; the Jaccard estimate has standard error ~ 1/sqrt(NUM_PERM)
+NUM_PERM = 128
+# Word shingles; 5 is long enough that shared stock phrases rarely collide
+SHINGLE_SIZE = 5
+# Shingle hashes are processed in blocks of this many, bounding the (perm × shingle) matrix
+BLOCK_SIZE = 8192
+
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SHIFT = np.uint64(32)
+_ROLL = np.uint64(1_000_003)
+# Signature of a document with no shingles; never equal to a real min-hash
+EMPTY = np.uint32(0xFFFFFFFF)
+
+_WORD = re.compile(r"\w+")
+
+
+def token_hashes(text: str) -> np.ndarray:
+    """crc32 of each lower-cased word, in order."""
+    words = _WORD.findall(text.lower())
+    return np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), np.uint64, len(words))
+
+
+def ngram_hashes(hashes: np.ndarray, n: int) -> np.ndarray:
+    """
+    32-bit hashes of every run of `n` consecutive token hashes, computed as a
+    polynomial roll over shifted views: n vector ops, no per-n-gram tuples.
+    """
+    count = len(hashes) - n + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64)
+    out = hashes[:count].copy()
+    for j in range(1, n):
+        out = (out * _ROLL + hashes[j : j + count]) & _MAX_HASH
+    return out
+
+
+class MinHasher:
+    """
+    MinHash over word shingles. Each permutation is a multiply-add-shift hash
+    ((a·x + b) mod 2⁶⁴) >> 32 with odd a, which needs no modulo by a prime.
+    Signatures from the same seed and sizes are comparable across processes.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = (rng.randint(0, 1 << 64, size=num_perm, dtype=np.uint64) | np.uint64(1))[:, None]
+        self._b = rng.randint(0, 1 << 64, size=num_perm, dtype=np.uint64)[:, None]
+
+    def shingles(self, text: str) -> np.ndarray:
+        hashes = token_hashes(text)
+        # short texts still get a signature, from whatever words they have
+        n = min(self.shingle_size, max(len(hashes), 1))
+        return np.unique(ngram_hashes(hashes, n))
+
+    def signature(self, text: str) -> np.ndarray:
+        return self.signature_from_shingles(self.shingles(text))
+
+    def signature_from_shingles(self, shingles: np.ndarray) -> np.ndarray:
+        sig = np.full(self.num_perm, EMPTY, dtype=np.uint32)
+        with np.errstate(over="ignore"):
+            for start in range(0, len(shingles), BLOCK_SIZE):
+                block = shingles[start : start + BLOCK_SIZE][None, :]
+                permuted = (self._a * block + self._b) >> _SHIFT
+                np.minimum(sig, permuted.min(axis=1).astype(np.uint32), out=sig)
+        return sig
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    if a[0] == EMPTY or b[0] == EMPTY:
+        return 0.0
+    return float(np.mean(a == b))
+
+
+def pairwise_similarity(signatures: List[np.ndarray]) -> np.ndarray:
+    """
+    (N, N) estimated Jaccard matrix. Cost is N² × NUM_PERM integer compares,
+    independent of document length.
+    """
+    sigs = np.vstack(signatures)
+    empty = sigs[:, 0] == EMPTY
+    matrix = np.empty((len(sigs), len(sigs)))
+    for i in range(len(sigs)):
+        matrix[i] = (sigs == sigs[i]).mean(axis=1)
+    matrix[empty, :] = 0.0
+    matrix[:, empty] = 0.0
+    np.fill_diagonal(matrix, 1.0)
+    return matrix
+
+
+default_hasher = MinHasher()
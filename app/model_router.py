@@ -0,0 +1,212 @@
+# app/model_router.py
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app import telemetry
+
+logger = logging.getLogger(__name__)
+
+
+class ModelSpec:
+    """A model we can call: its provider and quality tier (higher is better)."""
+
+    __slots__ = ("name", "provider", "tier")
+
+    def __init__(self, name: str, provider: str, tier: int):
+        self.name = name
+        self.provider = provider
+        self.tier = tier
+
+
+MODELS: Dict[str, ModelSpec] = {
+    spec.name: spec
+    for spec in (
+        ModelSpec("llama-3.2-3b", "venice", 1),
+        ModelSpec("mistral-31-24b", "venice", 2),
+        ModelSpec("llama-3.3-70b", "venice", 3),
+        ModelSpec("llama3-8b-8192", "groq", 1),
+        ModelSpec("llama3-70b-8192", "groq", 3),
+    )
+}
+
+# Task class → lowest acceptable tier
+TASK_CLASSES: Dict[str, int] = {
+    "short_json": 2,  # a few fields or items, as JSON
+    "ranking_list": 1,  # a plain top-N list
+    "long_rewrite": 2,  # rewrites and written answers
+}
+
+# Token budget task (app/token_budget.py) → task class
+TASK_CLASS_OF: Dict[str, str] = {
+    "query_list": "short_json",
+    "topic_gaps": "short_json",
+    "brand_json": "short_json",
+    "ranking_list": "ranking_list",
+    "treatment": "long_rewrite",
+    "answer": "long_rewrite",
+    "generic": "long_rewrite",
+}
+
+# A provider is only routed to when its API key is set
+PROVIDER_KEYS = {"venice": "VENICE_API_KEY", "groq": "GROQ_API_KEY"}
+
+# Per-route overrides, e.g. "GET /brand-chart=llama3-8b-8192;POST /content-lab=llama-3.3-70b"
+MODEL_ROUTES = os.getenv("MODEL_ROUTES", "")
+# Calls remembered per model for its error rate
+HEALTH_WINDOW = 20
+# A model erring on at least this share of its recent calls (and MIN_CALLS of them)
+# is skipped for MODEL_COOLDOWN_SECONDS, then tried again
+MODEL_ERROR_THRESHOLD = float(os.getenv("MODEL_ERROR_THRESHOLD", "0.5"))
+MIN_CALLS = 4
+MODEL_COOLDOWN_SECONDS = float(os.getenv("MODEL_COOLDOWN_SECONDS", "30"))
+# Weight of the newest call in a model's latency average
+LATENCY_ALPHA = 0.2
+# A failed call counts as at least this slow, so a model that only fails sorts
+# after every working one instead of looking unmeasured (and first) again
+FAILURE_LATENCY_SECONDS = 30.0
+# Share of calls sent to a random eligible model, so latencies of the others stay current
+EXPLORE_RATE = 0.05
+
+# "METHOD /path" of the request being served, set by the request middleware
+route_var: ContextVar[Optional[str]] = ContextVar("model_route", default=None)
+
+
+def parse_routes(spec: str) -> Dict[str, str]:
+    routes = {}
+    for item in spec.split(";"):
+        route, _, model = item.partition("=")
+        if route.strip() and model.strip():
+            if model.strip() not in MODELS:
+                logger.warning("Ignoring route override to unknown model %s", model.strip())
+                continue
+            routes[route.strip()] = model.strip()
+    return routes
+
+
+class ModelRouter:
+    """
+    Picks the model for each LLM call: among the models at or above the task
+    class's tier whose provider is configured and which are not cooling
+    down after errors, the one with the lowest recent latency for that task
+    class (failed calls count as FAILURE_LATENCY_SECONDS). Models not yet
+    measured go first, so each gets measured.
+
+    `candidates` returns the whole order, so callers can fail over to the
+    next model; `observe` feeds back each call's latency and outcome.
+    """
+
+    def __init__(
+        self, models: Dict[str, ModelSpec] = MODELS, routes: Optional[Dict[str, str]] = None
+    ):
+        self.models = models
+        self.routes = parse_routes(MODEL_ROUTES) if routes is None else routes
+        self._latency: Dict[Tuple[str, str], float] = {}  # (model, task class) → seconds
+        self._outcomes: Dict[str, Deque[bool]] = {}
+        self._cooldown_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+
+    def _configured(self, spec: ModelSpec) -> bool:
+        return bool(os.getenv(PROVIDER_KEYS.get(spec.provider, ""), ""))
+
+    def _healthy(self, model: str, now: float) -> bool:
+        return self._cooldown_until.get(model, 0.0) <= now
+
+    def candidates(self, task: str, model: Optional[str] = None) -> List[str]:
+        """
+        Models to try for a `task` (a token budget task name), best first.
+        An explicit `model`, or an override for the current route, is used
+        alone. If no model is eligible, every model of the tier is returned,
+        so the call is still attempted and fails in the usual way.
+        """
+        if model is None:
+            model = self.routes.get(route_var.get() or "")
+        if model is not None:
+            return [model]
+        task_class = TASK_CLASS_OF.get(task, "long_rewrite")
+        tier = TASK_CLASSES[task_class]
+        now = time.monotonic()
+        with self._lock:
+            fit = [spec.name for spec in self.models.values() if spec.tier >= tier]
+            eligible = [
+                name
+                for name in fit
+                if self._configured(self.models[name]) and self._healthy(name, now)
+            ]
+            if not eligible:
+                return fit
+            # unmeasured first, then fastest; equal latency prefers the higher tier
+            order = sorted(
+                eligible,
+                key=lambda name: (
+                    self._latency.get((name, task_class), 0.0),
+                    -self.models[name].tier,
+                ),
+            )
+            if len(order) > 1 and self._rng.random() < EXPLORE_RATE:
+                order.insert(0, order.pop(self._rng.randrange(1, len(order))))
+        return order
+
+    def observe(self, model: str, task: str, seconds: float, ok: bool) -> None:
+        task_class = TASK_CLASS_OF.get(task, "long_rewrite")
+        with self._lock:
+            outcomes = self._outcomes.setdefault(model, deque(maxlen=HEALTH_WINDOW))
+            outcomes.append(ok)
+            errors = outcomes.count(False)
+            error_rate = errors / len(outcomes)
+            sample = seconds if ok else max(seconds, FAILURE_LATENCY_SECONDS)
+            key = (model, task_class)
+            old = self._latency.get(key)
+            self._latency[key] = latency = (
+                sample if old is None else (1 - LATENCY_ALPHA) * old + LATENCY_ALPHA * sample
+            )
+            if not ok and errors >= MIN_CALLS and error_rate >= MODEL_ERROR_THRESHOLD:
+                self._cooldown_until[model] = time.monotonic() + MODEL_COOLDOWN_SECONDS
+                logger.warning(
+                    "Model cooling down after errors",
+                    extra={"model": model, "error_rate": round(error_rate, 2)},
+                )
+        telemetry.incr("model_calls", model=model, task_class=task_class, ok=str(ok).lower())
+        telemetry.set_gauge("model_error_rate", error_rate, model=model)
+        telemetry.set_gauge(
+            "model_latency_ms", round(latency * 1000, 1), model=model, task_class=task_class
+        )
+
+    def stats(self) -> Dict[str, Dict]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                name: {
+                    "provider": spec.provider,
+                    "tier": spec.tier,
+                    "configured": self._configured(spec),
+                    "healthy": self._healthy(name, now),
+                    "error_rate": (
+                        round(self._outcomes[name].count(False) / len(self._outcomes[name]), 3)
+                        if self._outcomes.get(name)
+                        else None
+                    ),
+                    "latency_ms": {
+                        task_class: round(seconds * 1000, 1)
+                        for (model, task_class), seconds in self._latency.items()
+                        if model == name
+                    },
+                }
+                for name, spec in self.models.items()
+            }
+
+
+router = ModelRouter()
+
+
+def provider_of(model: str) -> str:
+    spec = MODELS.get(model)
+    # unknown models are assumed to be Venice's, like the original call sites
+    return spec.provider if spec else "venice"
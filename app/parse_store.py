@@ -0,0 +1,209 @@
+# app/parse_store.py
+
+import os
+import mmap
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from app import memory
+
+logger = logging.getLogger(__name__)
+
+PARSE_STORE_DIR = os.getenv("PARSE_STORE_DIR", "data/parse_store")
+# Total size of stored parses; least recently used ones are evicted past it. 0 disables the store.
+PARSE_STORE_MAX_BYTES = int(os.getenv("PARSE_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Shorter texts parse faster than a file round trip
+PARSE_STORE_MIN_CHARS = 500
+
+SUFFIX = ".spacy"
+
+
+def model_version(nlp) -> str:
+    """Everything that changes the parse: model name and version, spaCy version, pipes."""
+    import spacy
+
+    meta = nlp.meta
+    return "{}_{}-{}/spacy-{}/{}".format(
+        meta.get("lang"),
+        meta.get("name"),
+        meta.get("version"),
+        spacy.__version__,
+        ",".join(nlp.pipe_names),
+    )
+
+
+class ParseStore:
+    """
+    spaCy parses on disk, one DocBin file per (text, pass, model version).
+
+    Files are written once (temp file + rename) and memory-mapped when read,
+    so a hit costs a decompress and a `Doc.from_array`, not a pipeline run.
+    Recency is tracked in-process and in file mtimes, which also order the
+    files on the next startup. Worker processes share the directory; each one
+    evicts against what it has seen, so the bound is approximate under
+    concurrent writers.
+    """
+
+    def __init__(self, root: str = PARSE_STORE_DIR, max_bytes: int = PARSE_STORE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()  # key → bytes, oldest first
+        self._total = 0
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._scan()
+
+    def _scan(self) -> None:
+        if not os.path.isdir(self.root):
+            return
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(SUFFIX):
+                    st = os.stat(os.path.join(dirpath, name))
+                    entries.append((st.st_mtime, name[: -len(SUFFIX)], st.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+            self._total += size
+        logger.info("Parse store loaded", extra={"parses": len(self._sizes), "bytes": self._total})
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + SUFFIX)
+
+    def key(self, nlp, kind: str, text: str) -> str:
+        version = self._versions.get(id(nlp))
+        if version is None:
+            version = self._versions[id(nlp)] = model_version(nlp)
+        h = hashlib.sha256()
+        for part in (version, kind, text):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()[:32]
+
+    def _forget(self, key: str) -> None:
+        size = self._sizes.pop(key, None)
+        if size is not None:
+            self._total -= size
+
+    def get(self, key: str, vocab):
+        """The stored Docs for `key`, or None if not stored (or unreadable)."""
+        from spacy.tokens import DocBin
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                docs = list(DocBin().from_bytes(mm).get_docs(vocab))
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            # empty or torn file: drop it and parse again
+            logger.warning("Discarding unreadable parse %s: %s", key, e)
+            with self._lock:
+                self._forget(key)
+            self._remove(path)
+            return None
+
+        with self._lock:
+            if key not in self._sizes:
+                # written by another worker process
+                self._total += size
+            self._sizes[key] = size
+            self._sizes.move_to_end(key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return docs
+
+    def put(self, key: str, docs: List) -> None:
+        from spacy.tokens import DocBin
+
+        data = DocBin(docs=docs).to_bytes()
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._forget(key)
+            self._sizes[key] = len(data)
+            self._total += len(data)
+            evicted = self._evict()
+        for old in evicted:
+            self._remove(self._path(old))
+
+    def _evict(self) -> List[str]:
+        """Drops the least recently used keys past max_bytes; caller holds the lock."""
+        evicted = []
+        while self._total > self.max_bytes and self._sizes:
+            key, size = self._sizes.popitem(last=False)
+            self._total -= size
+            evicted.append(key)
+        return evicted
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get_or_parse(self, nlp, kind: str, text: str, parse: Callable[[], List]) -> List:
+        """
+        Stored Docs for `text` under this pass (`kind`) and model, or the result
+        of `parse()`, which is then stored.
+        """
+        if len(text) < PARSE_STORE_MIN_CHARS:
+            return parse()
+        key = self.key(nlp, kind, text)
+        docs = self.get(key, nlp.vocab)
+        if docs is None:
+            docs = parse()
+            try:
+                self.put(key, docs)
+            except OSError as e:
+                logger.warning("Could not store parse %s: %s", key, e)
+        return docs
+
+
+_store: Optional[ParseStore] = None
+_store_lock = threading.Lock()
+
+
+def get_parse_store() -> Optional[ParseStore]:
+    """The shared store, or None when PARSE_STORE_MAX_BYTES is 0."""
+    global _store
+    if PARSE_STORE_MAX_BYTES <= 0:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ParseStore()
+                memory.register_cache(
+                    "parse_store", lambda: {"entries": len(_store), "bytes": _store.total_bytes}
+                )
+    return _store
+
+
+def parse_cached(nlp, kind: str, text: str, parse: Callable[[], List]) -> List:
+    """`ParseStore.get_or_parse` on the shared store, or just `parse()` when it is disabled."""
+    store = get_parse_store()
+    if store is None:
+        return parse()
+    return store.get_or_parse(nlp, kind, text, parse)
@@ -0,0 +1,153 @@
+# app/pdf_ingest.py
+
+import os
+import re
+import logging
+import itertools
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from app.metrics import DocumentStats, extract_citations_spacy, extract_named_entities
+from app.scoring import compute_scores_from_doc, compute_scores_from_stats
+from app.workers import bounded_imap, get_process_pool
+
+logger = logging.getLogger(__name__)
+
+# Pages per unit of work sent to a pool worker
+PAGES_PER_CHUNK = int(os.getenv("PDF_PAGES_PER_CHUNK", "8"))
+# Documents with fewer pages than this are scored in-process (no pool start-up cost)
+POOL_MIN_PAGES = int(os.getenv("PDF_POOL_MIN_PAGES", "24"))
+
+_TERMINAL = re.compile(r"[.!?:;…\"'”’)\]]\s*$")
+_HYPHEN_BREAK = re.compile(r"(\w)-\n(\w)")
+
+
+def iter_pdf_pages(reader) -> Iterator[Tuple[int, str]]:
+    """
+    Yields (page_number, text) one page at a time from a `pypdf.PdfReader`.
+    pypdf only parses a page's content stream when its text is requested, so
+    pages are never all in memory.
+    """
+    for number, page in enumerate(reader.pages, start=1):
+        try:
+            # layout mode keeps blank lines between blocks, which we use as paragraph breaks
+            text = page.extract_text(extraction_mode="layout")
+        except Exception:
+            text = page.extract_text()
+        yield number, text or ""
+
+
+def _page_paragraphs(text: str) -> List[str]:
+    text = _HYPHEN_BREAK.sub(r"\1\2", text)
+    paras = []
+    for block in re.split(r"\n\s*\n", text):
+        lines = [line.strip() for line in block.splitlines() if line.strip()]
+        if lines:
+            paras.append(" ".join(lines))
+    return paras
+
+
+def iter_paragraphs(pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+    """
+    Yields (page_number, paragraph) in reading order. A paragraph that runs off
+    the bottom of a page mid-sentence is joined with the first paragraph of the
+    next page and attributed to the page where it started.
+    """
+    carry: Optional[Tuple[int, str]] = None
+    for number, text in pages:
+        paras = _page_paragraphs(text)
+        if not paras:
+            continue
+        if carry is not None:
+            start_page, head = carry
+            first = paras[0]
+            if not _TERMINAL.search(head) or first[:1].islower():
+                paras[0] = f"{head} {first}"
+                first_page = start_page
+            else:
+                yield carry
+                first_page = number
+            carry = None
+        else:
+            first_page = number
+        for i, para in enumerate(paras[:-1]):
+            yield (first_page if i == 0 else number), para
+        carry = (first_page if len(paras) == 1 else number, paras[-1])
+    if carry is not None:
+        yield carry
+
+
+def _chunks(
+    paragraphs: Iterable[Tuple[int, str]], pages_per_chunk: int
+) -> Iterator[List[Tuple[int, str]]]:
+    chunk: List[Tuple[int, str]] = []
+    pages: Set[int] = set()
+    for page, para in paragraphs:
+        if page not in pages and len(pages) >= pages_per_chunk:
+            yield chunk
+            chunk, pages = [], set()
+        chunk.append((page, para))
+        pages.add(page)
+    if chunk:
+        yield chunk
+
+
+def score_chunk(
+    chunk: List[Tuple[int, str]],
+) -> Tuple[List[Tuple[int, int, Dict]], Set[str], DocumentStats]:
+    """
+    Worker entry point: (page number, sentence count, page-level scores) per
+    page in the chunk, plus the chunk's named entities and DocumentStats.
+    Sentences and spaCy objects stay in the worker; only counts and the
+    chunk's vocabulary are sent back.
+    """
+    pages = []
+    entities: Set[str] = set()
+    stats = DocumentStats()
+    for page, group in itertools.groupby(chunk, key=lambda item: item[0]):
+        doc = extract_citations_spacy("\n\n".join(para for _, para in group))
+        page_entities = extract_named_entities(doc) if doc else set()
+        pages.append((page, sum(len(p) for p in doc), compute_scores_from_doc(doc, page_entities)))
+        entities |= page_entities
+        stats.merge(DocumentStats.of(doc))
+    return pages, entities, stats
+
+
+def score_pdf(
+    source: Union[str, BinaryIO], use_pool: Optional[bool] = None
+) -> Dict[str, Union[int, List, Dict]]:
+    """
+    Streams a PDF through paragraph reassembly and sentence/citation extraction,
+    and returns per-page and whole-document `compute_scores` output.
+
+    Whole-document scores come from the chunks' merged DocumentStats, so the
+    document's sentences are never held at once, and sourceability uses the
+    union of the per-chunk named entities rather than one NER pass over the
+    entire text.
+    """
+    from pypdf import PdfReader
+
+    reader = PdfReader(source)
+    if use_pool is None:
+        use_pool = len(reader.pages) >= POOL_MIN_PAGES
+
+    chunks = _chunks(iter_paragraphs(iter_pdf_pages(reader)), PAGES_PER_CHUNK)
+    if use_pool:
+        results = (r for _, r in bounded_imap(get_process_pool(), score_chunk, chunks))
+    else:
+        results = map(score_chunk, chunks)
+
+    pages = []
+    entities: Set[str] = set()
+    stats = DocumentStats()
+    for chunk_pages, chunk_entities, chunk_stats in results:
+        for page, sentences, scores in chunk_pages:
+            pages.append({"page": page, "sentences": sentences, "scores": scores})
+        entities |= chunk_entities
+        stats.merge(chunk_stats)
+
+    logger.info("PDF scored", extra={"pages": len(pages), "pooled": use_pool})
+    return {
+        "pages": pages,
+        "page_count": len(pages),
+        "document": compute_scores_from_stats(stats, entities),
+    }
@@ -0,0 +1,251 @@
+# app/profiling.py
+
+import os
+import sys
+import json
+import time
+import hmac
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Profiling is per request and opt-in: an admin sends `X-Profile: 1` with
+# `X-Admin-Token: $PROFILE_ADMIN_TOKEN`, or an allow-listed user adds `?profile=1`.
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN", "")
+PROFILE_ALLOWED_USERS = {
+    u.strip() for u in os.getenv("PROFILE_ALLOWED_USERS", "").split(",") if u.strip()
+}
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# The sampler stops after this long even if the request is still running
+PROFILE_MAX_SECONDS = 120
+# Profiles kept on disk; older ones are deleted when a new one is saved
+PROFILE_KEEP = 200
+
+_active: ContextVar[Optional["Profile"]] = ContextVar("profile", default=None)
+
+
+def is_admin(token: Optional[str]) -> bool:
+    return bool(PROFILE_ADMIN_TOKEN) and hmac.compare_digest(token or "", PROFILE_ADMIN_TOKEN)
+
+
+class Profile:
+    """
+    Sampling profile of one request plus its stage timings.
+
+    A background thread reads `sys._current_frames()` every PROFILE_INTERVAL_MS,
+    but only for the threads currently working on this request: the one that
+    began it, and any thread inside a `stage()` while this profile is active
+    (contextvars follow the request into `run_in_threadpool`). Work for other
+    requests on the same event loop can still show up in its samples.
+    """
+
+    def __init__(self, profile_id: str, label: str, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.id = profile_id
+        self.label = label
+        self.interval = interval_ms / 1000
+        self.start = time.perf_counter()
+        self.elapsed_ms = 0.0
+        self._threads: Dict[int, int] = {}  # thread id → nesting depth
+        self._thread_names: Dict[int, str] = {}
+        self._samples: Dict[int, List[Tuple[tuple, float]]] = defaultdict(list)
+        self._events: Dict[int, List[Tuple[str, str, float]]] = defaultdict(list)
+        self._totals: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._run, name=f"profiler-{profile_id}", daemon=True
+        )
+
+    def _ms(self, t: float) -> float:
+        return (t - self.start) * 1000
+
+    def attach(self) -> None:
+        tid = threading.get_ident()
+        with self._lock:
+            self._threads[tid] = self._threads.get(tid, 0) + 1
+            self._thread_names.setdefault(tid, threading.current_thread().name)
+
+    def detach(self) -> None:
+        tid = threading.get_ident()
+        with self._lock:
+            depth = self._threads.get(tid, 0) - 1
+            if depth > 0:
+                self._threads[tid] = depth
+            else:
+                self._threads.pop(tid, None)
+
+    def begin(self) -> Token:
+        self.attach()
+        self._sampler.start()
+        return _active.set(self)
+
+    def end(self, token: Token) -> None:
+        _active.reset(token)
+        self._stop.set()
+        self._sampler.join()
+        self.detach()
+        self.elapsed_ms = self._ms(time.perf_counter())
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        deadline = last + PROFILE_MAX_SECONDS
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            if now > deadline:
+                break
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads)
+            for tid in threads:
+                frame = frames.get(tid)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                if stack:
+                    self._samples[tid].append((tuple(reversed(stack)), (now - last) * 1000))
+            last = now
+
+    def open(self, name: str) -> float:
+        opened = time.perf_counter()
+        with self._lock:
+            self._events[threading.get_ident()].append(("O", name, self._ms(opened)))
+        return opened
+
+    def close(self, name: str, opened: float) -> None:
+        closed = time.perf_counter()
+        with self._lock:
+            self._events[threading.get_ident()].append(("C", name, self._ms(closed)))
+            total = self._totals[name]
+            total[0] += (closed - opened) * 1000
+            total[1] += 1
+
+    def stage_totals(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {"ms": round(ms, 2), "calls": int(calls)}
+                for name, (ms, calls) in sorted(self._totals.items(), key=lambda kv: -kv[1][0])
+            }
+
+    def server_timing(self) -> str:
+        """Stage totals as a Server-Timing header value."""
+        parts = [f"{name};dur={t['ms']}" for name, t in self.stage_totals().items()]
+        return ", ".join(parts + [f"total;dur={self.elapsed_ms:.2f}"])
+
+    def to_speedscope(self) -> Dict:
+        """
+        One sampled profile per thread, plus one evented profile per thread
+        for the stages, in speedscope's file format (https://www.speedscope.app).
+        """
+        frames: List[Dict] = []
+        index: Dict[tuple, int] = {}
+
+        def frame_id(key: tuple) -> int:
+            if key not in index:
+                index[key] = len(frames)
+                name, file, line = key
+                frames.append({"name": name, "file": file, "line": line})
+            return index[key]
+
+        profiles = []
+        with self._lock:
+            samples = dict(self._samples)
+            events = dict(self._events)
+        for tid, rows in samples.items():
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": f"samples ({self._thread_names.get(tid, tid)})",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": self.elapsed_ms,
+                    "samples": [[frame_id(key) for key in stack] for stack, _ in rows],
+                    "weights": [round(weight, 3) for _, weight in rows],
+                }
+            )
+        for tid, rows in events.items():
+            profiles.append(
+                {
+                    "type": "evented",
+                    "name": f"stages ({self._thread_names.get(tid, tid)})",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": self.elapsed_ms,
+                    "events": [
+                        {"type": kind, "frame": frame_id((name, "", 0)), "at": round(at, 3)}
+                        for kind, name, at in rows
+                    ],
+                }
+            )
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.label,
+            "exporter": "ranklab",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+            "stages": self.stage_totals(),
+        }
+
+    def save(self, directory: str = PROFILE_DIR) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.id}.speedscope.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_speedscope(), f, separators=(",", ":"))
+        _prune(directory)
+        logger.info("Profile saved", extra={"profile_id": self.id, "label": self.label})
+        return path
+
+
+def _prune(directory: str, keep: int = PROFILE_KEEP) -> None:
+    names = [n for n in os.listdir(directory) if n.endswith(".speedscope.json")]
+    if len(names) <= keep:
+        return
+    paths = sorted((os.path.join(directory, n) for n in names), key=os.path.getmtime)
+    for path in paths[: len(paths) - keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def profile_path(profile_id: str, directory: str = PROFILE_DIR) -> str:
+    return os.path.join(directory, f"{profile_id}.speedscope.json")
+
+
+@contextmanager
+def stage(name: str):
+    """Times a block into the active profile; a contextvar lookup when there is none."""
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    profile.attach()
+    opened = profile.open(name)
+    try:
+        yield
+    finally:
+        profile.close(name, opened)
+        profile.detach()
+
+
+def run_pipeline(nlp, text: str, disable: Sequence[str] = ()):
+    """
+    `nlp(text, disable=...)`, but component by component, each as a
+    `spacy.<name>` stage, when the request is being profiled.
+    """
+    if _active.get() is None:
+        return nlp(text, disable=list(disable))
+    with stage("spacy.tokenizer"):
+        doc = nlp.make_doc(text)
+    for name, component in nlp.pipeline:
+        if name not in disable:
+            with stage(f"spacy.{name}"):
+                doc = component(doc)
+    return doc
@@ -1,14 +1,12 @@
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Union
 from dotenv import load_dotenv
-from openai import OpenAI
-import os
+import logging
+
+from app.intent_classifier import IntentClassifier, default_classifier
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("VENICE_API_KEY"),
-    base_url=os.getenv("LLM_BASE_URL", "https://api.venice.ai/api/v1"),
-)
+logger = logging.getLogger(__name__)
 
 # Prompt template to find related queries
 QUERY_SEARCH_PROMPT = """
@@ -53,7 +51,7 @@ def extract_related_queries(topic: str) -> List[str]:
     try:
         from app.generations import generate_venice_response
 
-        raw_output = generate_venice_response(prompt)
+        raw_output = generate_venice_response(prompt, task="query_list")
         # Try to parse JSON
         if isinstance(raw_output, list):
             return raw_output[:5]
@@ -64,7 +62,7 @@ def extract_related_queries(topic: str) -> List[str]:
         else:
             raise ValueError("Unexpected output format from LLM")
     except Exception as e:
-        print(f"Error extracting queries: {e}")
+        logger.warning("Error extracting queries: %s", e)
         # Fallback to defaults
         return [
             f"How do I start a blog?",
@@ -77,18 +75,18 @@ def extract_related_queries(topic: str) -> List[str]:
 
 # Classify query intent
 def classify_query_intent(query: str) -> str:
-    info_keywords = ["what", "how", "why", "explain"]
-    nav_keywords = ["where", "contact", "login", "support"]
-    trans_keywords = ["buy", "price", "order", "download"]
-    query = query.lower()
-    if any(word in query for word in info_keywords):
-        return "Informational"
-    elif any(word in query for word in nav_keywords):
-        return "Navigational"
-    elif any(word in query for word in trans_keywords):
-        return "Transactional"
-    else:
-        return "Unknown"
+    return default_classifier.classify(query)
+
+
+def classify_query_intents(
+    queries: List[str], intents: Optional[Dict[str, List[str]]] = None
+) -> List[str]:
+    """
+    Classify a batch of queries in one pass. `intents` maps label → keywords
+    (in priority order) to override the default dictionaries.
+    """
+    classifier = default_classifier if intents is None else IntentClassifier(intents)
+    return classifier.classify_many(queries)
 
 
 # Detect missing topics
@@ -102,7 +100,7 @@ def detect_topic_gaps(topics: List[str]) -> List[Dict[str, Union[str, int]]]:
     try:
         # format topics as markdown unordered list
         topics_md = "\n".join(f"- {t}" for t in topics)
-        raw = generate_venice_response(TOPIC_COV_PROMPT.format(topics=topics_md))
+        raw = generate_venice_response(TOPIC_COV_PROMPT.format(topics=topics_md), task="topic_gaps")
         # Clean markdown if needed
         if isinstance(raw, str):
             cleaned = raw.strip().replace("```json", "").replace("```", "")
@@ -110,7 +108,7 @@ def detect_topic_gaps(topics: List[str]) -> List[Dict[str, Union[str, int]]]:
         elif isinstance(raw, list):
             return raw
     except Exception as e:
-        print(f"Error detecting topic gaps: {e}")
+        logger.warning("Error detecting topic gaps: %s", e)
 
     # Fallback static topics
     return [
@@ -121,7 +119,11 @@ def detect_topic_gaps(topics: List[str]) -> List[Dict[str, Union[str, int]]]:
 
 
 # Main function used by FastAPI
-def run_query_research_on_topic(topic: str, source_count: int = 5) -> Dict[str, Union[str, List]]:
+def run_query_research_on_topic(
+    topic: str,
+    source_count: int = 5,
+    intents: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, Union[str, List]]:
     """
     Simplified: generate related queries and intents based on the single topic.
     """
@@ -129,7 +131,7 @@ def run_query_research_on_topic(topic: str, source_count: int = 5) -> Dict[str,
     queries = extract_related_queries(topic)
 
     # Classify each query's intent
-    intent_labels = [classify_query_intent(q) for q in queries]
+    intent_labels = classify_query_intents(queries, intents)
 
     # Determine average intent (most frequent)
     avg_intent = max(set(intent_labels), key=intent_labels.count) if intent_labels else "Unknown"
@@ -0,0 +1,123 @@
+# app/redundancy.py
+
+import itertools
+import zlib
+import numpy as np
+from typing import Dict, List, Sequence
+
+from app.metrics import Doc
+from app.minhash import ngram_hashes
+
+DEFAULT_NS = (1, 2, 3, 4, 5)
+# Same token filter as overall_uniqueness: lower-cased, longer than two characters
+MIN_TOKEN_LEN = 3
+
+
+class RedundancyProfile:
+    """
+    Repetition statistics for one document, from hashed n-grams.
+
+    Tokens are hashed once (crc32); every n-gram size is then a rolling hash
+    over shifted views of that one array, and counting is a single
+    `np.unique` per n. Nothing is materialized per n-gram beyond one
+    integer, so memory stays a small multiple of the token count.
+    """
+
+    def __init__(
+        self, doc: Doc, ns: Sequence[int] = DEFAULT_NS, min_token_len: int = MIN_TOKEN_LEN
+    ):
+        self.sentences: List[str] = []
+        tokens: List[str] = []
+        lengths: List[int] = []
+        for sent_tokens, text, _ in itertools.chain(*doc):
+            kept = [t.lower() for t in sent_tokens if len(t) >= min_token_len]
+            self.sentences.append(text)
+            tokens.extend(kept)
+            lengths.append(len(kept))
+        self.tokens = tokens
+        self.hashes = np.fromiter(
+            (zlib.crc32(t.encode("utf-8")) for t in tokens), np.uint64, len(tokens)
+        )
+        # sentence index of every token; an n-gram belongs to the sentence it starts in
+        self.token_sentence = np.repeat(np.arange(len(lengths)), lengths)
+        self.ns = tuple(ns)
+        self._counts: Dict[int, tuple] = {}
+
+    def _count(self, n: int):
+        """(hashes, inverse, counts) for the n-grams, computed once per n."""
+        if n not in self._counts:
+            grams = ngram_hashes(self.hashes, n)
+            if len(grams):
+                _, inverse, counts = np.unique(grams, return_inverse=True, return_counts=True)
+            else:
+                inverse = counts = np.empty(0, dtype=np.int64)
+            self._counts[n] = (grams, inverse, counts)
+        return self._counts[n]
+
+    def stats(self, n: int) -> Dict[str, float]:
+        """
+        total and distinct n-grams; `repeated_share` is the fraction of
+        occurrences that repeat an earlier one; `top_share` is the most
+        frequent n-gram's share of all occurrences (the trigram penalty
+        overall_uniqueness applies).
+        """
+        grams, _, counts = self._count(n)
+        total = len(grams)
+        if not total:
+            return {"total": 0, "distinct": 0, "repeated_share": 0.0, "top_share": 0.0}
+        return {
+            "total": total,
+            "distinct": len(counts),
+            "repeated_share": float(1 - len(counts) / total),
+            "top_share": float(counts.max() / total),
+        }
+
+    def profile(self) -> Dict[int, Dict[str, float]]:
+        return {n: {key: round(value, 4) for key, value in self.stats(n).items()} for n in self.ns}
+
+    def repeated_phrases(self, n: int, k: int = 5) -> List[Dict]:
+        """Most repeated n-grams, as text, with their counts."""
+        grams, inverse, counts = self._count(n)
+        if not len(grams):
+            return []
+        # first position of each distinct n-gram, to recover its words
+        first = np.full(len(counts), len(grams), dtype=np.int64)
+        np.minimum.at(first, inverse, np.arange(len(grams)))
+        top = np.argsort(-counts, kind="stable")[:k]
+        return [
+            {"phrase": " ".join(self.tokens[first[i] : first[i] + n]), "count": int(counts[i])}
+            for i in top
+            if counts[i] > 1
+        ]
+
+    def sentence_attribution(self, n: int = 3, k: int = 5) -> List[Dict]:
+        """
+        Sentences starting the most repeated n-gram occurrences: for each, how
+        many of its n-grams occur elsewhere in the document too.
+        """
+        grams, inverse, counts = self._count(n)
+        if not len(grams):
+            return []
+        repeated = counts[inverse] > 1
+        owners = self.token_sentence[: len(grams)]
+        per_sentence = np.bincount(owners[repeated], minlength=len(self.sentences))
+        per_sentence_total = np.bincount(owners, minlength=len(self.sentences))
+        top = np.argsort(-per_sentence, kind="stable")[:k]
+        return [
+            {
+                "sentence": int(i),
+                "text": self.sentences[i],
+                "repeated_ngrams": int(per_sentence[i]),
+                "share": round(float(per_sentence[i] / per_sentence_total[i]), 3),
+            }
+            for i in top
+            if per_sentence[i] > 0
+        ]
+
+    def report(self, attribution_n: int = 3, k: int = 5) -> Dict:
+        return {
+            "tokens": len(self.tokens),
+            "profile": self.profile(),
+            "repeated_phrases": {n: self.repeated_phrases(n, k) for n in self.ns if n > 1},
+            "sentences": self.sentence_attribution(attribution_n, k),
+        }
@@ -1,24 +1,82 @@
 # app/scoring.py
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Set
 from .metrics import (
+    SPACY_MODEL,
+    Doc,
+    DocumentStats,
     extract_citations_spacy,
     overall_authoritativeness,
     overall_sourceability,
     overall_uniqueness,
 )
+from .cancellation import check
+from .profiling import stage
+from .shared_cache import cached
 
+# Bump when a metric changes, so results cached by earlier code are not served
+SCORES_VERSION = 1
 
-def compute_scores(text: str, normalize: bool = True) -> Dict[str, float]:
+# "full" runs the spaCy pipeline; "lite" uses the regex splitter and tokenizer
+# in app.lite_nlp, for drafts and bulk triage where speed beats exact scores
+ANALYSIS_MODES = ("full", "lite")
+
+
+def _score_lite(text: str) -> Dict[str, float]:
+    from .lite_nlp import extract_citations_lite, extract_named_entities_lite
+
+    with stage("metrics.extract_citations_lite"):
+        doc = extract_citations_lite(text)
+    return compute_scores_from_doc(doc, extract_named_entities_lite(doc))
+
+
+def compute_scores(text: str, normalize: bool = True, mode: str = "full") -> Dict[str, float]:
     """
     Compute new RankLab metrics for whole-document content:
     - Authoritativeness
     - Source-ability
     - Uniqueness
     """
-    doc = extract_citations_spacy(text)
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Unknown analysis mode {mode!r}; expected one of {ANALYSIS_MODES}")
+    if mode == "lite":
+        # about as cheap as a shared cache round trip, so not cached
+        return _score_lite(text)
+    return cached(
+        "scores",
+        f"{SCORES_VERSION}:{SPACY_MODEL}:{text}",
+        lambda: compute_scores_from_doc(extract_citations_spacy(text)),
+    )
+
+
+def compute_scores_from_doc(
+    doc: Doc, named_entities: Optional[Set[str]] = None
+) -> Dict[str, float]:
+    """
+    Same metrics as `compute_scores`, for a document that is already split into
+    sentences (and optionally has its named entities extracted).
+    """
+    check()
+    with stage("metrics.authoritativeness"):
+        authoritativeness = overall_authoritativeness(doc)
+    with stage("metrics.sourceability"):
+        sourceability = overall_sourceability(doc, named_entities)
+    check()
+    with stage("metrics.uniqueness"):
+        uniqueness = overall_uniqueness(doc)
+    return _as_scores(authoritativeness, sourceability, uniqueness)
+
+
+def compute_scores_from_stats(stats: DocumentStats, named_entities: Set[str]) -> Dict[str, float]:
+    """Same metrics as `compute_scores`, from the running totals of a document read in pieces."""
+    return _as_scores(*stats.scores(named_entities))
+
+
+def _as_scores(
+    authoritativeness: float, sourceability: float, uniqueness: float
+) -> Dict[str, float]:
     return {
-        "Authoritativeness": round(overall_authoritativeness(doc) * 100, 2),
-        "Source-ability": round(overall_sourceability(doc) * 100, 2),
-        "Uniqueness": round(overall_uniqueness(doc) * 100, 2),
+        "Authoritativeness": round(authoritativeness * 100, 2),
+        "Source-ability": round(sourceability * 100, 2),
+        "Uniqueness": round(uniqueness * 100, 2),
     }
@@ -0,0 +1,235 @@
+# app/shared_cache.py
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Union
+
+from app import memory, telemetry
+
+logger = logging.getLogger(__name__)
+
+# One SQLite file (WAL mode) shared by every uvicorn worker and pool process
+# on the host. Empty disables the cache: get_or_compute just computes.
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "data/shared_cache.sqlite3")
+SHARED_CACHE_MAX_ENTRIES = int(os.getenv("SHARED_CACHE_MAX_ENTRIES", "100000"))
+# How long another process may hold a key's compute lease before waiters take over
+LEASE_SECONDS = float(os.getenv("SHARED_CACHE_LEASE_SECONDS", "60"))
+# Expired rows are pruned (and the entry cap applied) every this many writes
+PRUNE_EVERY = 500
+
+Ttl = Union[None, float, Callable[[Any], Optional[float]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    ns TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires REAL,
+    PRIMARY KEY (ns, key)
+);
+CREATE TABLE IF NOT EXISTS leases (
+    ns TEXT NOT NULL,
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+);
+"""
+
+
+def _digest(key: str) -> str:
+    """Keys are stored hashed: they may be whole documents, prompts or ID tokens."""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class SharedCache:
+    """
+    Cross-process cache of JSON-serializable values, by (namespace, key).
+
+    `get_or_compute` is atomic across processes: the first caller for a
+    missing key takes a lease row (inside a write transaction, so exactly
+    one process gets it) and computes; the others poll until the value
+    lands, or take over if the lease expires because its owner died.
+    SQLite errors never fail the caller; they fall back to computing.
+    """
+
+    def __init__(self, path: str = SHARED_CACHE_PATH, max_entries: int = SHARED_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread, and never one inherited across a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        row = (
+            self._conn()
+            .execute(
+                "SELECT value, expires FROM entries WHERE ns = ? AND key = ?",
+                (namespace, _digest(key)),
+            )
+            .fetchone()
+        )
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Stores `value`; a ttl of 0 or less stores nothing."""
+        if ttl is not None and ttl <= 0:
+            return
+        expires = time.time() + ttl if ttl is not None else None
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (ns, key, value, expires) VALUES (?, ?, ?, ?)",
+            (namespace, _digest(key), json.dumps(value, separators=(",", ":")), expires),
+        )
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self.prune()
+
+    def size(self) -> Dict[str, int]:
+        entries = self._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        files = (self.path, self.path + "-wal")
+        return {
+            "entries": entries,
+            "bytes": sum(os.path.getsize(f) for f in files if os.path.exists(f)),
+        }
+
+    def prune(self) -> None:
+        """Drops expired rows, then the oldest entries past max_entries."""
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (now,))
+            conn.execute("DELETE FROM leases WHERE expires <= ?", (now,))
+            conn.execute(
+                "DELETE FROM entries WHERE rowid IN "
+                "(SELECT rowid FROM entries ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def _acquire(self, namespace: str, key: str, owner: str) -> bool:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM leases WHERE ns = ? AND key = ? AND expires <= ?",
+                (namespace, _digest(key), now),
+            )
+            acquired = (
+                conn.execute(
+                    "INSERT OR IGNORE INTO leases (ns, key, owner, expires) VALUES (?, ?, ?, ?)",
+                    (namespace, _digest(key), owner, now + LEASE_SECONDS),
+                ).rowcount
+                == 1
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return acquired
+
+    def _release(self, namespace: str, key: str, owner: str) -> None:
+        # only our own lease: if it expired and another caller took over, theirs stays
+        self._conn().execute(
+            "DELETE FROM leases WHERE ns = ? AND key = ? AND owner = ?",
+            (namespace, _digest(key), owner),
+        )
+
+    def get_or_compute(
+        self, namespace: str, key: str, compute: Callable[[], Any], ttl: Ttl = None
+    ) -> Any:
+        """
+        The cached value, or `compute()` run by exactly one process across the
+        host. `ttl` is seconds, None for no expiry, or a function of the
+        computed value (so e.g. auth claims can expire with the token; a
+        result of 0 or less is returned but not stored).
+        """
+        try:
+            value = self.get(namespace, key)
+            if value is not None:
+                telemetry.incr("shared_cache_hits", namespace=namespace)
+                return value
+            delay = 0.005
+            # a token per call: a caller whose lease expired must not release its successor's
+            owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+            # an expired lease (owner died) or a released one that stored nothing is taken over
+            while not self._acquire(namespace, key, owner):
+                telemetry.incr("shared_cache_waits", namespace=namespace)
+                time.sleep(delay)
+                delay = min(delay * 2, 0.2)
+                value = self.get(namespace, key)
+                if value is not None:
+                    telemetry.incr("shared_cache_hits", namespace=namespace)
+                    return value
+            # the previous owner may have stored it and released between our read and the lease
+            value = self.get(namespace, key)
+        except sqlite3.Error as e:
+            logger.warning("Shared cache unavailable: %s", e, extra={"namespace": namespace})
+            return compute()
+
+        try:
+            if value is not None:
+                telemetry.incr("shared_cache_hits", namespace=namespace)
+                return value
+            telemetry.incr("shared_cache_misses", namespace=namespace)
+            value = compute()
+            try:
+                self.set(namespace, key, value, ttl(value) if callable(ttl) else ttl)
+            except sqlite3.Error as e:
+                logger.warning("Shared cache write failed: %s", e, extra={"namespace": namespace})
+            return value
+        finally:
+            try:
+                self._release(namespace, key, owner)
+            except sqlite3.Error:
+                pass  # the lease expires on its own
+
+
+_cache: Optional[SharedCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """The host-wide cache, or None when SHARED_CACHE_PATH is empty."""
+    global _cache
+    if not SHARED_CACHE_PATH:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SharedCache()
+                memory.register_cache("shared_cache", _cache.size)
+    return _cache
+
+
+def cached(namespace: str, key: str, compute: Callable[[], Any], ttl: Ttl = None) -> Any:
+    """`SharedCache.get_or_compute` on the host-wide cache, or just `compute()` without one."""
+    try:
+        cache = get_shared_cache()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Shared cache unavailable: %s", e)
+        cache = None
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(namespace, key, compute, ttl)
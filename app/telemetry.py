@@ -0,0 +1,47 @@
+# app/telemetry.py
+
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+# In-process counters and gauges, keyed by (name, sorted label pairs).
+# Exposed as JSON by the /metrics route in app/main.py.
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Tuple], float] = defaultdict(float)
+_gauges: Dict[Tuple[str, Tuple], float] = {}
+
+
+def _key(name: str, labels: Dict[str, str]) -> Tuple[str, Tuple]:
+    return name, tuple(sorted(labels.items()))
+
+
+def incr(name: str, value: float = 1.0, **labels) -> None:
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def snapshot() -> Dict[str, list]:
+    """
+    Returns {"counters": [...], "gauges": [...]} with one entry per label set.
+    """
+    with _lock:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in _counters.items()
+        ]
+        gauges = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in _gauges.items()
+        ]
+    return {"counters": counters, "gauges": gauges}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
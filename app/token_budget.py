@@ -0,0 +1,235 @@
+# app/token_budget.py
+
+import os
+import re
+import math
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app import telemetry
+
+logger = logging.getLogger(__name__)
+
+# Context windows of the models we call; prompts that cannot fit with room
+# for a minimal reply are rejected before any network call.
+MODEL_CONTEXT: Dict[str, int] = {
+    "mistral-31-24b": 131_072,
+    "llama-3.3-70b": 65_536,
+    "llama-3.2-3b": 131_072,
+    "llama3-70b-8192": 8_192,
+    "llama3-8b-8192": 8_192,
+}
+DEFAULT_CONTEXT = 8_192
+
+# Largest reply ever requested, whatever the statistics say
+MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "4096"))
+MIN_OUTPUT_TOKENS = 64
+# max_tokens is this much above the p95 of observed replies for the task
+OUTPUT_HEADROOM = 1.25
+# Observed replies kept per task; statistics are used once there are MIN_SAMPLES
+SAMPLE_WINDOW = 200
+MIN_SAMPLES = 20
+
+
+class TaskBudget:
+    """
+    Output sizing for one kind of LLM call. `default` is the reply size (in
+    tokens, or as a multiple of the content for `proportional` tasks such as
+    rewrites) used until enough replies have been observed. `max_prompt`
+    caps the prompt whatever the model could take.
+    """
+
+    __slots__ = ("default", "proportional", "max_prompt")
+
+    def __init__(self, default: float, proportional: bool = False, max_prompt: int = 16_000):
+        self.default = default
+        self.proportional = proportional
+        self.max_prompt = max_prompt
+
+
+TASKS: Dict[str, TaskBudget] = {
+    # rewrites of a content chunk: about as long as the chunk, plus the insertion
+    "treatment": TaskBudget(1.6, proportional=True, max_prompt=4_000),
+    # five questions as a JSON array
+    "query_list": TaskBudget(200, max_prompt=1_000),
+    # five topics with scores as JSON
+    "topic_gaps": TaskBudget(300, max_prompt=4_000),
+    # one brand's description/offerings/criticisms/alternatives as JSON
+    "brand_json": TaskBudget(600, max_prompt=1_000),
+    # a top-10 list
+    "ranking_list": TaskBudget(300, max_prompt=1_000),
+    # an answer written from search results
+    "answer": TaskBudget(1024, max_prompt=48_000),
+    "generic": TaskBudget(1024),
+}
+
+# Words, numbers, single punctuation marks and runs of whitespace; long words are
+# several BPE tokens, roughly one per six characters.
+_PIECES = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]|\s+")
+
+
+class PromptTooLarge(ValueError):
+    """The prompt does not fit the task's or the model's budget."""
+
+
+def count_tokens(text: str) -> int:
+    """
+    Local estimate of a prompt's tokens for the Llama/Mistral tokenizers,
+    before the per-model correction in `TokenBudgeter`.
+    """
+    tokens = 0
+    for m in _PIECES.finditer(text):
+        piece = m.group()
+        if piece[0].isspace():
+            # a single space is merged into the next word; newlines and indents are not
+            tokens += piece.count("\n")
+        else:
+            tokens += 1 + (len(piece) - 1) // 6
+    return tokens
+
+
+class Budget:
+    __slots__ = ("task", "model", "counted", "prompt_tokens", "content_tokens", "max_tokens")
+
+    def __init__(
+        self,
+        task: str,
+        model: str,
+        counted: int,
+        prompt_tokens: int,
+        content_tokens: int,
+        max_tokens: int,
+    ):
+        self.task = task
+        self.model = model
+        self.counted = counted  # local count, before the model's correction
+        self.prompt_tokens = prompt_tokens
+        self.content_tokens = content_tokens
+        self.max_tokens = max_tokens
+
+
+class TokenBudgeter:
+    """
+    Counts prompt tokens locally and picks `max_tokens` per task from the
+    replies seen so far. After each call, `record` compares the prediction
+    with the usage the API reports: a per-model ratio corrects the local
+    count, and the reply length feeds the task's statistics.
+    """
+
+    def __init__(self, tasks: Dict[str, TaskBudget] = TASKS):
+        self.tasks = tasks
+        self._outputs: Dict[str, Deque[float]] = {}
+        self._ratio: Dict[str, float] = {}  # model → actual / estimated prompt tokens
+        self._lock = threading.Lock()
+
+    def estimate(self, model: str, text: str, counted: Optional[int] = None) -> int:
+        if counted is None:
+            counted = count_tokens(text)
+        return math.ceil(counted * self._ratio.get(model, 1.0))
+
+    def _output_tokens(self, task: str, content_tokens: int) -> int:
+        spec = self.tasks.get(task) or self.tasks["generic"]
+        with self._lock:
+            samples = sorted(self._outputs.get(task, ()))
+        if len(samples) >= MIN_SAMPLES:
+            expected = samples[int(0.95 * (len(samples) - 1))] * OUTPUT_HEADROOM
+        else:
+            expected = spec.default
+        if spec.proportional:
+            expected *= max(content_tokens, 1)
+        return int(min(max(expected, MIN_OUTPUT_TOKENS), MAX_OUTPUT_TOKENS))
+
+    def plan(self, task: str, model: str, prompt: str, content: Optional[str] = None) -> Budget:
+        """
+        Budget for one call. `content` is the part of the prompt a proportional
+        task's reply scales with (the whole prompt if omitted). Raises
+        PromptTooLarge, before any network call, when the prompt is over the
+        task's limit or leaves no room for a reply in the model's context.
+        """
+        spec = self.tasks.get(task) or self.tasks["generic"]
+        counted = count_tokens(prompt)
+        prompt_tokens = self.estimate(model, prompt, counted)
+        content_tokens = self.estimate(model, content) if content is not None else prompt_tokens
+        context = MODEL_CONTEXT.get(model, DEFAULT_CONTEXT)
+        if prompt_tokens > spec.max_prompt or prompt_tokens + MIN_OUTPUT_TOKENS > context:
+            telemetry.incr("llm_budget_rejected", task=task, model=model)
+            raise PromptTooLarge(
+                f"Prompt too long for {task} (~{prompt_tokens} tokens, "
+                f"limit {min(spec.max_prompt, context - MIN_OUTPUT_TOKENS)})"
+            )
+        max_tokens = min(self._output_tokens(task, content_tokens), context - prompt_tokens)
+        return Budget(task, model, counted, prompt_tokens, content_tokens, max_tokens)
+
+    def record(
+        self,
+        budget: Budget,
+        prompt_tokens: Optional[int],
+        completion_tokens: Optional[int],
+        finish_reason: Optional[str] = None,
+    ) -> None:
+        """Predicted vs actual usage for one call, from the API's `usage` block."""
+        labels = {"task": budget.task, "model": budget.model}
+        telemetry.incr("llm_prompt_tokens_predicted", budget.prompt_tokens, **labels)
+        telemetry.incr("llm_max_tokens_reserved", budget.max_tokens, **labels)
+        if finish_reason == "length":
+            telemetry.incr("llm_replies_truncated", **labels)
+            logger.warning(
+                "LLM reply hit max_tokens", extra={**labels, "max_tokens": budget.max_tokens}
+            )
+        if prompt_tokens:
+            telemetry.incr("llm_prompt_tokens_actual", prompt_tokens, **labels)
+            with self._lock:
+                # slow-moving average, so one odd prompt does not swing the correction
+                ratio = prompt_tokens / max(budget.counted, 1)
+                old = self._ratio.get(budget.model)
+                self._ratio[budget.model] = ratio if old is None else 0.9 * old + 0.1 * ratio
+        if completion_tokens is None:
+            return
+        telemetry.incr("llm_completion_tokens", completion_tokens, **labels)
+        spec = self.tasks.get(budget.task) or self.tasks["generic"]
+        value = (
+            completion_tokens / max(budget.content_tokens, 1)
+            if spec.proportional
+            else completion_tokens
+        )
+        if finish_reason == "length":
+            # a truncated reply only says the real length was larger; count it double
+            value *= 2
+        with self._lock:
+            self._outputs.setdefault(budget.task, deque(maxlen=SAMPLE_WINDOW)).append(value)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            outputs = {task: sorted(samples) for task, samples in self._outputs.items()}
+            ratios = dict(self._ratio)
+        return {
+            "prompt_correction": {model: round(r, 3) for model, r in ratios.items()},
+            "outputs": {
+                task: {
+                    "samples": len(s),
+                    "p50": round(s[len(s) // 2], 3),
+                    "p95": round(s[int(0.95 * (len(s) - 1))], 3),
+                }
+                for task, s in outputs.items()
+                if s
+            },
+        }
+
+
+budgeter = TokenBudgeter()
+
+
+def plan(task: str, model: str, prompt: str, content: Optional[str] = None) -> Budget:
+    return budgeter.plan(task, model, prompt, content)
+
+
+def record(budget: Budget, usage, finish_reason: Optional[str] = None) -> None:
+    """`TokenBudgeter.record` from an OpenAI-style usage object or dict (or None)."""
+    if isinstance(usage, dict):
+        prompt, completion = usage.get("prompt_tokens"), usage.get("completion_tokens")
+    else:
+        prompt = getattr(usage, "prompt_tokens", None)
+        completion = getattr(usage, "completion_tokens", None)
+    budgeter.record(budget, prompt, completion, finish_reason)
@@ -1,8 +1,11 @@
 from typing import List, Dict, Union
 from collections import Counter
 import random
+import logging
 from app.metrics import extract_citations_spacy, impression_wordpos_count_simple_spacy
 
+logger = logging.getLogger(__name__)
+
 
 # Mock function to simulate related queries from LLM
 def extract_related_queries(topic: str, model: str = "llama-3.2-3b") -> List[str]:
@@ -57,7 +60,7 @@ def calculate_citation_scores(content: str) -> List[float]:
         raw = impression_wordpos_count_simple_spacy(doc, n=n, normalize=True)
         return [round(s * 100, 2) for s in raw]
     except Exception as e:
-        print(f"[!] Error calculating citation scores: {e}")
+        logger.warning("Error calculating citation scores: %s", e)
         # fallback mock
         return [round(random.uniform(50, 90), 2) for _ in range(5)]
 
@@ -95,48 +98,46 @@ def get_source_distribution(topic: str) -> Dict[str, int]:
 
 # Main predictor function used by FastAPI route
 def predict_llm_traffic(
-    content: str, topic: str, num_queries: int = 5
+    content: str,
+    topic: str,
+    num_queries: int = 5,
 ) -> Dict[str, Union[str, int, float, List]]:
     """
     Predicts how much AI-driven traffic a piece of content could receive
     Returns structured data for visualization in Jinja2 template
     """
     # Step 1: Extract related queries based on topic
-    queries = extract_related_queries(topic, model="llama-3.2-3b")
+    queries = extract_related_queries(topic, model="llama-3.2-3b")[:num_queries]
 
     # Step 2: Use content citations to estimate visibility
-    scores = calculate_citation_scores(content)
+    citation_scores = calculate_citation_scores(content)
 
     # Step 3: Get source distribution (for pie chart)
     source_distribution = get_source_distribution(topic)
 
-    # Step 4: Estimate total citations
-    estimated_monthly_citations = sum(scores)
+    # Step 4: Monte Carlo estimate of monthly citations across the queries
+    from app.traffic_simulation import simulate_citations
+
+    sim = simulate_citations(citation_scores, queries, content)
+    scores = sim["per_query_probability"]
 
-    # Step 5: Find top query
-    top_query_index = scores.index(max(scores)) if scores else 0
-    top_query = queries[top_query_index] if top_query_index < len(queries) else "N/A"
+    # Step 5: Find top query by expected citations
+    expected = sim["per_query_expected"]
+    top_query = queries[expected.index(max(expected))] if expected else "N/A"
 
     # Return structured data for frontend
     return {
         "topic": topic,
-        "queries": queries[:num_queries],
-        "scores": scores[:num_queries],
+        "queries": queries,
+        "scores": scores,
+        "citation_scores": citation_scores,
         "source_labels": list(source_distribution.keys()),
         "source_values": list(source_distribution.values()),
-        "visibility_trend": generate_mock_trend(scores),
-        "estimated_monthly_citations": estimated_monthly_citations,
+        "visibility_trend": sim["trend"],
+        "visibility_trend_low": sim["trend_low"],
+        "visibility_trend_high": sim["trend_high"],
+        "estimated_monthly_citations": sim["expected_monthly_citations"],
+        "citations_ci": [sim["ci_low"], sim["ci_high"]],
+        "simulation_trials": sim["trials"],
         "top_query": top_query,
     }
-
-
-# Helper: Generate mock trend data for line graph
-def generate_mock_trend(scores: List[float]) -> List[int]:
-    base_score = sum(scores)
-    trend_data = [
-        int(base_score * 0.6),
-        int(base_score * 0.8),
-        int(base_score * 0.95),
-        int(base_score * 1.0),
-    ]
-    return trend_data
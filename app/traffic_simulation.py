@@ -0,0 +1,155 @@
+# app/traffic_simulation.py
+
+import re
+import zlib
+import numpy as np
+from typing import Dict, List, Optional
+
+# Demand prior per query: monthly LLM-search volume ~ Gamma(mean, dispersion).
+# Dispersion is the Gamma shape; lower means heavier-tailed demand.
+DEFAULT_DEMAND_PRIOR = {"mean": 1000.0, "dispersion": 2.0}
+
+# Fraction of LLM answers for a query that cite *some* web source at all
+ANSWER_CITATION_RATE = {"alpha": 6.0, "beta": 4.0}  # mean 0.6
+
+# Base chance that our page is among the cited sources, before content strength/relevance
+BASE_CITATION_SHARE = 0.08
+
+# Beta concentration for per-query citation probability (higher = more certain)
+CITATION_CONCENTRATION = 40.0
+
+# Weeks until a new page reaches steady-state visibility: log-normal around ~2 weeks
+INDEXING_LAG_WEEKS = {"median": 2.0, "sigma": 0.5}
+
+DEFAULT_TRIALS = 20_000
+# trials × queries cells per batch; keeps peak memory to a few MB per array
+MAX_CELLS_PER_BATCH = 500_000
+# Interactive budget: trials are capped so trials × queries stays under this
+# (~0.15s of sampling), but never below MIN_TRIALS. The cap depends only on
+# the input, so the same input always gives the same numbers.
+MAX_SIMULATION_CELLS = 1_000_000
+MIN_TRIALS = 1_000
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOP = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "for", "on", "is", "are", "do",
+    "does", "i", "my", "what", "how", "why", "with", "vs", "can", "should", "will",
+}  # fmt: skip
+
+
+def _terms(text: str) -> set:
+    return {w for w in _WORD.findall(text.lower()) if w not in _STOP and len(w) > 2}
+
+
+def query_relevance(queries: List[str], content: str) -> np.ndarray:
+    """
+    Fraction of each query's content words that appear in the content, in [0, 1].
+    """
+    content_terms = _terms(content)
+    rel = []
+    for q in queries:
+        q_terms = _terms(q)
+        rel.append(len(q_terms & content_terms) / len(q_terms) if q_terms else 0.0)
+    return np.asarray(rel, dtype=np.float64)
+
+
+def content_strength(citation_scores: List[float]) -> float:
+    """
+    Maps `calculate_citation_scores` output (percent shares per citation) to [0, 1].
+    More citations spread evenly reads as better-sourced content; a single
+    citation or none is weak evidence.
+    """
+    shares = np.asarray(citation_scores, dtype=np.float64)
+    shares = shares[shares > 0]
+    if shares.size == 0:
+        return 0.0
+    p = shares / shares.sum()
+    # effective number of citations (inverse Simpson index), saturating at 5
+    effective = 1.0 / np.square(p).sum()
+    return float(min(effective / 5.0, 1.0))
+
+
+def citation_probabilities(relevance: np.ndarray, strength: float) -> np.ndarray:
+    """Mean per-query probability that our page is cited in an answer."""
+    p = BASE_CITATION_SHARE * (0.5 + strength) * (0.25 + 1.5 * relevance)
+    return np.clip(p, 1e-4, 0.95)
+
+
+def simulate_citations(
+    citation_scores: List[float],
+    queries: List[str],
+    content: str,
+    demand_priors: Optional[Dict[str, Dict[str, float]]] = None,
+    trials: int = DEFAULT_TRIALS,
+    weeks: int = 4,
+    seed: Optional[int] = None,
+) -> Dict[str, object]:
+    """
+    Monte Carlo estimate of monthly AI citations for `content` across `queries`.
+
+    Each trial draws, per query: expected monthly demand (Gamma), the answer
+    citation rate (Beta), our citation probability (Beta around the
+    relevance/strength mean), then citations ~ Poisson(demand * rate * p) —
+    Poisson thinning of the query arrivals, so one draw per cell instead of
+    chained binomials. All trials for a batch are drawn at once as
+    (trials, queries) arrays. Returns means, 90% intervals and the number of
+    trials run (fewer than `trials` for many queries; see MAX_SIMULATION_CELLS).
+    `demand_priors` maps a query to a partial prior over DEFAULT_DEMAND_PRIOR.
+    """
+    if not queries:
+        raise ValueError("At least one query is required for simulation")
+
+    demand_priors = demand_priors or {}
+    n_q = len(queries)
+    priors = [{**DEFAULT_DEMAND_PRIOR, **demand_priors.get(q, {})} for q in queries]
+    means = np.array([prior["mean"] for prior in priors], dtype=np.float64)
+    shapes = np.array([prior["dispersion"] for prior in priors], dtype=np.float64)
+    relevance = query_relevance(queries, content)
+    p_mean = citation_probabilities(relevance, content_strength(citation_scores))
+    p_alpha = p_mean * CITATION_CONCENTRATION
+    p_beta = (1 - p_mean) * CITATION_CONCENTRATION
+
+    if seed is None:
+        # Stable for the same input, so re-submitting a form doesn't jitter the numbers
+        seed = zlib.crc32(("\x00".join(queries) + "\x01" + content).encode("utf-8"))
+    rng = np.random.default_rng(seed)
+
+    trials = min(trials, max(MIN_TRIALS, MAX_SIMULATION_CELLS // n_q))
+    batch = max(1, min(trials, MAX_CELLS_PER_BATCH // n_q))
+    totals, per_query_sum, lags = [], np.zeros(n_q), []
+    done = 0
+    while done < trials:
+        size = min(batch, trials - done)
+        demand = rng.gamma(shapes, means / shapes, size=(size, n_q))
+        answer_rate = rng.beta(
+            ANSWER_CITATION_RATE["alpha"], ANSWER_CITATION_RATE["beta"], size=(size, 1)
+        )
+        cited = rng.poisson(demand * answer_rate * rng.beta(p_alpha, p_beta, size=(size, n_q)))
+        totals.append(cited.sum(axis=1))
+        per_query_sum += cited.sum(axis=0)
+        lags.append(
+            rng.lognormal(np.log(INDEXING_LAG_WEEKS["median"]), INDEXING_LAG_WEEKS["sigma"], size)
+        )
+        done += size
+
+    monthly = np.concatenate(totals).astype(np.float64)
+    lag = np.concatenate(lags)
+
+    # Weekly trend: steady-state weekly volume ramped by 1 - exp(-t / lag)
+    t = np.arange(1, weeks + 1, dtype=np.float64)
+    ramp = 1.0 - np.exp(-t[None, :] / lag[:, None])
+    weekly = (monthly[:, None] / weeks) * ramp
+    lo, hi = np.percentile(monthly, [5, 95])
+    weekly_lo, weekly_hi = np.percentile(weekly, [5, 95], axis=0)
+
+    return {
+        "trials": int(done),
+        "expected_monthly_citations": round(float(monthly.mean()), 1),
+        "ci_low": round(float(lo), 1),
+        "ci_high": round(float(hi), 1),
+        "per_query_expected": [round(float(x), 1) for x in per_query_sum / done],
+        "per_query_probability": [round(float(x) * 100, 2) for x in p_mean],
+        "trend": [round(float(x), 1) for x in weekly.mean(axis=0)],
+        "trend_low": [round(float(x), 1) for x in weekly_lo],
+        "trend_high": [round(float(x), 1) for x in weekly_hi],
+    }
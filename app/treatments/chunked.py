@@ -0,0 +1,146 @@
+# treatments/chunked.py
+
+import os
+import re
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+from app import telemetry
+from app.lite_nlp import split_sentences
+from app.token_budget import count_tokens
+from app.treatments.apply import apply_treatment
+
+logger = logging.getLogger(__name__)
+
+# Content tokens per chunk. The reply is about as long as its chunk plus what the
+# treatment adds, so replies stay short and chunks finish at similar times.
+TREATMENT_CHUNK_TOKENS = int(os.getenv("TREATMENT_CHUNK_TOKENS", "600"))
+# Chunks sent at once; latency is that of the slowest chunk while chunks <= this
+TREATMENT_MAX_PARALLEL = int(os.getenv("TREATMENT_MAX_PARALLEL", "16"))
+
+_MARKER = re.compile(r"\[(\d+)\]")
+_FENCE = re.compile(r"^\s*```[\w-]*\n(.*?)\n?```\s*$", re.DOTALL)
+
+
+def split_chunks(content: str, max_tokens: int = TREATMENT_CHUNK_TOKENS) -> List[str]:
+    """
+    Packs whole paragraphs into chunks of at most `max_tokens`. A paragraph
+    longer than that is split between sentences; a single sentence longer
+    than that becomes a chunk of its own.
+    """
+    pieces: List[str] = []  # paragraphs, or sentence runs of a long paragraph
+    for para in (p.strip() for p in content.split("\n\n")):
+        if not para:
+            continue
+        if count_tokens(para) <= max_tokens:
+            pieces.append(para)
+            continue
+        run: List[str] = []
+        for sentence in split_sentences(para):
+            if run and count_tokens(" ".join(run + [sentence])) > max_tokens:
+                pieces.append(" ".join(run))
+                run = []
+            run.append(sentence)
+        if run:
+            pieces.append(" ".join(run))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    for piece in pieces:
+        if current and count_tokens("\n\n".join(current + [piece])) > max_tokens:
+            chunks.append("\n\n".join(current))
+            current = []
+        current.append(piece)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _strip_fence(reply: str) -> str:
+    # the keyword treatment asks for its output in triple backticks
+    m = _FENCE.match(reply)
+    return m.group(1).strip() if m else reply.strip()
+
+
+def renumber_citations(originals: List[str], replies: List[str]) -> List[str]:
+    """
+    Makes citation markers consistent across independently treated chunks.
+
+    A marker a reply shares with its own original chunk is an existing
+    citation and is kept as is. Any other marker is one the model added;
+    each chunk numbers those from wherever it likes, so they are given new
+    numbers after the highest existing one, in reading order, with repeats
+    of the same number inside one reply mapping to the same new number.
+    """
+    existing = {int(n) for chunk in originals for n in _MARKER.findall(chunk)}
+    next_number = max(existing, default=0) + 1
+    renumbered = []
+    for original, reply in zip(originals, replies):
+        kept: Set[int] = {int(n) for n in _MARKER.findall(original)}
+        added: Dict[int, int] = {}
+
+        def _replace(m: re.Match) -> str:
+            nonlocal next_number
+            n = int(m.group(1))
+            if n in kept:
+                return m.group(0)
+            if n not in added:
+                added[n] = next_number
+                next_number += 1
+            return f"[{added[n]}]"
+
+        renumbered.append(_MARKER.sub(_replace, reply))
+    return renumbered
+
+
+def _generate(prompt: str, content: str) -> str:
+    from app.generations import generate_venice_response
+
+    return generate_venice_response(prompt, task="treatment", content=content)
+
+
+def treat_content(
+    method: str,
+    content: str,
+    generate: Optional[Callable[[str, str], str]] = None,
+    max_tokens: int = TREATMENT_CHUNK_TOKENS,
+) -> str:
+    """
+    Applies a treatment to content of any length: the treatment prompt runs
+    on each chunk concurrently, and the replies are joined back in order
+    with their citation markers renumbered. A chunk whose reply comes back
+    empty (the LLM call failed) keeps its original text.
+
+    `generate(prompt, content)` makes the LLM call; by default the Venice
+    model, with `max_tokens` budgeted from the chunk's length. Raises
+    ValueError for an unknown method, like `apply_treatment`, and
+    PromptTooLarge for a single sentence too long to treat.
+    """
+    if generate is None:
+        generate = _generate
+
+    chunks = split_chunks(content, max_tokens)
+    if len(chunks) <= 1:
+        return generate(apply_treatment(method, content), content)
+    prompts = [apply_treatment(method, chunk) for chunk in chunks]
+
+    telemetry.incr("treatment_chunks", len(chunks), method=method)
+    with ThreadPoolExecutor(max_workers=min(TREATMENT_MAX_PARALLEL, len(prompts))) as pool:
+        # one context copy per call, so each thread runs inside the request's stages
+        futures = [
+            pool.submit(contextvars.copy_context().run, generate, prompt, chunk)
+            for prompt, chunk in zip(prompts, chunks)
+        ]
+        replies = [f.result() for f in futures]
+
+    treated = []
+    for i, (chunk, reply) in enumerate(zip(chunks, replies)):
+        reply = _strip_fence(reply or "")
+        if not reply:
+            logger.warning("Treatment chunk failed; keeping it as is", extra={"chunk": i})
+            telemetry.incr("treatment_chunks_failed", method=method)
+            reply = chunk
+        treated.append(reply)
+    return "\n\n".join(renumber_citations(chunks, treated))
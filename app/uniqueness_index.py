@@ -0,0 +1,175 @@
+# app/uniqueness_index.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app import memory
+from app.minhash import EMPTY, NUM_PERM, default_hasher
+
+logger = logging.getLogger(__name__)
+
+UNIQUENESS_INDEX_PATH = os.getenv("UNIQUENESS_INDEX_PATH", "data/uniqueness_index.jsonl")
+
+# 32 bands × 4 rows: pairs at ~38% overlap become candidates about half the
+# time, pairs at 60%+ almost always, and pairs under 15% almost never. Overlap
+# that LSH misses is low enough that corpus uniqueness barely moves.
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+# Candidates scoring below this estimated overlap are not reported
+MIN_OVERLAP = 0.1
+
+
+def document_id(text: str) -> str:
+    """Whitespace-insensitive content hash, so re-analyzing a page does not add it twice."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()[:24]
+
+
+class UniquenessIndex:
+    """
+    MinHash-LSH index over every analyzed document.
+
+    Each signature is cut into LSH_BANDS bands; documents sharing any band
+    land in the same bucket, so a query only compares against the few
+    documents in its buckets instead of the whole corpus. Additions are
+    appended to a JSONL log, and the buckets are rebuilt from it on load.
+
+    Each worker process holds its own copy in memory and picks up what
+    other workers appended to the log before every query. Only content
+    hashes and signatures are stored, never text, since the index is
+    shared by every user.
+    """
+
+    def __init__(self, path: str = UNIQUENESS_INDEX_PATH):
+        self.path = path
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._offset = 0  # bytes of the log already read
+        self._buckets: List[Dict[bytes, List[str]]] = [defaultdict(list) for _ in range(LSH_BANDS)]
+        self._lock = threading.Lock()
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._signatures
+
+    @staticmethod
+    def _bands(signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in signature.reshape(LSH_BANDS, LSH_ROWS)]
+
+    def _insert(self, doc_id: str, signature: np.ndarray) -> None:
+        self._signatures[doc_id] = signature
+        for band, key in enumerate(self._bands(signature)):
+            self._buckets[band][key].append(doc_id)
+
+    def _refresh(self) -> None:
+        """Reads entries appended to the log since the last read; call with the lock held."""
+        try:
+            if os.path.getsize(self.path) <= self._offset:
+                return
+        except OSError:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # still being written by another worker; read it next time
+                    break
+                self._offset += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # torn write from a crash; the document will be re-added when next analyzed
+                    continue
+                if entry["id"] not in self._signatures:
+                    self._insert(entry["id"], np.array(entry["sig"], dtype=np.uint32))
+
+    def load(self) -> None:
+        with self._lock:
+            self._refresh()
+        logger.info("Uniqueness index loaded", extra={"documents": len(self)})
+
+    def nearest(
+        self, signature: np.ndarray, k: int = 5, exclude: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """Up to k (doc_id, estimated overlap) of the most similar indexed documents."""
+        with self._lock:
+            self._refresh()
+            candidates = set()
+            for band, key in enumerate(self._bands(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            candidates.discard(exclude)
+            scored = [
+                (doc_id, float(np.mean(self._signatures[doc_id] == signature)))
+                for doc_id in candidates
+            ]
+        scored = [hit for hit in scored if hit[1] >= MIN_OVERLAP]
+        scored.sort(key=lambda hit: hit[1], reverse=True)
+        return scored[:k]
+
+    def add(self, doc_id: str, signature: np.ndarray) -> bool:
+        """Indexes a document; returns False if it was already indexed."""
+        with self._lock:
+            if doc_id in self._signatures:
+                return False
+            self._insert(doc_id, signature)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            entry = {"id": doc_id, "sig": signature.tolist(), "added": time.time()}
+            line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+            with open(self.path, "ab") as f:
+                start = f.tell()
+                f.write(line)
+                f.flush()
+                if start == self._offset and f.tell() == start + len(line):
+                    # nothing else was appended in between, so there is nothing to read back
+                    self._offset = f.tell()
+        return True
+
+    def check(self, text: str, k: int = 5, add: bool = True) -> Dict:
+        """
+        Nearest existing documents for `text` (content hashes only) and its
+        corpus uniqueness (100 minus the overlap % with the closest one),
+        then indexes it.
+        """
+        doc_id = document_id(text)
+        signature = default_hasher.signature(text)
+        if signature[0] == EMPTY:
+            # no words to shingle: nothing to compare or index
+            return {"corpus_uniqueness": 100.0, "nearest": [], "indexed_documents": len(self)}
+        hits = self.nearest(signature, k, exclude=doc_id)
+        closest = hits[0][1] if hits else 0.0
+        if add:
+            self.add(doc_id, signature)
+        return {
+            "corpus_uniqueness": round(100 * (1 - closest), 2),
+            "nearest": [
+                {"id": hit_id, "overlap": round(100 * overlap, 1)} for hit_id, overlap in hits
+            ],
+            "indexed_documents": len(self),
+        }
+
+
+_index: Optional[UniquenessIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> UniquenessIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = UniquenessIndex()
+                memory.register_cache(
+                    "uniqueness_index",
+                    lambda: {"entries": len(_index), "bytes": len(_index) * NUM_PERM * 4},
+                )
+    return _index
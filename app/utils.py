@@ -1,12 +1,11 @@
-import openai
+import time
 from os import getenv
 from dotenv import load_dotenv
 from firebase_admin import auth as firebase_auth
 
-load_dotenv()
+from app.shared_cache import cached
 
-# API Keys
-openai.api_key = getenv("OPENAI_API_KEY")
+load_dotenv()
 
 # Firebase JS SDK Config (for injection into login.html)
 FIREBASE_JS_CONFIG = {
@@ -27,9 +26,18 @@ def analyze_content(content: str) -> str:
     return f"Scoring analysis: [placeholder result for: '{content[:60]}...']"
 
 
+# Verified claims are shared across workers until the token expires (at most this long)
+AUTH_CACHE_TTL = float(getenv("AUTH_CACHE_TTL", "300"))
+
+
 # Firebase session helpers
 def verify_firebase_token(token: str):
-    return firebase_auth.verify_id_token(token)
+    return cached(
+        "auth",
+        token,
+        lambda: firebase_auth.verify_id_token(token),
+        ttl=lambda claims: min(claims.get("exp", 0) - time.time(), AUTH_CACHE_TTL),
+    )
 
 
 def get_current_user(token: str):
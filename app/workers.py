@@ -0,0 +1,82 @@
+# app/workers.py
+
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# One process pool for all CPU-bound batch work (PDF pages, site audits, ...),
+# so each worker process loads the spaCy model once and is shared across features.
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", str(min(4, os.cpu_count() or 1))))
+# Items in flight per worker; bounds memory held by queued work and results
+MAX_PENDING_PER_WORKER = 2
+# Workers start from a clean interpreter rather than a fork of the server, which
+# by then runs the log listener, warm-up and audit threads (and holds their locks)
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from app.logging_config import configure_logging
+
+                _pool = ProcessPoolExecutor(
+                    max_workers=WORKER_PROCESSES,
+                    mp_context=multiprocessing.get_context(START_METHOD),
+                    initializer=configure_logging,
+                )
+                atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def bounded_imap(
+    executor: Executor,
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    max_pending: Optional[int] = None,
+    ordered: bool = True,
+) -> Iterator[Tuple[T, R]]:
+    """
+    Like `executor.map`, but pulls from `items` lazily and keeps at most
+    `max_pending` tasks in flight, so a huge (or generated) input never gets
+    materialized. Yields (item, result); in input order unless `ordered=False`.
+    Exceptions from `fn` are re-raised when their result is reached.
+    """
+    if max_pending is None:
+        max_pending = WORKER_PROCESSES * MAX_PENDING_PER_WORKER
+    pending = {}
+    finished_results = {}
+    next_index = 0
+    submitted = 0
+
+    def _drain(block_until: int):
+        nonlocal next_index
+        while len(pending) > block_until:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, item = pending.pop(future)
+                if ordered:
+                    finished_results[index] = (item, future)
+                else:
+                    yield item, future.result()
+            while ordered and next_index in finished_results:
+                item, future = finished_results.pop(next_index)
+                next_index += 1
+                yield item, future.result()
+
+    for item in items:
+        pending[executor.submit(fn, item)] = (submitted, item)
+        submitted += 1
+        if len(pending) >= max_pending:
+            yield from _drain(max_pending - 1)
+    yield from _drain(0)
@@ -0,0 +1,72 @@
+"""
+Multi-query citation scoring vs calling the per-query metrics in a loop.
+
+    python -m benchmarks.bench_citation_scoring [num_queries]
+
+Scores one cited document against synthetic queries both ways. Exits
+non-zero if the batch path is not at least 5x faster, or if any score
+differs from metric_authoritativeness / metric_sourceability by more than
+rounding.
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from app import metrics
+from app.citation_scoring import CitedDocument
+
+MIN_SPEEDUP = 5.0
+TOLERANCE = 1e-3
+
+VOCAB = (
+    "solar energy panels cost install roof battery storage grid price efficiency "
+    "warranty subsidy inverter home power the of and is a"
+).split()
+
+
+def make_document(rng: random.Random, paragraphs: int = 40) -> str:
+    paras = []
+    for _ in range(paragraphs):
+        sents = []
+        for _ in range(4):
+            words = " ".join(rng.choice(VOCAB) for _ in range(rng.randint(5, 20)))
+            cites = "".join(f" [{rng.randint(1, 8)}]" for _ in range(rng.randint(0, 2)))
+            sents.append(words + cites + ".")
+        paras.append(" ".join(sents))
+    return "\n\n".join(paras)
+
+
+def main(num_queries: int = 300) -> int:
+    rng = random.Random(0)
+    doc = metrics.extract_citations_spacy(make_document(rng))
+    queries = [
+        " ".join(rng.choice(VOCAB + ["what", "how", "much"]) for _ in range(rng.randint(2, 6)))
+        for _ in range(num_queries)
+    ]
+
+    start = time.perf_counter()
+    cited = CitedDocument(doc)
+    batch = cited.score(queries)
+    batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    authoritativeness = [metrics.metric_authoritativeness(doc, q, cited.n) for q in queries]
+    sourceability = [metrics.metric_sourceability(doc, q, cited.n) for q in queries]
+    loop_s = time.perf_counter() - start
+
+    error = max(
+        float(np.abs(np.array(authoritativeness) - batch["authoritativeness"]).max()),
+        float(np.abs(np.array(sourceability) - batch["sourceability"]).max()),
+    )
+    speedup = loop_s / batch_s
+    print(f"{num_queries} queries × {cited.n} citations")
+    print(f"batch: {batch_s:.3f}s   per-query loop: {loop_s:.3f}s   ({speedup:.1f}x)")
+    print(f"max abs difference: {error:.5f}")
+    return 0 if speedup >= MIN_SPEEDUP and error <= TOLERANCE else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(a) for a in sys.argv[1:2]]))
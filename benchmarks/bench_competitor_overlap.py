@@ -0,0 +1,63 @@
+"""
+Overlap benchmark for competitor analysis: MinHash signatures vs exact
+pairwise shingle-set Jaccard.
+
+    python -m benchmarks.bench_competitor_overlap [num_competitors] [words_per_page]
+
+Exits non-zero if MinHash overlap for all pairs takes longer than 1s, or if
+its estimates are off from the exact Jaccard similarity by more than 0.05
+on average.
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from app.minhash import default_hasher, pairwise_similarity
+
+BUDGET_S = 1.0
+MAX_MEAN_ERROR = 0.05
+
+
+def make_pages(n: int, words: int, seed: int = 0):
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(4000)]
+    base = [rng.choice(vocab) for _ in range(words)]
+    pages = []
+    for _ in range(n):
+        # each page copies a random share of a common source, like syndicated content
+        keep = rng.random()
+        pages.append(" ".join(w if rng.random() < keep else rng.choice(vocab) for w in base))
+    return pages
+
+
+def main(n: int = 60, words: int = 2000) -> int:
+    pages = make_pages(n + 1, words)
+
+    start = time.perf_counter()
+    sigs = [default_hasher.signature(page) for page in pages]
+    estimated = pairwise_similarity(sigs)
+    minhash_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sets = [set(default_hasher.shingles(page).tolist()) for page in pages]
+    exact = np.eye(len(sets))
+    for i in range(len(sets)):
+        for j in range(i + 1, len(sets)):
+            union = len(sets[i] | sets[j])
+            exact[i, j] = exact[j, i] = len(sets[i] & sets[j]) / union if union else 0.0
+    exact_s = time.perf_counter() - start
+
+    errors = np.abs(estimated - exact)
+    mean_error, max_error = float(errors.mean()), float(errors.max())
+    print(f"{n} competitors × {words} words")
+    print(f"minhash: {minhash_s:.3f}s   exact sets: {exact_s:.3f}s")
+    print(f"abs error: mean {mean_error:.3f}, max {max_error:.3f}")
+    return 0 if minhash_s <= BUDGET_S and mean_error <= MAX_MEAN_ERROR else 1
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    sys.exit(main(*args))
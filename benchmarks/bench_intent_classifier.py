@@ -0,0 +1,46 @@
+"""
+Throughput benchmark for the batch intent classifier.
+
+    python -m benchmarks.bench_intent_classifier [num_queries]
+
+Exits non-zero if throughput on one core falls below 1M queries/minute.
+"""
+
+import random
+import sys
+import time
+
+from app.intent_classifier import IntentClassifier
+
+TARGET_PER_MINUTE = 1_000_000
+
+WORDS = [
+    "however", "blog", "seo", "best", "tools", "guide", "price", "what", "how", "login",
+    "download", "support", "compare", "ranklab", "content", "ai", "search", "where", "for",
+]  # fmt: skip
+
+
+def make_queries(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(3, 9))) for _ in range(n)]
+
+
+def main(n: int = 1_000_000) -> int:
+    queries = make_queries(n)
+    classifier = IntentClassifier()
+
+    start = time.perf_counter()
+    labels = classifier.classify_many(queries)
+    elapsed = time.perf_counter() - start
+    rate = n / elapsed * 60
+
+    counts = {}
+    for label in labels:
+        counts[label] = counts.get(label, 0) + 1
+    print(f"classified {n:,} queries in {elapsed:.2f}s → {rate:,.0f} queries/minute")
+    print(f"label counts: {counts}")
+    return 0 if rate >= TARGET_PER_MINUTE else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
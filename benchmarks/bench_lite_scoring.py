@@ -0,0 +1,154 @@
+"""
+Lite (regex) analysis vs the spaCy path: speed and accuracy.
+
+    python -m benchmarks.bench_lite_scoring [num_documents]
+
+Scores synthetic documents both ways, with the parse store and shared cache
+out of the way, and reports:
+
+- time per document for each path and the speedup;
+- sentence boundary and token agreement (F1 against the spaCy output);
+- citation agreement per sentence;
+- per-metric mean and max absolute difference, in score points, and the
+  Spearman rank correlation across documents (what triage relies on).
+
+Exits non-zero if lite is not at least MIN_SPEEDUP faster, or if its
+Authoritativeness or Uniqueness scores drift past MAX_MEAN_DIFF points on
+average. Source-ability is reported only: lite mode swaps spaCy NER for a
+capitalization heuristic.
+"""
+
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Sequence
+
+from app import lite_nlp, metrics, parse_store
+from app.scoring import compute_scores_from_doc
+
+MIN_SPEEDUP = 10.0
+MAX_MEAN_DIFF = {"Authoritativeness": 2.0, "Uniqueness": 2.0}
+
+SENTENCES = [
+    "Solar panels cost between $15,000 and $25,000 to install in 2024 [1].",
+    "According to NREL, residential efficiency has improved by 3.5% a year.",
+    "Dr. Smith from Stanford University didn't expect prices to fall so fast.",
+    "It's the inverter, not the panels, that usually fails first [2].",
+    "Tesla's Powerwall stores 13.5 kWh, enough for most U.S. homes overnight.",
+    "See https://www.energy.gov/solar for the federal tax credit details.",
+    "Battery storage (e.g. lithium-iron-phosphate) adds 10-15 years of life.",
+    "Why do installers recommend south-facing roofs?",
+    "Because they get the most sun... at least in the northern hemisphere!",
+    "The grid operator in California pays less for exported power since April.",
+    "Most warranties cover 25 years; some cover 30 [3][4].",
+    "Homeowners we've interviewed said they'd do it again.",
+    "Net metering rules vary by state, so check with your utility first.",
+    "Prices fell 40% between 2014 and 2024, per the IEA's annual report [5].",
+    "A well-designed system pays for itself in 7 to 10 years.",
+    "Mr. Lopez installed a 6 kW array on his garage in Austin, Texas.",
+    "Shading from trees can cut output by half.",
+    "Microinverters cost more, but they're easier to monitor.",
+]
+
+
+def make_document(rng: random.Random) -> str:
+    paragraphs = []
+    for _ in range(rng.randint(3, 12)):
+        sentences = rng.sample(SENTENCES, rng.randint(2, 6))
+        paragraphs.append(" ".join(sentences))
+    return "\n\n".join(paragraphs)
+
+
+def score_full(text: str) -> Dict[str, float]:
+    doc = metrics.extract_citations_spacy(text)
+    return compute_scores_from_doc(doc, metrics.extract_named_entities(doc))
+
+
+def score_lite(text: str) -> Dict[str, float]:
+    doc = lite_nlp.extract_citations_lite(text)
+    return compute_scores_from_doc(doc, lite_nlp.extract_named_entities_lite(doc))
+
+
+def f1(found: Counter, expected: Counter) -> float:
+    hits = sum((found & expected).values())
+    total = sum(found.values()) + sum(expected.values())
+    return 2 * hits / total if total else 1.0
+
+
+def ranks(values: Sequence[float]) -> List[float]:
+    order = sorted(range(len(values)), key=values.__getitem__)
+    result = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            result[order[k]] = (i + j) / 2
+        i = j + 1
+    return result
+
+
+def spearman(a: Sequence[float], b: Sequence[float]) -> float:
+    ra, rb = ranks(a), ranks(b)
+    n = len(a)
+    ma, mb = sum(ra) / n, sum(rb) / n
+    cov = sum((x - ma) * (y - mb) for x, y in zip(ra, rb))
+    var = (sum((x - ma) ** 2 for x in ra) * sum((y - mb) ** 2 for y in rb)) ** 0.5
+    return cov / var if var else 1.0
+
+
+def main(n: int = 200) -> int:
+    rng = random.Random(0)
+    texts = [make_document(rng) for _ in range(n)]
+    parse_store.PARSE_STORE_MAX_BYTES = 0  # measure the pipeline, not the store
+    metrics.warm_up()
+    score_lite(texts[0])
+
+    start = time.perf_counter()
+    full = [score_full(text) for text in texts]
+    full_s = time.perf_counter() - start
+    start = time.perf_counter()
+    lite = [score_lite(text) for text in texts]
+    lite_s = time.perf_counter() - start
+
+    sent_f1, tok_f1, cite_ok, cite_total = [], [], 0, 0
+    for text in texts:
+        expected = [s for para in metrics.extract_citations_spacy(text) for s in para]
+        found = [s for para in lite_nlp.extract_citations_lite(text) for s in para]
+        sent_f1.append(f1(Counter(s[1] for s in found), Counter(s[1] for s in expected)))
+        tok_f1.append(
+            f1(
+                Counter(t for s in found for t in s[0]),
+                Counter(t for s in expected for t in s[0]),
+            )
+        )
+        found_cites = Counter((s[1], tuple(s[2])) for s in found)
+        for s in expected:
+            cite_total += 1
+            if found_cites[(s[1], tuple(s[2]))] > 0:
+                found_cites[(s[1], tuple(s[2]))] -= 1
+                cite_ok += 1
+
+    speedup = full_s / lite_s
+    print(f"{n} documents, model: {parse_store.model_version(metrics.get_nlp())}")
+    print(f"spaCy: {full_s / n * 1000:.2f}ms/doc   lite: {lite_s / n * 1000:.3f}ms/doc")
+    print(f"speedup: {speedup:.1f}x")
+    print(f"sentence F1: {sum(sent_f1) / n:.3f}   token F1: {sum(tok_f1) / n:.3f}")
+    print(f"citations matching per sentence: {cite_ok}/{cite_total}")
+    print(f"{'metric':<20}{'mean |diff|':>12}{'max |diff|':>12}{'spearman':>10}")
+    ok = speedup >= MIN_SPEEDUP
+    for name in full[0]:
+        a = [row[name] for row in full]
+        b = [row[name] for row in lite]
+        diffs = [abs(x - y) for x, y in zip(a, b)]
+        mean = sum(diffs) / n
+        print(f"{name:<20}{mean:>12.2f}{max(diffs):>12.2f}{spearman(a, b):>10.3f}")
+        if mean > MAX_MEAN_DIFF.get(name, float("inf")):
+            ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(a) for a in sys.argv[1:2]]))
@@ -0,0 +1,76 @@
+"""
+Parse store hit vs running the spaCy pipeline again.
+
+    python -m benchmarks.bench_parse_store [num_documents]
+
+Parses synthetic documents into a temporary store, reloads the store as a
+fresh process would, and parses them again from disk. Exits non-zero if a
+stored parse is not at least 2x faster than the pipeline, if reloaded
+output differs, or if the store ends up over its byte budget.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app import metrics, parse_store
+
+MIN_SPEEDUP = 2.0
+MAX_BYTES = 2 * 1024 * 1024
+
+VOCAB = (
+    "Solar energy panels cost install roof battery storage grid price efficiency warranty "
+    "Tesla subsidy inverter home power the of and is a 2024 according to NREL data"
+).split()
+
+
+def make_document(rng: random.Random, paragraphs: int = 20) -> str:
+    return "\n\n".join(
+        " ".join(
+            " ".join(rng.choice(VOCAB) for _ in range(rng.randint(8, 25)))
+            + f" [{rng.randint(1, 5)}]."
+            for _ in range(5)
+        )
+        for _ in range(paragraphs)
+    )
+
+
+def main(n: int = 50) -> int:
+    rng = random.Random(0)
+    texts = [make_document(rng) for _ in range(n)]
+    nlp = metrics.get_nlp()
+    root = tempfile.mkdtemp()
+
+    parse_store._store = parse_store.ParseStore(root, MAX_BYTES)
+    start = time.perf_counter()
+    parsed = [metrics.extract_citations_spacy(text) for text in texts]
+    parse_s = time.perf_counter() - start
+
+    parse_store._store = store = parse_store.ParseStore(root, MAX_BYTES)
+    stored = len(store)
+    start = time.perf_counter()
+    reloaded = [metrics.extract_citations_spacy(text) for text in texts[-stored:]]
+    hit_s = time.perf_counter() - start
+
+    on_disk = sum(
+        os.path.getsize(os.path.join(dirpath, name))
+        for dirpath, _, names in os.walk(root)
+        for name in names
+    )
+    speedup = (parse_s / n) / (hit_s / max(stored, 1))
+    print(f"model: {parse_store.model_version(nlp)}")
+    print(
+        f"{n} documents, {stored} kept in {on_disk / 1024:.0f} KiB (budget {MAX_BYTES >> 10} KiB)"
+    )
+    print(
+        f"pipeline: {parse_s / n * 1000:.2f}ms/doc   stored: {hit_s / max(stored, 1) * 1000:.2f}ms/doc"
+    )
+    print(f"speedup: {speedup:.1f}x")
+    ok = reloaded == parsed[-stored:] and on_disk <= MAX_BYTES and speedup >= MIN_SPEEDUP
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(a) for a in sys.argv[1:2]]))
@@ -0,0 +1,50 @@
+"""
+Scaling check for the hashed n-gram redundancy engine.
+
+    python -m benchmarks.bench_redundancy
+
+Builds documents of 10k to 1M tokens (already split into sentences, so
+spaCy is not involved) and times a full n = 1..5 profile with sentence
+attribution. Exits non-zero if the cost per token at the largest size is
+more than 2x the cost at the smallest, i.e. if scaling stops being
+roughly linear.
+"""
+
+import random
+import sys
+import time
+
+from app.redundancy import RedundancyProfile
+
+SIZES = (10_000, 100_000, 1_000_000)
+MAX_SLOWDOWN = 2.0
+
+
+def make_doc(tokens: int, seed: int = 0):
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(5000)]
+    sentences = []
+    while tokens > 0:
+        words = [rng.choice(vocab) for _ in range(min(rng.randint(8, 30), tokens))]
+        tokens -= len(words)
+        sentences.append((words, " ".join(words), []))
+    # paragraphs of 5 sentences, as extract_citations_spacy would return
+    return [sentences[i : i + 5] for i in range(0, len(sentences), 5)]
+
+
+def main() -> int:
+    per_token = []
+    for size in SIZES:
+        doc = make_doc(size)
+        start = time.perf_counter()
+        RedundancyProfile(doc).report()
+        elapsed = time.perf_counter() - start
+        per_token.append(elapsed / size)
+        print(f"{size:>9,} tokens: {elapsed:.3f}s ({per_token[-1] * 1e6:.2f}µs/token)")
+    slowdown = per_token[-1] / per_token[0]
+    print(f"per-token cost, largest vs smallest: {slowdown:.2f}x")
+    return 0 if slowdown <= MAX_SLOWDOWN else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
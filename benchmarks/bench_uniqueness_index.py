@@ -0,0 +1,53 @@
+"""
+Query latency of the cross-document uniqueness index as the corpus grows.
+
+    python -m benchmarks.bench_uniqueness_index [corpus_size]
+
+Indexes synthetic signatures of unrelated pages plus a few near-duplicates,
+then times nearest-document queries. Exits non-zero if a query averages
+over 5ms or a planted near-duplicate is not found.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.minhash import NUM_PERM
+from app.uniqueness_index import UniquenessIndex
+
+BUDGET_MS = 5.0
+QUERIES = 200
+
+
+def main(n: int = 50_000) -> int:
+    rng = np.random.default_rng(0)
+    index = UniquenessIndex(os.path.join(tempfile.mkdtemp(), "index.jsonl"))
+
+    signatures = rng.integers(0, 2**32 - 1, size=(n, NUM_PERM), dtype=np.uint32)
+    start = time.perf_counter()
+    for i, signature in enumerate(signatures):
+        index.add(f"doc{i}", signature)
+    build_s = time.perf_counter() - start
+
+    # near-duplicates: 70% of the signature kept
+    queries = signatures[rng.choice(n, QUERIES, replace=False)].copy()
+    mask = rng.random(queries.shape) > 0.7
+    queries[mask] = rng.integers(0, 2**32 - 1, size=int(mask.sum()), dtype=np.uint32)
+
+    start = time.perf_counter()
+    found = 0
+    for query in queries:
+        hits = index.nearest(query, k=1)
+        found += bool(hits) and hits[0][1] >= 0.5
+    query_ms = (time.perf_counter() - start) / QUERIES * 1000
+
+    print(f"indexed {n:,} documents in {build_s:.2f}s")
+    print(f"query: {query_ms:.3f}ms avg, near-duplicates found: {found}/{QUERIES}")
+    return 0 if query_ms <= BUDGET_MS and found == QUERIES else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000))
@@ -0,0 +1,172 @@
+"""
+End-to-end check of the site audit against a local stand-in HTTP server.
+
+    python -m benchmarks.check_site_audit [--pages N] [--workers N]
+
+Serves N generated pages plus a sitemap index from a keep-alive HTTP/1.1
+server on localhost, then:
+
+1. audits the sitemap and stops part-way, as a crash or restart would;
+2. re-runs the same audit, which must resume from the checkpoint;
+3. checks every page was scored exactly once, that the fetchers reused
+   connections (far fewer TCP connections than requests), and that
+   404 and non-HTML pages were recorded as errors.
+
+Exits non-zero if any check fails. Needs the spaCy model installed.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE = """<html><head><title>Page {n}</title></head><body>
+<nav><a href="/">Home</a> <a href="/about">About</a></nav>
+<main>
+<h1>Guide number {n}</h1>
+<p>According to the 2023 survey by Example Research, {n} percent of teams adopted the tool [1].</p>
+<p>The report notes that adoption grew fastest in Europe and Asia, citing regional data [2].</p>
+<ul><li>First finding for page {n}.</li><li>Second finding for page {n}.</li></ul>
+</main>
+<footer>Copyright Example Inc.</footer>
+</body></html>"""
+
+
+class StandIn:
+    """Threaded keep-alive server; counts requests and distinct client connections."""
+
+    def __init__(self, pages: int):
+        self.pages = pages
+        self.requests = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stand_in.lock:
+                    stand_in.requests += 1
+                    stand_in.connections.add(self.client_address)
+                body, content_type, status = stand_in.route(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def route(self, path: str):
+        half = self.pages // 2
+        if path == "/sitemap.xml":
+            locs = "".join(
+                f"<sitemap><loc>{self.base}/sitemap-{i}.xml</loc></sitemap>" for i in (0, 1)
+            )
+            return (
+                f'<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</sitemapindex>'.encode(),
+                "application/xml",
+                200,
+            )
+        if path.startswith("/sitemap-"):
+            part = int(path[len("/sitemap-") : -len(".xml")])
+            numbers = range(0, half) if part == 0 else range(half, self.pages)
+            urls = "".join(f"<url><loc>{self.base}/page/{n}</loc></url>" for n in numbers)
+            urls += f"<url><loc>{self.base}/missing</loc></url><url><loc>{self.base}/data.json</loc></url>"
+            return (
+                f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'.encode(),
+                "application/xml",
+                200,
+            )
+        if path.startswith("/page/"):
+            return PAGE.format(n=int(path[len("/page/") :])).encode(), "text/html", 200
+        if path == "/data.json":
+            return b"{}", "application/json", 200
+        return b"not found", "text/plain", 404
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ["AUDIT_DIR"] = tempfile.mkdtemp(prefix="audit-check-")
+    from app import content_audit
+
+    # the stand-in is on loopback, which check_url refuses for real audits
+    content_audit.ALLOWED_PRIVATE_HOSTS.add("127.0.0.1")
+    failures = []
+    with StandIn(args.pages) as stand_in:
+        source = f"{stand_in.base}/sitemap.xml"
+        audit_id = content_audit.audit_id_for(source)
+
+        # 1) interrupted run
+        stop = threading.Event()
+        seen = []
+
+        def interrupt(row):
+            seen.append(row)
+            if len(seen) >= args.pages // 3:
+                stop.set()
+
+        started = time.perf_counter()
+        meta = content_audit.run_audit(
+            source, fetch_workers=args.workers, stop=stop, on_row=interrupt
+        )
+        first = len(seen)
+        if meta["status"] != "stopped":
+            failures.append(f"first run should have stopped, got {meta['status']}")
+
+        # 2) resumed run
+        resumed = []
+        meta = content_audit.run_audit(source, fetch_workers=args.workers, on_row=resumed.append)
+        elapsed = time.perf_counter() - started
+        if meta["status"] != "complete":
+            failures.append(f"resumed run did not complete: {meta}")
+
+        report = content_audit.audit_report(audit_id, sort="page", limit=None)
+        rows_written = sum(1 for _ in content_audit.AuditCheckpoint(audit_id).iter_rows())
+        expected = args.pages + 2  # plus the 404 and the JSON page
+        print(f"pages in report:   {report['pages']} (expected {expected})")
+        print(f"rows checkpointed: {rows_written} ({first} before the stop, {len(resumed)} after)")
+        print(f"scored / errors:   {report['scored']} / {report['errors']}")
+        print(
+            f"HTTP requests:     {stand_in.requests} over {len(stand_in.connections)} connections"
+        )
+        print(f"averages:          {report['averages']}")
+        print(f"elapsed:           {elapsed:.2f}s")
+
+        if report["pages"] != expected:
+            failures.append("report is missing pages")
+        if rows_written != expected:
+            failures.append("pages were re-audited after resuming")
+        if report["scored"] != args.pages or report["errors"] != 2:
+            failures.append("expected every generated page scored and 2 error rows")
+        # each run opens at most one connection per fetch thread (plus sitemaps)
+        if len(stand_in.connections) > 4 * args.workers:
+            failures.append("connections were not reused")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Import-time profile for the app, failing if startup exceeds a budget.
+
+    python -m benchmarks.check_startup_budget [--budget SECONDS] [--top N]
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter, prints
+the slowest imports by cumulative time, and exits non-zero if importing
+`app.main` takes longer than STARTUP_BUDGET_S (default 1.5s). Also fails if any
+module that should be deferred to first use was imported eagerly.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+STARTUP_BUDGET_S = float(os.getenv("STARTUP_BUDGET_S", "1.5"))
+
+# Only some routes need these; they must not load at import
+DEFERRED_MODULES = ["spacy", "matplotlib", "openai", "numpy"]
+
+
+def profile_imports(target: str = "app.main"):
+    """Returns [(cumulative_us, self_us, module)] parsed from -X importtime."""
+    check = f"import sys, {target}; print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    eager = [m for m in proc.stdout.strip().split(",") if m]
+    return rows, eager
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_S)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    rows, eager = profile_imports()
+    total_s = next((c for c, _, name in rows if name.strip() == "app.main"), 0) / 1e6
+
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[: args.top]:
+        print(f"{cumulative_us / 1e3:>10.1f}ms {self_us / 1e3:>8.1f}ms {name}")
+    print(f"\nimport app.main: {total_s:.3f}s (budget {args.budget:.3f}s)")
+
+    failed = False
+    if total_s > args.budget:
+        print("FAIL: startup exceeds budget")
+        failed = True
+    if eager:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(eager)}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
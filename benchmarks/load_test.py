@@ -0,0 +1,404 @@
+"""
+End-to-end load test: boots the app under uvicorn against local stand-ins
+for Firebase Auth and the LLM APIs, replays a weighted scenario mix, and
+reports throughput, latency percentiles and error rates per route.
+
+    python -m benchmarks.load_test [--duration 30] [--concurrency 16] [--workers 1]
+        [--mix analyze=5,content-lab=2,query-search=2,brand-protector=1,dashboard=2]
+        [--llm-latency-ms 300] [--users 50] [--json report.json]
+
+Stand-ins, all in this process:
+
+- Firebase: a throwaway service account is generated for `initialize_app`,
+  and the app runs with FIREBASE_AUTH_EMULATOR_HOST set, so
+  `verify_firebase_token` accepts the unsigned ID tokens minted here (the
+  emulator's token format) while still checking audience, issuer and subject.
+- LLMs: one OpenAI-compatible /chat/completions server answers both the
+  Venice client (VENICE_API_BASE) and Groq calls (GROQ_API_URL) after
+  --llm-latency-ms, with replies shaped like what each prompt asks for.
+
+Caches and stores point at a temporary directory, so every run starts cold.
+429/503 from admission control are counted as rejections, not errors.
+Exits non-zero if any route's error rate is over --max-error-rate. Needs
+the spaCy model installed.
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+import numpy as np
+import requests
+
+PROJECT_ID = "loadtest-local"
+DEFAULT_MIX = "analyze=5,content-lab=2,query-search=2,brand-protector=1,dashboard=2"
+
+TOPICS = ["solar panels", "home espresso", "trail running shoes", "password managers", "meal kits"]
+BRANDS = ["Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli"]
+METHODS = ["Quotation Addition", "Stats Addition", "Fluency Optimization", "Keyword Stuffing"]
+SENTENCES = [
+    "According to the 2023 survey by Example Research, {n} percent of buyers compared three brands [1].",
+    "The report notes that adoption grew fastest in Europe and Asia [2].",
+    "Independent lab tests at https://example.org measured a {n} percent efficiency gain [3].",
+    "Most reviewers recommend starting small and upgrading after the first year.",
+    "Prices fell by {n} percent between 2019 and 2024, according to industry data [1][2].",
+    "Experts at the National Institute caution that results vary by region and use.",
+]
+
+
+def _b64(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+class FirebaseStub:
+    """Service account for `initialize_app` and emulator-format ID tokens."""
+
+    def __init__(self, directory: str):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode("ascii")
+        self.service_account_path = os.path.join(directory, "service_account.json")
+        with open(self.service_account_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "type": "service_account",
+                    "project_id": PROJECT_ID,
+                    "private_key_id": "loadtest",
+                    "private_key": pem,
+                    "client_email": f"loadtest@{PROJECT_ID}.iam.gserviceaccount.com",
+                    "client_id": "0",
+                    "token_uri": "https://oauth2.googleapis.com/token",
+                },
+                f,
+            )
+
+    @staticmethod
+    def mint(uid: str, lifetime: int = 3600) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+            "aud": PROJECT_ID,
+            "sub": uid,
+            "user_id": uid,
+            "email": f"{uid}@loadtest.local",
+            "auth_time": now,
+            "iat": now,
+            "exp": now + lifetime,
+            "firebase": {"identities": {}, "sign_in_provider": "password"},
+        }
+        return f"{_b64({'alg': 'none', 'typ': 'JWT'})}.{_b64(claims)}."
+
+
+def fake_reply(prompt: str, rng: random.Random) -> str:
+    """A reply shaped like what the app's prompt asks for."""
+    if '"brand"' in prompt and "JSON" in prompt:
+        brand = re.search(r'brand "([^"]+)"', prompt)
+        name = brand.group(1) if brand else "Brand"
+        return json.dumps(
+            {
+                "brand": name,
+                "description": f"{name} makes consumer products sold worldwide.",
+                "offerings": "Hardware, subscriptions and support plans.",
+                "criticisms": "Pricing and customer service wait times.",
+                "alternatives": ", ".join(rng.sample(BRANDS, 3)),
+            }
+        )
+    if "Format as JSON array" in prompt:
+        topic = re.search(r"Topic: (.+)", prompt)
+        t = topic.group(1).strip() if topic else "this"
+        return json.dumps(
+            [
+                f"What is the best {t}?",
+                f"How do I choose {t}?",
+                f"{t} vs alternatives",
+                f"Why are {t} expensive?",
+                f"Where to buy {t}?",
+            ]
+        )
+    if "JSON array of objects" in prompt:
+        return json.dumps([{"topic": f"Subtopic {i}", "score": 90 - 5 * i} for i in range(5)])
+    if "top 10 brands" in prompt:
+        return "\n".join(f"{i + 1}. {b}" for i, b in enumerate(rng.sample(BRANDS, len(BRANDS))))
+    body = prompt[-2000:]
+    return body + "\n\nAccording to a 2024 industry report, 42 percent of readers agree [4]."
+
+
+class FakeLLM:
+    """OpenAI-compatible chat completions on localhost, with fixed latency and jitter."""
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.calls = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                request = json.loads(body or b"{}")
+                with fake.lock:
+                    fake.calls += 1
+                    rng = random.Random(fake.calls)
+                time.sleep(fake.latency_s * rng.uniform(0.5, 1.5))
+                prompt = request.get("messages", [{}])[-1].get("content", "")
+                reply = fake_reply(prompt, rng)
+                payload = json.dumps(
+                    {
+                        "id": f"chatcmpl-{fake.calls}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": request.get("model", "fake"),
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": reply},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {
+                            "prompt_tokens": len(prompt) // 4,
+                            "completion_tokens": len(reply) // 4,
+                            "total_tokens": (len(prompt) + len(reply)) // 4,
+                        },
+                    }
+                ).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.address = f"127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+def make_content(rng: random.Random, paragraphs: int = 4) -> str:
+    return "\n\n".join(
+        " ".join(rng.choice(SENTENCES).format(n=rng.randint(5, 95)) for _ in range(5))
+        for _ in range(paragraphs)
+    )
+
+
+# Scenario → (route label, method, path, form data or None); cookies are added per user
+def scenario(name: str, rng: random.Random) -> Tuple[str, str, str, Dict]:
+    if name == "analyze":
+        return "POST /analyze", "POST", "/analyze", {"content": make_content(rng)}
+    if name == "content-lab":
+        content = make_content(rng, 2)
+        data = {"content": content, "original_copy": content, "method": rng.choice(METHODS)}
+        return "POST /content-lab", "POST", "/content-lab", data
+    if name == "query-search":
+        return "POST /query-search", "POST", "/query-search", {"topic": rng.choice(TOPICS)}
+    if name == "brand-protector":
+        brand, competitor = rng.sample(BRANDS, 2)
+        data = {"main_brand": brand, "competitors": competitor}
+        return "POST /brand-protector", "POST", "/brand-protector", data
+    if name == "dashboard":
+        return "GET /dashboard", "GET", "/dashboard", None
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        scenario(name.strip(), random.Random(0))  # validates the name
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def boot_app(port: int, workers: int, env: Dict[str, str], timeout: float = 180.0):
+    """Starts uvicorn and waits until /readyz reports the model loaded."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1"]
+        + ["--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env={**os.environ, **env},
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"app exited during startup with code {proc.returncode}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/readyz", timeout=2).status_code == 200:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("app did not become ready in time")
+
+
+def run_load(
+    base_url: str, weights: Dict[str, float], duration: float, concurrency: int, users: int
+) -> Tuple[List[Tuple[str, int, float]], float]:
+    """Closed loop: each of `concurrency` clients sends its next request when the last returns."""
+    tokens = [(f"user-{i}", FirebaseStub.mint(f"user-{i}")) for i in range(users)]
+    names, probs = list(weights), np.array(list(weights.values()))
+    probs = probs / probs.sum()
+    samples: List[Tuple[str, int, float]] = []  # (route, status or 0 on exception, seconds)
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(seed: int) -> None:
+        rng = random.Random(seed)
+        np_rng = np.random.default_rng(seed)
+        session = requests.Session()
+        local = []
+        while time.monotonic() < deadline:
+            uid, token = rng.choice(tokens)
+            route, method, path, data = scenario(names[np_rng.choice(len(names), p=probs)], rng)
+            cookies = {"firebase_id_token": token, "user_id": uid}
+            start = time.perf_counter()
+            try:
+                response = session.request(
+                    method,
+                    base_url + path,
+                    data=data,
+                    cookies=cookies,
+                    timeout=120,
+                    allow_redirects=False,
+                )
+                status = response.status_code
+            except requests.RequestException:
+                status = 0
+            local.append((route, status, time.perf_counter() - start))
+        with lock:
+            samples.extend(local)
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.monotonic() - start
+
+
+def summarize(samples: List[Tuple[str, int, float]], elapsed: float) -> Dict[str, Dict]:
+    by_route = defaultdict(list)
+    for route, status, seconds in samples:
+        by_route[route].append((status, seconds))
+        by_route["ALL"].append((status, seconds))
+    report = {}
+    for route, rows in sorted(by_route.items(), key=lambda kv: (kv[0] == "ALL", kv[0])):
+        statuses = np.array([s for s, _ in rows])
+        rejected = np.isin(statuses, (429, 503))
+        latencies = np.array([sec for _, sec in rows]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report[route] = {
+            "requests": len(rows),
+            "throughput": round(len(rows) / elapsed, 2),
+            "p50_ms": round(float(p50), 1),
+            "p95_ms": round(float(p95), 1),
+            "p99_ms": round(float(p99), 1),
+            "error_rate": round(float(np.mean((statuses == 0) | (statuses >= 500) & ~rejected)), 4),
+            "rejected_rate": round(float(np.mean(rejected)), 4),
+        }
+    return report
+
+
+def print_report(report: Dict[str, Dict]) -> None:
+    header = f"{'route':<24}{'reqs':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header + f"{'errors':>9}{'rejected':>10}")
+    for route, r in report.items():
+        print(
+            f"{route:<24}{r['requests']:>7}{r['throughput']:>9.2f}{r['p50_ms']:>9.1f}"
+            f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['error_rate']:>9.1%}"
+            f"{r['rejected_rate']:>10.1%}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    weights = parse_mix(args.mix)
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    firebase = FirebaseStub(workdir)
+    llm = FakeLLM(args.llm_latency_ms / 1000)
+    port = free_port()
+    env = {
+        "FIREBASE_SERVICE_ACCOUNT_JSON": firebase.service_account_path,
+        "FIREBASE_AUTH_EMULATOR_HOST": llm.address,
+        "VENICE_API_BASE": f"http://{llm.address}/v1",
+        "VENICE_API_KEY": "loadtest",
+        "GROQ_API_URL": f"http://{llm.address}/openai/v1/chat/completions",
+        "GROQ_API_KEY": "loadtest",
+        "SHARED_CACHE_PATH": os.path.join(workdir, "shared_cache.sqlite3"),
+        "PARSE_STORE_DIR": os.path.join(workdir, "parse_store"),
+        "UNIQUENESS_INDEX_PATH": os.path.join(workdir, "uniqueness_index.jsonl"),
+        "AUDIT_DIR": os.path.join(workdir, "audits"),
+        "LOG_LEVEL": "WARNING",
+    }
+    app = boot_app(port, args.workers, env)
+    try:
+        print(
+            f"{args.concurrency} clients, {args.users} users, {args.workers} worker(s), "
+            f"{args.duration:.0f}s, LLM latency {args.llm_latency_ms:.0f}ms, mix {args.mix}"
+        )
+        samples, elapsed = run_load(
+            f"http://127.0.0.1:{port}", weights, args.duration, args.concurrency, args.users
+        )
+    finally:
+        app.terminate()
+        app.wait(timeout=30)
+        llm.close()
+
+    report = summarize(samples, elapsed)
+    print_report(report)
+    print(f"fake LLM calls: {llm.calls}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "routes": report, "llm_calls": llm.calls}, f, indent=2)
+    worst = max((r["error_rate"] for r in report.values()), default=0.0)
+    return 0 if samples and worst <= args.max_error_rate else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())